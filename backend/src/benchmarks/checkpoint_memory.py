@@ -0,0 +1,88 @@
+"""
+Tracks process RSS while many short conversations are checkpointed, comparing the old in-memory saver with the configured checkpointer.
+
+Each simulated conversation mirrors a chat turn in the project manager: the graph adds messages, interrupts for user input and is resumed once.
+No model or application database is needed.
+
+Run from backend/src:
+```
+python -m benchmarks.checkpoint_memory                       # 10k conversations against MemorySaver and a temporary SQLite file
+python -m benchmarks.checkpoint_memory --conversations 2000  # shorter run
+CHECKPOINTER=postgres python -m benchmarks.checkpoint_memory --skip-memory
+```
+"""
+import os
+import gc
+import sys
+import uuid
+import resource
+import tempfile
+from typing import Annotated
+from pydantic import BaseModel
+from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, add_messages
+from langgraph.types import Command, interrupt
+from interface.utils._checkpointer import open_checkpointer, compact_checkpoints
+
+SAMPLES = 10
+
+class ConversationState(BaseModel):
+    messages: Annotated[list[AnyMessage], add_messages] = []
+
+def reply(state: ConversationState):
+    return {"messages": [AIMessage("Which project should the new task belong to? " * 8)]}
+
+def clarify(state: ConversationState):
+    return {"messages": [HumanMessage(interrupt("Please provide the project name."))]}
+
+def build_graph():
+    graph = StateGraph(ConversationState)
+    graph.add_node("reply", reply)
+    graph.add_node("clarify", clarify)
+    graph.set_entry_point("reply")
+    graph.add_edge("reply", "clarify")
+    graph.set_finish_point("clarify")
+
+    return graph
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current RSS on platforms without procfs
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+
+def simulate(label: str, checkpointer, conversations: int, compact=None):
+    app = build_graph().compile(checkpointer=checkpointer)
+    every = max(conversations // SAMPLES, 1)
+
+    print(label)
+    for i in range(1, conversations + 1):
+        config = {"configurable": {"thread_id": uuid.uuid4()}}
+        app.invoke({"messages": [HumanMessage("I want to add a task called Draft Wireframes.")]}, config=config)
+        app.invoke(Command(resume="Website Redesign"), config=config)
+
+        if i % every == 0:
+            if compact is not None:
+                compact(checkpointer)
+            gc.collect()
+            print(f"  {i:>7} conversations   rss: {rss_mb():8.1f} MB")
+
+def main(argv: list[str]):
+    conversations = int(argv[argv.index("--conversations") + 1]) if "--conversations" in argv else 10_000
+
+    # Every conversation is idle as soon as it finishes, so a zero TTL lets compaction show the steady state
+    os.environ.setdefault("CHECKPOINT_TTL", "0")
+
+    if "--skip-memory" not in argv:
+        simulate("MemorySaver (previous behaviour)", MemorySaver(), conversations)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.setdefault("CHECKPOINT_SQLITE_PATH", os.path.join(directory, "checkpoints.sqlite"))
+        with open_checkpointer() as checkpointer:
+            simulate(f"{type(checkpointer).__name__} with compaction", checkpointer, conversations, compact_checkpoints)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
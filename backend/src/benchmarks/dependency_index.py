@@ -0,0 +1,54 @@
+"""
+Times dependency inserts and cycle checks in interface.utils.dependency_index on a synthetic dependency graph.
+
+Dependencies are drawn from a hidden random ranking of the tasks, so the graph stays acyclic and arrives in an order unrelated
+to it, which makes the index reorder tasks. Every cycle check then tests the reverse of an existing dependency, which must be rejected.
+Run from backend/src:
+```
+python -m benchmarks.dependency_index --tasks 30000 --dependencies 100000
+```
+"""
+import sys
+import time
+import random
+from interface.utils._dependency_index import DependencyIndex
+
+def arg(argv: list[str], name: str, default: str) -> str:
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def main(argv: list[str]):
+    tasks = int(arg(argv, "--tasks", "30000"))
+    dependencies = int(arg(argv, "--dependencies", "100000"))
+    checks = int(arg(argv, "--checks", "10000"))
+    rng = random.Random(0)
+
+    ranking = list(range(tasks))
+    rng.shuffle(ranking)
+    rank = {task: position for position, task in enumerate(ranking)}
+
+    edges = set[tuple[int, int]]()
+    while len(edges) < dependencies:
+        task, dependent = rng.sample(range(tasks), 2)
+        edges.add((task, dependent) if rank[task] < rank[dependent] else (dependent, task))
+
+    # Stand-alone index that is never refreshed from the database
+    index = DependencyIndex()
+    index._version, index._checked_at = 0, float("inf")
+
+    start = time.perf_counter()
+    for task, dependent in edges:
+        index.add(task, dependent)
+    elapsed = time.perf_counter() - start
+    print(f"{dependencies} inserts: {1000 * elapsed:.0f} ms ({1e6 * elapsed / dependencies:.1f} us each)")
+
+    timings = list[float]()
+    for task, dependent in rng.sample(sorted(edges), checks):
+        start = time.perf_counter()
+        assert index._creates_cycle(dependent, task)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"{checks} cycle checks: p50 {1e6 * timings[len(timings) // 2]:.1f} us, p99 {1e6 * timings[int(len(timings) * 0.99)]:.1f} us, max {1e6 * timings[-1]:.1f} us")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Measures how long repeated structured-output calls take when served by interface.utils.ResponseCache.
+
+Routing prompts in the shape that suggest_commit sends (system prompt, assistant suggestion, user reply) are sent through
+a model wrapped with the cache twice: the first pass fills the cache, the second is served from it.
+By default the model is a stand-in that sleeps for --latency seconds per call, so the benchmark runs without Ollama;
+with --ollama the configured llama3.1 model is used instead.
+
+Run from backend/src:
+```
+python -m benchmarks.llm_cache                       # in-memory tier, 0.5 s stand-in model
+LLM_CACHE_PATH=/tmp/llm_cache.sqlite python -m benchmarks.llm_cache --cold-start   # disk tier, memory cleared between passes
+python -m benchmarks.llm_cache --ollama
+```
+"""
+import sys
+import time
+from statistics import mean
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+from interface.utils import ResponseCache
+
+SYSTEM_PROMPT = """
+        You are helping the user to create and manage their projects as part of a project management software.
+        Based on the user's response to the AI-prompted question, return the appropriate number of calls for each function at your disposal.
+        """
+SUGGESTIONS = [
+    "Would you like to add a dependency between the new tasks?",
+    "Would you like to assign a resource to this task?",
+    "Would you like to add requirements to the new project?",
+]
+REPLIES = ["Yes, please.", "No, thank you.", "Sure, add two of them."]
+
+class DelayedModel(FakeListChatModel):
+    latency: float = 0.5
+
+    def _call(self, *args, **kwargs) -> str:
+        time.sleep(self.latency)
+        return super()._call(*args, **kwargs)
+
+def prompts() -> list[list]:
+    return [
+        [SystemMessage(SYSTEM_PROMPT), AIMessage(suggestion), HumanMessage(reply)]
+        for suggestion in SUGGESTIONS for reply in REPLIES
+    ]
+
+def timed_pass(model, batch: list[list]) -> list[float]:
+    # Outside the graph no node names the call, so the cache is opted into through the run metadata
+    call = RunnableLambda(model.invoke).with_config(metadata={"llm_cache": True})
+    timings = []
+    for messages in batch:
+        start = time.perf_counter()
+        call.invoke(messages)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main(argv: list[str]):
+    cache = ResponseCache()
+    cache.clear()
+
+    if "--ollama" in argv:
+        from langchain_ollama import ChatOllama
+        model = ChatOllama(model="llama3.1:8b", cache=cache)
+    else:
+        latency = float(argv[argv.index("--latency") + 1]) if "--latency" in argv else 0.5
+        model = DelayedModel(responses=["{}"], latency=latency, cache=cache)
+
+    batch = prompts()
+    cold = timed_pass(model, batch)
+    if "--cold-start" in argv:
+        # Drop the memory tier so that the second pass is served from disk, as after a restart
+        cache._entries.clear()
+    warm = timed_pass(model, batch)
+
+    print(f"{len(batch)} routing prompts, disk tier: {"on" if cache._disk is not None else "off"}")
+    print(f"  uncached  mean: {1000 * mean(cold):10.3f} ms")
+    print(f"  cached    mean: {1000 * mean(warm):10.3f} ms   ({1e6 * mean(warm):.0f} us)")
+    print(f"  stats: {cache.stats()}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Measures HTTP throughput of routes.py as the number of uvicorn workers grows.
+
+For each worker count a server is started with WORKERS=n, warmed up, then driven by a fixed number of concurrent clients for a fixed duration.
+By default the clients poll GET /chat for random threads, which exercises the checkpointer and database without the model.
+With --chat they instead start new conversations through POST /chat, which includes the full model round trip.
+
+Multiple workers require CHECKPOINTER=postgres (see routes.py). Run from backend/src with the database configured in .env:
+```
+CHECKPOINTER=postgres python -m benchmarks.load_test --workers 1 2 4 --clients 32 --duration 20
+```
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def arg(argv: list[str], name: str, default: str) -> str:
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def wait_until_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{base_url}/metrics", timeout=1)
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.25)
+
+    raise TimeoutError(f"Server at {base_url} did not start within {timeout} seconds")
+
+def request(base_url: str, chat: bool):
+    if chat:
+        body = json.dumps({"content": "I want to create a new project.", "threadID": str(uuid.uuid4()), "isFirstMessage": True}).encode()
+        req = urllib.request.Request(f"{base_url}/chat", data=body, headers={"Content-Type": "application/json"}, method="POST")
+    else:
+        req = urllib.request.Request(f"{base_url}/chat?thread={uuid.uuid4()}")
+
+    with urllib.request.urlopen(req, timeout=300) as response:
+        response.read()
+
+def client(base_url: str, chat: bool, deadline: float) -> tuple[int, int, list[float]]:
+    completed, failed, latencies = 0, 0, []
+
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            request(base_url, chat)
+            completed += 1
+            latencies.append(time.monotonic() - start)
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            failed += 1
+
+    return completed, failed, latencies
+
+def run(workers: int, clients: int, duration: float, chat: bool, port: int) -> dict[str, float]:
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "routes.py"],
+        env={**os.environ, "WORKERS": str(workers), "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        wait_until_ready(base_url)
+        client(base_url, chat, time.monotonic() + 2)
+
+        deadline = time.monotonic() + duration
+        with ThreadPoolExecutor(clients) as executor:
+            results = list(executor.map(lambda _: client(base_url, chat, deadline), range(clients)))
+    finally:
+        server.terminate()
+        server.wait()
+
+    completed = sum(done for done, _, _ in results)
+    latencies = sorted(latency for _, _, client_latencies in results for latency in client_latencies)
+
+    return {
+        "throughput": completed / duration,
+        "failed": sum(failed for _, failed, _ in results),
+        "p50_ms": 1000 * latencies[len(latencies) // 2] if latencies else 0.0,
+        "p95_ms": 1000 * latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+    }
+
+def main(argv: list[str]):
+    worker_counts = [1, 2, 4]
+    if "--workers" in argv:
+        values = argv[argv.index("--workers") + 1:]
+        worker_counts = [int(n) for n in values[:next((i for i, n in enumerate(values) if not n.isdigit()), len(values))]]
+    clients = int(arg(argv, "--clients", "32"))
+    duration = float(arg(argv, "--duration", "20"))
+    port = int(arg(argv, "--port", "8100"))
+    chat = "--chat" in argv
+
+    print(f"{"POST" if chat else "GET"} /chat with {clients} clients for {duration:.0f}s")
+    baseline = None
+    for workers in worker_counts:
+        stats = run(workers, clients, duration, chat, port)
+        baseline = baseline or stats["throughput"]
+        print(
+            f"  workers: {workers:>2}   {stats["throughput"]:8.1f} req/s ({stats["throughput"] / baseline if baseline else 0:4.2f}x)"
+            f"   p50: {stats["p50_ms"]:7.1f} ms   p95: {stats["p95_ms"]:7.1f} ms   failed: {stats["failed"]}"
+        )
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
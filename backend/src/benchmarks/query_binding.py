@@ -0,0 +1,53 @@
+"""
+Compares the cost of the old string-splicing query path with the cached, driver-parameterized one.
+
+Run from backend/src:
+```
+python -m benchmarks.query_binding          # client-side preparation only
+python -m benchmarks.query_binding --db     # also time round trips against the configured database
+```
+"""
+import sys
+import timeit
+from interface.utils._formatting import format_sql_query, parameterize_sql_query
+
+HOT_QUERIES = {
+    "task names": ("SELECT name FROM public.tasks", ()),
+    "project lookup": ("SELECT project_id, description FROM public.projects WHERE name = !p1", ("Website Redesign",)),
+    "analyst get_tasks": (
+        """
+        SELECT name, description, start, \"end\" 
+        FROM public.tasks 
+        WHERE
+            project_id = !p1
+            AND name = ANY(ARRAY[!p2]::varchar[])
+            AND start != ANY(ARRAY[!p3]::date[])
+            AND (\"end\" != ANY(ARRAY[!p4]::date[]) OR \"end\" IS NULL)
+        """,
+        (1, ["Draft Wireframes", "Build Landing Page", "__none__"], ["0001-01-01"], ["0001-01-01"]),
+    ),
+}
+
+def bench_client(number: int = 100_000):
+    print(f"Client-side preparation ({number} calls each)")
+    for label, (query, args) in HOT_QUERIES.items():
+        old = timeit.timeit(lambda: format_sql_query(query, *args), number=number)
+        new = timeit.timeit(lambda: parameterize_sql_query(query).bind(*args), number=number)
+        print(f"  {label:<20} old: {1e6 * old / number:7.2f} us   new: {1e6 * new / number:7.2f} us   speedup: {old / new:5.1f}x")
+
+def bench_db(number: int = 1_000):
+    from dotenv import load_dotenv
+    from interface.utils._db_utils import get_cursor, run_statement
+
+    load_dotenv()
+    print(f"Database round trips ({number} calls each)")
+    for label, (query, args) in HOT_QUERIES.items():
+        with get_cursor() as cur:
+            old = timeit.timeit(lambda: (cur.execute(format_sql_query(query, *args)), cur.fetchall()), number=number)
+            new = timeit.timeit(lambda: (run_statement(cur, query, *args), cur.fetchall()), number=number)
+        print(f"  {label:<20} old: {1e3 * old / number:7.3f} ms   new: {1e3 * new / number:7.3f} ms   speedup: {old / new:5.1f}x")
+
+if __name__ == "__main__":
+    bench_client()
+    if "--db" in sys.argv:
+        bench_db()
@@ -0,0 +1,53 @@
+"""
+Times building interface.utils.resource_calendar and asking whether resources are free, on synthetic assignments.
+
+Every assignment books a resource for one to ten days within a year, and every lookup asks about a random range of up to ten days.
+Run from backend/src:
+```
+python -m benchmarks.resource_calendar --resources 200 --assignments 20000
+```
+"""
+import sys
+import time
+import random
+from datetime import date, timedelta
+from interface.utils._resource_calendar import ResourceCalendar
+
+def arg(argv: list[str], name: str, default: str) -> str:
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def main(argv: list[str]):
+    resources = int(arg(argv, "--resources", "200"))
+    assignments = int(arg(argv, "--assignments", "20000"))
+    lookups = int(arg(argv, "--lookups", "10000"))
+    rng = random.Random(0)
+    first_day = date(2025, 1, 1)
+
+    rows = list[tuple[int, int, str, str, date, date]]()
+    for i in range(assignments):
+        start = first_day + timedelta(days=rng.randrange(365))
+        rows.append((0, 0, f"resource {rng.randrange(resources)}", f"task {i}", start, start + timedelta(days=rng.randrange(10))))
+
+    # Stand-alone calendar that is never refreshed from the database
+    calendar = ResourceCalendar()
+    start = time.perf_counter()
+    calendar._store(rows)
+    calendar._checked_at = float("inf")
+    print(f"build from {assignments} assignments: {1000 * (time.perf_counter() - start):.1f} ms")
+
+    timings = list[float]()
+    conflicts = 0
+    for _ in range(lookups):
+        contact = f"resource {rng.randrange(resources)}"
+        lookup_start = first_day + timedelta(days=rng.randrange(365))
+        lookup_end = lookup_start + timedelta(days=rng.randrange(10))
+
+        start = time.perf_counter()
+        conflicts += bool(calendar.conflicts(contact, lookup_start, lookup_end))
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    print(f"{lookups} lookups ({conflicts} busy): p50 {1e6 * timings[len(timings) // 2]:.1f} us, p99 {1e6 * timings[int(len(timings) * 0.99)]:.1f} us, max {1e6 * timings[-1]:.1f} us")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,55 @@
+"""
+Times the schedule analyses of interface.utils.ScheduleGraph on a synthetic project.
+
+Tasks last one to five days and each dependency points from a task to a later one, so the graph is acyclic.
+Run from backend/src:
+```
+python -m benchmarks.schedule --tasks 10000 --dependencies 30000
+```
+"""
+import sys
+import time
+import random
+from datetime import date, timedelta
+from interface.utils import ScheduleGraph
+
+def arg(argv: list[str], name: str, default: str) -> str:
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def synthetic_project(tasks: int, dependencies: int, seed: int = 0) -> tuple[list[tuple[str, date, date]], list[tuple[str, str]]]:
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+
+    rows = list[tuple[str, date, date]]()
+    for i in range(tasks):
+        task_start = start + timedelta(days=rng.randrange(365))
+        rows.append((f"task {i}", task_start, task_start + timedelta(days=rng.randint(1, 5))))
+
+    edges = list[tuple[str, str]]()
+    for _ in range(dependencies):
+        task = rng.randrange(tasks - 1)
+        edges.append((f"task {task}", f"task {rng.randrange(task + 1, tasks)}"))
+
+    return rows, edges
+
+def timed(label: str, run):
+    start = time.perf_counter()
+    result = run()
+    print(f"{label:<18} {1000 * (time.perf_counter() - start):10.1f} ms")
+    return result
+
+def main(argv: list[str]):
+    tasks = int(arg(argv, "--tasks", "10000"))
+    dependencies = int(arg(argv, "--dependencies", "30000"))
+    rows, edges = synthetic_project(tasks, dependencies)
+
+    graph = timed("build", lambda: ScheduleGraph(rows, edges))
+    timed("topological order", graph.topological_order)
+    critical_path = timed("critical path", graph.critical_path)
+    chain = timed("longest chain", graph.longest_chain)
+    shifts = timed("slip", lambda: graph.slip("task 0", rows[0][2] + timedelta(days=30)))
+
+    print(f"\n{tasks} tasks, {dependencies} dependencies: critical path of {len(critical_path.tasks)} tasks, longest chain of {len(chain)}, slip moves {len(shifts)} tasks")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
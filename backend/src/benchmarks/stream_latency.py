@@ -0,0 +1,55 @@
+"""
+Compares time to first visible text between POST /chat and POST /chat/stream on a running server.
+
+Each round starts a new conversation with the same opening message on both endpoints.
+For POST /chat the first text arrives with the full response; for the stream it arrives with the first "token" event.
+
+Start the server (python routes.py), then run from backend/src:
+```
+python -m benchmarks.stream_latency --rounds 5 --message "I want to add a new task."
+```
+"""
+import sys
+import json
+import time
+import uuid
+import urllib.request
+from statistics import median
+
+def arg(argv: list[str], name: str, default: str) -> str:
+    return argv[argv.index(name) + 1] if name in argv else default
+
+def post(base_url: str, path: str, message: str) -> urllib.request.Request:
+    body = json.dumps({"content": message, "threadID": str(uuid.uuid4()), "isFirstMessage": True}).encode()
+    return urllib.request.Request(f"{base_url}{path}", data=body, headers={"Content-Type": "application/json"}, method="POST")
+
+def blocking_round(base_url: str, message: str) -> tuple[float, float]:
+    start = time.monotonic()
+    with urllib.request.urlopen(post(base_url, "/chat", message), timeout=600) as response:
+        response.read()
+    elapsed = time.monotonic() - start
+    return elapsed, elapsed
+
+def streaming_round(base_url: str, message: str) -> tuple[float, float]:
+    start, first_token = time.monotonic(), None
+    with urllib.request.urlopen(post(base_url, "/chat/stream", message), timeout=600) as response:
+        for line in response:
+            if first_token is None and line.startswith(b"event: token"):
+                first_token = time.monotonic() - start
+    total = time.monotonic() - start
+    return first_token if first_token is not None else total, total
+
+def main(argv: list[str]):
+    base_url = arg(argv, "--url", "http://127.0.0.1:8000")
+    rounds = int(arg(argv, "--rounds", "5"))
+    message = arg(argv, "--message", "I want to add a new task.")
+
+    for name, run in (("POST /chat", blocking_round), ("POST /chat/stream", streaming_round)):
+        results = [run(base_url, message) for _ in range(rounds)]
+        print(
+            f"{name:<18} first text p50: {1000 * median(first for first, _ in results):8.0f} ms"
+            f"   complete p50: {1000 * median(total for _, total in results):8.0f} ms"
+        )
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
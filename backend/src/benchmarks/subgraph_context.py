@@ -0,0 +1,67 @@
+"""
+Estimates the prompt tokens handed to each subgraph call, comparing the full parent history with the scoped subgraph context.
+
+A session is simulated with the parent graph's message pattern: a user request that queues several workers,
+the template outputs of those workers, a follow-up suggestion and the user's reply.
+Tokens are estimated at four characters per token, as in interface.utils._history.
+
+Run from backend/src:
+```
+python -m benchmarks.subgraph_context               # 30 turns, 3 queued workers per turn
+python -m benchmarks.subgraph_context --turns 100 --workers 5
+```
+"""
+import sys
+from statistics import mean
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+from interface.core.schemas import Action, OverallState
+from interface.core.templates import TASK_MAKER_OUTPUT
+from interface.utils._history import estimate_tokens, subgraph_view
+
+def task_params(turn: int, worker: int) -> dict[str, str]:
+    return {
+        "project_name": "Website Redesign",
+        "task_name": f"Task {turn}.{worker}",
+        "task_desc": "The team drafts, reviews and signs off the deliverables for this milestone of the redesign.",
+        "start_date": "2025-03-01",
+        "end_date": "2025-03-14",
+    }
+
+def simulate(turns: int, workers: int) -> tuple[list[int], list[int]]:
+    state = OverallState(user_input="", messages=[])
+    before, after = list[int](), list[int]()
+
+    for turn in range(turns):
+        request = HumanMessage(f"Please add {workers} tasks to the Website Redesign project for milestone {turn}, each lasting two weeks from March 1st.")
+        state.messages = add_messages(state.messages, [request])
+
+        for worker in range(workers):
+            # Context that the subgraph would receive for this call
+            before.append(estimate_tokens(state.messages))
+            after.append(estimate_tokens(subgraph_view(state)))
+
+            params = task_params(turn, worker)
+            state.messages = add_messages(state.messages, [AIMessage(TASK_MAKER_OUTPUT.format_map(params))])
+            state.actions_taken = list(state.actions_taken) + [Action(name="task_maker", params=params)]
+
+        state.messages = add_messages(state.messages, [
+            AIMessage("Would you like to add a dependency between any of the new tasks?"),
+            HumanMessage("No, thank you."),
+        ])
+
+    return before, after
+
+def main(argv: list[str]):
+    turns = int(argv[argv.index("--turns") + 1]) if "--turns" in argv else 30
+    workers = int(argv[argv.index("--workers") + 1]) if "--workers" in argv else 3
+
+    before, after = simulate(turns, workers)
+
+    print(f"{turns} turns, {workers} queued workers per turn, {len(before)} subgraph calls")
+    print(f"  full history     mean: {mean(before):8.0f} tokens   last call: {before[-1]:8d}   total: {sum(before):10d}")
+    print(f"  scoped context   mean: {mean(after):8.0f} tokens   last call: {after[-1]:8d}   total: {sum(after):10d}")
+    print(f"  reduction: {sum(before) / sum(after):.1f}x")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
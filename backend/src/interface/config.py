@@ -1,6 +1,89 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any
+from functools import cache
 from dotenv import load_dotenv
 from langchain_ollama import ChatOllama
+from ollama import AsyncClient, Client, ResponseError
 
 load_dotenv()
 
-model = ChatOllama(model="llama3.1:8b")
\ No newline at end of file
+from interface.utils import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+response_cache = ResponseCache()
+
+def model_profiles() -> dict[str, dict[str, Any]]:
+    """
+    Model settings for each graph node, read from the environment:
+    - MODEL: model used for dialogue and analysis (default llama3.1:8b)
+    - SMALL_MODEL: model used for routing and suggestions, which only fill small structured outputs (default llama3.2:3b)
+    - MODEL_KEEP_ALIVE: how long Ollama keeps a model loaded after its last request (default 30m)
+    - MODEL_PROFILES: JSON object of per-node overrides merged over the defaults, e.g. {"liaison": {"model": "llama3.1:8b"}}
+
+    Nodes without a profile use "default". Profiles that share a model should share num_ctx, since Ollama reloads a model whose context size changes.
+    """
+    large = os.environ.get("MODEL", "llama3.1:8b")
+    small = os.environ.get("SMALL_MODEL", "llama3.2:3b")
+    keep_alive = os.environ.get("MODEL_KEEP_ALIVE", "30m")
+
+    router = {"model": small, "num_ctx": 4096, "num_predict": 256, "temperature": 0, "keep_alive": keep_alive}
+    profiles = {
+        "default": {"model": large, "num_ctx": 8192, "num_predict": None, "temperature": None, "keep_alive": keep_alive},
+        "liaison": router,
+        "suggestion_commit": router,
+        "suggestion": {**router, "num_predict": 128, "temperature": 0.3},
+        "compaction": {"model": large, "num_ctx": 8192, "num_predict": 512, "temperature": 0, "keep_alive": keep_alive},
+    }
+
+    for node, overrides in json.loads(os.environ.get("MODEL_PROFILES", "{}")).items():
+        profiles[node] = {**profiles.get(node, profiles["default"]), **overrides}
+
+    return profiles
+
+@cache
+def _chat_model(profile: str) -> ChatOllama:
+    return ChatOllama(**json.loads(profile), cache=response_cache)
+
+def model_for(node: str) -> ChatOllama:
+    """Returns the chat model configured for node, shared between nodes with identical profiles."""
+    profiles = model_profiles()
+    return _chat_model(json.dumps(profiles.get(node, profiles["default"]), sort_keys=True))
+
+def warmup_targets() -> list[dict[str, Any]]:
+    """Distinct (model, context size, keep alive) combinations to load, so that no profile triggers a reload."""
+    targets = {
+        (profile["model"], profile["num_ctx"], profile["keep_alive"]): profile
+        for profile in model_profiles().values()
+    }
+    return list(targets.values())
+
+def warm_up_models():
+    """Loads every profiled model into Ollama with an empty prompt, unless MODEL_WARMUP=off."""
+    if os.environ.get("MODEL_WARMUP", "on") == "off":
+        return
+
+    client = Client()
+    for profile in warmup_targets():
+        try:
+            client.generate(model=profile["model"], prompt="", keep_alive=profile["keep_alive"], options={"num_ctx": profile["num_ctx"]})
+        except (ResponseError, ConnectionError) as error:
+            logger.warning("Could not warm up %s: %s", profile["model"], error)
+
+async def awarm_up_models():
+    """Asynchronous warm_up_models, loading all profiled models concurrently."""
+    if os.environ.get("MODEL_WARMUP", "on") == "off":
+        return
+
+    client = AsyncClient()
+
+    async def load(profile: dict[str, Any]):
+        try:
+            await client.generate(model=profile["model"], prompt="", keep_alive=profile["keep_alive"], options={"num_ctx": profile["num_ctx"]})
+        except (ResponseError, ConnectionError) as error:
+            logger.warning("Could not warm up %s: %s", profile["model"], error)
+
+    await asyncio.gather(*(load(profile) for profile in warmup_targets()))
\ No newline at end of file
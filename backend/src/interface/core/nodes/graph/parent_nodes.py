@@ -1,8 +1,9 @@
+import os
 from typing import Literal
-from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
+from langchain_core.messages import AnyMessage, SystemMessage, AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.types import Command, interrupt
-from interface.config import model
+from langgraph.types import Command, Send, interrupt
+from interface.config import model_for
 from interface.core.templates import (
     PROJECT_MAKER_OUTPUT, 
     REQ_MAKER_OUTPUT,
@@ -14,9 +15,13 @@ from interface.core.templates import (
 )
 from interface.core.schemas import RouterSchema, DialogueSchema, OverallState
 from interface.core.nodes.subgraph import *
+from interface.utils._history import conversation_view, subgraph_view, needs_compaction, compaction_update, split_history, history_settings
+from interface.utils._intent_router import intent_router
 
-queue_builder = model.with_structured_output(RouterSchema)
-directional_manager = model.with_structured_output(DialogueSchema)
+queue_builder = model_for("liaison").with_structured_output(RouterSchema)
+commit_builder = model_for("suggestion_commit").with_structured_output(RouterSchema)
+directional_manager = model_for("suggestion").with_structured_output(DialogueSchema)
+summarizer = model_for("compaction")
 
 # Threshold for "unvaluable" response from agents (characters)
 value_thresh = 30
@@ -29,6 +34,41 @@ tool_to_direction = {
         "assign_resource": "resource_assigner",
         "analyze_project": "analyst",
 }
+# Queued subgraphs that may rely on an entity created by an earlier queued subgraph, and so never run alongside one
+queue_prerequisites = {
+        "project_maker": set(),
+        "req_maker": {"project_maker"},
+        "task_maker": {"project_maker"},
+        "dep_maker": {"project_maker", "task_maker", "dep_maker"},
+        "resource_maker": set(),
+        "resource_assigner": {"project_maker", "task_maker", "resource_maker", "resource_assigner"},
+        "analyst": set(tool_to_direction.values()),
+}
+# Makers that collect every queued entity of their kind in a single dialogue when the router asks for several
+batch_directions = {
+        "task_maker": "task_batch_maker",
+        "resource_maker": "resource_batch_maker",
+        "req_maker": "req_batch_maker",
+}
+# Message template for the action each maker reports, and how the suggestion prompt names the function that was used
+maker_outputs = {
+        "project_maker": (PROJECT_MAKER_OUTPUT, "adding a new project"),
+        "req_maker": (REQ_MAKER_OUTPUT, "adding a new requirement"),
+        "task_maker": (TASK_MAKER_OUTPUT, "adding a new task"),
+        "dep_maker": (DEP_MAKER_OUTPUT, "adding a new task dependency"),
+        "resource_maker": (RES_MAKER_OUTPUT, "adding a new resource"),
+        "resource_assigner": (RES_ASSIGN_OUTPUT, "assigning a resource"),
+        "analyst": (ANALYST_OUTPUT, "asking questions about/analyzing the project"),
+}
+branch_subjects = {
+        "project_maker": "new project",
+        "req_maker": "new requirement",
+        "task_maker": "new task",
+        "dep_maker": "new task dependency",
+        "resource_maker": "new resource",
+        "resource_assigner": "resource assignment",
+        "analyst": "question",
+}
 
 def assign_workflow(state: OverallState, config: RunnableConfig) -> Command[Literal["supervisor", "clarification"]]:
     new_messages = [HumanMessage(state.user_input)]
@@ -52,7 +92,11 @@ def assign_workflow(state: OverallState, config: RunnableConfig) -> Command[Lite
         If and only if you cannot understand the user's request, return a followup question (in the form of a comprehensible sentence) that respectfully asks the user to give a different request.
         """
     )
-    response = queue_builder.invoke([system_prompt] + state.messages + new_messages, config=config).model_dump()
+    route = intent_router.route("liaison", state.user_input)
+    if route is None:
+        route = queue_builder.invoke([system_prompt] + conversation_view(state) + new_messages, config=config)
+        intent_router.record(state.user_input, route)
+    response = route.model_dump()
 
     if len(response["followup"]) > value_thresh:
         new_messages.append(AIMessage(response["followup"]))
@@ -70,11 +114,58 @@ def assign_workflow(state: OverallState, config: RunnableConfig) -> Command[Lite
         }, goto="clarification" if len(response["followup"]) > value_thresh else "supervisor",
     )
 
-def direct_workflow(state: OverallState) -> Command[Literal["project_maker", "req_maker", "task_maker", "dep_maker", "resource_maker", "resource_assigner", "analyst", "suggestion_commit"]]:
-    return Command(
-        update={"tool_queue": state.tool_queue[1:]},
-        goto=state.tool_queue[0] if state.tool_queue else "suggestion_commit",
-    )
+def next_batch(tool_queue: list[str], limit: int, batchable: frozenset[str] = frozenset()) -> tuple[list[str], list[str]]:
+    """
+    Splits the queue into the subgraph runs that can start together and the runs left for later, keeping queue order in both.
+    Runs of a batchable kind share a single branch.
+    """
+    batch, rest = list[str](), list[str]()
+
+    for direction in tool_queue:
+        branches = len(batchable & set(batch)) + sum(1 for queued in batch if queued not in batchable)
+        fits = (direction in batchable and direction in batch) or branches < limit
+
+        if fits and not queue_prerequisites[direction] & set(batch + rest):
+            batch.append(direction)
+        else:
+            rest.append(direction)
+
+    return batch, rest
+
+def direct_workflow(state: OverallState) -> Command[Literal["project_maker", "req_maker", "task_maker", "dep_maker", "resource_maker", "resource_assigner", "analyst", "task_batch_maker", "resource_batch_maker", "req_batch_maker", "suggestion_commit"]]:
+    """
+    Starts the next queued subgraph runs. Runs that do not depend on each other (e.g. several resource_maker runs)
+    are dispatched together, up to FANOUT_MAX_BRANCHES (default 4), and their interrupts reach the client side by side.
+    When at least BATCH_MIN_ENTITIES (default 2, 0 to disable) tasks, resources or requirements are queued, they are handled by one batch maker run instead.
+    """
+    if not state.tool_queue:
+        return Command(goto="suggestion_commit")
+
+    min_batch = int(os.environ.get("BATCH_MIN_ENTITIES", 2))
+    batchable = frozenset(direction for direction in batch_directions if min_batch and state.tool_queue.count(direction) >= min_batch)
+
+    batch, rest = next_batch(state.tool_queue, int(os.environ.get("FANOUT_MAX_BRANCHES", 4)), batchable)
+    if len(batch) == 1:
+        return Command(update={"tool_queue": rest}, goto=batch[0])
+
+    sends = list[Send]()
+    for direction in dict.fromkeys(batch):
+        runs = batch.count(direction)
+
+        if direction in batchable:
+            sends.append(Send(batch_directions[direction], state.model_copy(update={"batch_size": runs})))
+            continue
+
+        subject = branch_subjects[direction]
+        for run in range(1, runs + 1):
+            note = (
+                f"{runs} runs that each handle one {subject} were started in parallel for the user's latest request, and this is run {run}. "
+                f"Handle only the {subject} in position {run} among those the user requested that no earlier message has handled yet, "
+                "in the order the user mentioned them. The other runs handle the rest."
+            ) if runs > 1 else ""
+            sends.append(Send(direction, state.model_copy(update={"branch": note})))
+
+    return Command(update={"tool_queue": rest}, goto=sends)
 
 def clarify_input(state: OverallState) -> Command[Literal["liaison", "suggestion_commit"]]:
     new_request = interrupt(state.followup)
@@ -84,97 +175,94 @@ def clarify_input(state: OverallState) -> Command[Literal["liaison", "suggestion
         goto=state.prev,
     )
 
-def create_project(state: OverallState) -> OverallState:
-    response = project_maker_agent.invoke({"messages": state.messages})
-    
+def maker_input(state: OverallState) -> dict:
+    return {"messages": subgraph_view(state)}
+
+def maker_update(direction: str, response: dict) -> OverallState:
+    """Reports the action that a maker subgraph took and remembers the function for the suggestion that follows."""
+    template, prev = maker_outputs[direction]
     action = response["action"]
 
     return {
-        "messages": [AIMessage(
-            PROJECT_MAKER_OUTPUT.format_map(action.params)
-        )],
-        "prev": "adding a new project",
+        "messages": [AIMessage(template.format_map(action.params))],
+        "prev": prev,
         "actions_taken": [action],
     }
 
+def create_project(state: OverallState) -> OverallState:
+    return maker_update("project_maker", project_maker_agent.invoke(maker_input(state)))
+
+async def acreate_project(state: OverallState) -> OverallState:
+    return maker_update("project_maker", await project_maker_agent.ainvoke(maker_input(state)))
+
 def create_req(state: OverallState) -> OverallState:
-    response = req_maker_agent.invoke({"messages": state.messages})
-    
-    action = response["action"]
+    return maker_update("req_maker", req_maker_agent.invoke(maker_input(state)))
 
-    return {
-        "messages": [AIMessage(
-            REQ_MAKER_OUTPUT.format_map(action.params)
-        )],
-        "prev": "adding a new requirement",
-        "actions_taken": [action],
-    }
+async def acreate_req(state: OverallState) -> OverallState:
+    return maker_update("req_maker", await req_maker_agent.ainvoke(maker_input(state)))
 
 def create_task(state: OverallState) -> OverallState:
-    response = task_maker_agent.invoke({"messages": state.messages})
+    return maker_update("task_maker", task_maker_agent.invoke(maker_input(state)))
 
-    action = response["action"]
-
-    return {
-        "messages": [AIMessage(
-            TASK_MAKER_OUTPUT.format_map(action.params)
-        )],
-        "prev": "adding a new task",
-        "actions_taken": [action]
-    }
+async def acreate_task(state: OverallState) -> OverallState:
+    return maker_update("task_maker", await task_maker_agent.ainvoke(maker_input(state)))
 
 def create_dep(state: OverallState) -> OverallState:
-    response = dep_maker_agent.invoke({"messages": state.messages})
+    return maker_update("dep_maker", dep_maker_agent.invoke(maker_input(state)))
 
-    action = response["action"]
-
-    return {
-        "messages": [AIMessage(
-            DEP_MAKER_OUTPUT.format_map(action.params)
-        )],
-        "prev": "adding a new task dependency",
-        "actions_taken": [action]
-    }
+async def acreate_dep(state: OverallState) -> OverallState:
+    return maker_update("dep_maker", await dep_maker_agent.ainvoke(maker_input(state)))
 
 def create_resource(state: OverallState) -> OverallState:
-    response = resource_maker_agent.invoke({"messages": state.messages})
+    return maker_update("resource_maker", resource_maker_agent.invoke(maker_input(state)))
 
-    action = response["action"]
-
-    return {
-        "messages": [AIMessage(
-            RES_MAKER_OUTPUT.format_map(action.params)
-        )],
-        "prev": "adding a new resource",
-        "actions_taken": [action],
-    }
+async def acreate_resource(state: OverallState) -> OverallState:
+    return maker_update("resource_maker", await resource_maker_agent.ainvoke(maker_input(state)))
 
 def assign_resource(state: OverallState) -> OverallState:
-    response = resource_assigner_agent.invoke({"messages": state.messages})
-
-    action = response["action"]
+    return maker_update("resource_assigner", resource_assigner_agent.invoke(maker_input(state)))
 
-    return {
-        "messages": [AIMessage(
-            RES_ASSIGN_OUTPUT.format_map(action.params)
-        )],
-        "prev": "assigning a resource",
-        "actions_taken": [action],
-    }
+async def aassign_resource(state: OverallState) -> OverallState:
+    return maker_update("resource_assigner", await resource_assigner_agent.ainvoke(maker_input(state)))
 
 def analyze_project(state: OverallState) -> OverallState:
-    response = analyst_agent.invoke({"messages": state.messages})
+    return maker_update("analyst", analyst_agent.invoke(maker_input(state)))
 
-    action = response["action"]
+async def aanalyze_project(state: OverallState) -> OverallState:
+    return maker_update("analyst", await analyst_agent.ainvoke(maker_input(state)))
+
+def batch_input(state: OverallState) -> dict:
+    return {"messages": subgraph_view(state), "count": state.batch_size}
+
+def batch_update(direction: str, response: dict) -> OverallState:
+    """maker_update for the batch variant of a maker, which reports one action per entity."""
+    template, prev = maker_outputs[direction]
+    actions = response["actions"]
 
     return {
-        "messages": [AIMessage(
-            ANALYST_OUTPUT.format_map(action.params)
-        )],
-        "prev": "asking questions about/analyzing the project",
-        "actions_taken": [action],
+        "messages": [AIMessage(template.format_map(action.params)) for action in actions],
+        "prev": prev,
+        "actions_taken": actions,
     }
 
+def create_task_batch(state: OverallState) -> OverallState:
+    return batch_update("task_maker", task_batch_maker_agent.invoke(batch_input(state)))
+
+async def acreate_task_batch(state: OverallState) -> OverallState:
+    return batch_update("task_maker", await task_batch_maker_agent.ainvoke(batch_input(state)))
+
+def create_resource_batch(state: OverallState) -> OverallState:
+    return batch_update("resource_maker", resource_batch_maker_agent.invoke(batch_input(state)))
+
+async def acreate_resource_batch(state: OverallState) -> OverallState:
+    return batch_update("resource_maker", await resource_batch_maker_agent.ainvoke(batch_input(state)))
+
+def create_req_batch(state: OverallState) -> OverallState:
+    return batch_update("req_maker", req_batch_maker_agent.invoke(batch_input(state)))
+
+async def acreate_req_batch(state: OverallState) -> OverallState:
+    return batch_update("req_maker", await req_batch_maker_agent.ainvoke(batch_input(state)))
+
 def suggest_next(state: OverallState, config: RunnableConfig) -> Command[Literal["clarification", "supervisor"]]:
     system_prompt = SystemMessage(
         f"""
@@ -197,7 +285,7 @@ def suggest_next(state: OverallState, config: RunnableConfig) -> Command[Literal
         Ensure that the question is formatted as a proper sentence.
         """
     )
-    response = directional_manager.invoke([system_prompt] + state.messages, config=config)
+    response = directional_manager.invoke([system_prompt] + conversation_view(state), config=config)
 
     return Command(
         update={
@@ -219,7 +307,15 @@ def suggest_commit(state: OverallState, config: RunnableConfig) -> OverallState:
         If the user's response is negative, assume that they do not wish to add any tools.
         """
     )
-    response = queue_builder.invoke([system_prompt] + state.messages[-2:], config=config).model_dump()
+    question, answer = ([None] + state.messages[-2:])[-2:]
+    route = intent_router.route(
+        "suggestion_commit",
+        str(answer.content),
+        str(question.content) if isinstance(question, AIMessage) else None,
+    )
+    if route is None:
+        route = commit_builder.invoke([system_prompt] + state.messages[-2:], config=config)
+    response = route.model_dump()
 
     new_tools = list[str]()
     for tool, direction in tool_to_direction.items():
@@ -230,6 +326,38 @@ def suggest_commit(state: OverallState, config: RunnableConfig) -> OverallState:
         "output": "New tools added: " + (", ".join(new_tools) if new_tools else "None"),
     }
 
+def history_summary_prompt(state: OverallState) -> list[AnyMessage]:
+    older, _ = split_history(state.messages, history_settings()["keep_turns"])
+
+    system_prompt = SystemMessage(
+        f"""
+        You are maintaining a running summary of a conversation between a user and a project management assistant.
+        Merge the existing summary with the messages that follow into one updated summary.
+        Keep every project, task, resource, date and decision that the user mentioned, along with any open questions.
+        Do not invent details. Write at most two short paragraphs in the third person.
+
+        Existing summary: {state.summary if state.summary else "None"}
+        """
+    )
+
+    return [system_prompt] + older + [HumanMessage("Write the updated summary.")]
+
+def compact_history(state: OverallState, config: RunnableConfig) -> OverallState:
+    if not needs_compaction(state):
+        return {}
+
+    response = summarizer.invoke(history_summary_prompt(state), config=config)
+
+    return compaction_update(state, response.content)
+
+async def acompact_history(state: OverallState, config: RunnableConfig) -> OverallState:
+    if not needs_compaction(state):
+        return {}
+
+    response = await summarizer.ainvoke(history_summary_prompt(state), config=config)
+
+    return compaction_update(state, response.content)
+
 def should_finish(state: OverallState) -> Literal["loop", "end"]:
     if state.tool_queue:
         return "loop"
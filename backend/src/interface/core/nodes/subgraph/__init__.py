@@ -5,6 +5,7 @@ from interface.core.nodes.subgraph._dep_maker_nodes import dep_maker_agent
 from interface.core.nodes.subgraph._resource_maker_nodes import resource_maker_agent
 from interface.core.nodes.subgraph._resource_assigner_nodes import resource_assigner_agent
 from interface.core.nodes.subgraph._analyst_nodes import analyst_agent
+from interface.core.nodes.subgraph._batch_maker_nodes import task_batch_maker_agent, resource_batch_maker_agent, req_batch_maker_agent
 
 __all__ = [
     "project_maker_agent",
@@ -14,4 +15,7 @@ __all__ = [
     "resource_maker_agent",
     "resource_assigner_agent",
     "analyst_agent",
+    "task_batch_maker_agent",
+    "resource_batch_maker_agent",
+    "req_batch_maker_agent",
 ]
\ No newline at end of file
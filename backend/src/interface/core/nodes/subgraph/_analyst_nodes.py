@@ -1,3 +1,4 @@
+from datetime import date
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
@@ -5,115 +6,110 @@ from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import AnalystState, SubgraphOutputState
 from interface.utils._db_utils import select
-from interface.utils._agent_utils import clarify_subgraph_input, get_invalid_values, compile_action_data
+from interface.utils._async_db_utils import aselect
+from interface.utils._name_cache import entity_names
+from interface.utils._project_snapshot import ProjectSnapshot, project_snapshots
+from interface.utils._schedule import ScheduleGraph, Shift
+from interface.utils._rescheduling import shift_task_end, ashift_task_end
+from interface.utils._resource_calendar import RESOURCE_UTILIZATION_QUERY
+from interface.utils._name_index import find_invalid_values, describe_invalid_values
+from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data, tool_with_async
+
+def thread_of(config: RunnableConfig) -> str:
+    return str(config.get("configurable", {}).get("thread_id", ""))
+
+def valid_dates(dates: list[str]) -> list[str]:
+    """ISO forms of the non-empty dates, to compare against the dates of a snapshot."""
+    try:
+        return [date.fromisoformat(day).isoformat() for day in dates if day]
+    except ValueError as error:
+        raise ValueError(f"{error}. Please enter dates as YYYY-MM-DD.")
+
+def matching_tasks(snapshot: ProjectSnapshot, vtask_names: list[str], vstart_dates: list[str], vend_dates: list[str]) -> list[tuple]:
+    return [
+        (task["name"], task["description"], task["start"], task["end"])
+        for task in snapshot.tasks
+        if (not vtask_names or task["name"] in vtask_names)
+        and (not vstart_dates or task["start"] in vstart_dates)
+        and (not vend_dates or task["end"] in vend_dates or task["end"] is None)
+    ]
+
+def matching_dependencies(snapshot: ProjectSnapshot, vindependent_task_names: list[str], vdependent_task_names: list[str]) -> list[tuple]:
+    tasks = snapshot.tasks_by_name()
+
+    return [
+        (
+            itask["name"], itask["description"], itask["start"], itask["end"],
+            dtask["name"], dtask["description"], dtask["start"], dtask["end"],
+            dep["description"],
+        )
+        for dep in snapshot.dependencies
+        if (not vindependent_task_names or dep["task"] in vindependent_task_names)
+        and (not vdependent_task_names or dep["dependent"] in vdependent_task_names)
+        for itask, dtask in [(tasks[dep["task"]], tasks[dep["dependent"]])]
+    ]
+
+def matching_assignments(
+    snapshot: ProjectSnapshot,
+    vtask_names: list[str],
+    resource_first_names: list[str],
+    resource_last_names: list[str],
+    resource_contacts: list[str],
+) -> list[tuple]:
+    tasks = snapshot.tasks_by_name()
+
+    return [
+        (re["first_name"], re["last_name"], re["contact"], task["name"], task["description"], task["start"], task["end"])
+        for re in snapshot.assignments
+        if (not vtask_names or re["task"] in vtask_names)
+        and (not resource_first_names or re["first_name"] in resource_first_names)
+        and (not resource_last_names or re["last_name"] in resource_last_names or re["last_name"] is None)
+        and (not resource_contacts or re["contact"] in resource_contacts)
+        for task in [tasks[re["task"]]]
+    ]
+
+def check_tasks(snapshot: ProjectSnapshot, task_names: list[str]):
+    invalid_tasks = find_invalid_values(task_names, snapshot.task_names())
+    if invalid_tasks:
+        raise ValueError(f"The following tasks do not exist in the current project: {describe_invalid_values("tasks", invalid_tasks)}. Please enter valid tasks.")
 
-VARCHAR_ARR_EMPTY_ARG = ["__none__"]
-DATE_ARR_EMPTY_ARG = ["0001-01-01"]
+def missing_project(project_name: str, invalid_projects: dict[str, list[str]]) -> ValueError:
+    return ValueError(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects or {project_name: []})}. Please enter a valid project.")
 
-@tool
-def get_analysis_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
-    """Retrieves information about the project which the user wants to analyze."""
-    existing_projects = [project for project, in select("SELECT name FROM public.projects")]
-
-    if project_name not in existing_projects:
-        raise ValueError(f"Project with name {project_name} does not exist. Please enter a valid project.")
-    
-    project_id, project_desc = select("SELECT project_id, description FROM public.projects WHERE name = !p1", project_name)[0]
-    existing_tasks = [task for task, in select("SELECT name FROM public.tasks WHERE project_id = !p1", project_id)]
-    existing_resources = [re for re in select(
-        """
-        SELECT
-            resources.first_name,
-            resources.last_name,
-            resources.contact
-        FROM resource_assignments
-        LEFT JOIN resources
-            ON resources.resource_id = resource_assignments.resource_id
-        LEFT JOIN tasks
-            ON tasks.task_id = resource_assignments.task_id
-        LEFT JOIN projects
-            ON tasks.project_id = projects.project_id
-        WHERE projects.name = !p1
-        """, project_name,
-    )]
+def snapshot_of(snapshot: ProjectSnapshot | None, project_name: str) -> ProjectSnapshot:
+    if snapshot is None:
+        raise ValueError(f"Project {project_name} no longer exists. Finish execution and tell the user.")
+    return snapshot
 
+def analysis_context_update(tool_call_id: str, snapshot: ProjectSnapshot) -> Command:
     return Command(update={
         "messages": [ToolMessage(
             f"""
             The user will be asking for information about the following project.
-            Project Name: {project_name}
-            Project Description: {project_desc}
+            Project Name: {snapshot.name}
+            Project Description: {snapshot.description}
             """, tool_call_id=tool_call_id)],
-        "existing_tasks": existing_tasks,
-        "existing_resources": existing_resources,
-        "project_id": project_id,
-        "project_name": project_name,
-        "project_desc": project_desc,
+        "existing_tasks": snapshot.task_names(),
+        "existing_resources": snapshot.resources(),
+        "project_id": snapshot.project_id,
+        "project_name": snapshot.name,
+        "project_desc": snapshot.description,
     })
 
-@tool
-def get_project_requirements(
-    project_id: Annotated[int, InjectedState("project_id")],
-) -> str:
-    """Retrieves all requirements for the current project."""
-    reqs = [req for req, in select("SELECT description FROM public.requirements WHERE project_id = !p1", project_id)]
-
-    return "These are all requirements belonging to the current project:\n" + "\n".join(reqs)
-
-@tool
-def get_tasks(
-    existing_tasks: Annotated[list[str], InjectedState("existing_tasks")],
-    project_id: Annotated[int, InjectedState("project_id")],
-    task_names: list[str] = [], 
-    start_dates: list[str] = [], 
-    end_dates: list[str] = [],
-) -> str:
-    "Retrieves all tasks that match the specified conditions."
-    vtask_names = [task for task in task_names if task]
-    vstart_dates = [start for start in start_dates if start]
-    vend_dates = [end for end in end_dates if end]
-
-    invalid_tasks = get_invalid_values(vtask_names, existing_tasks)
-    if invalid_tasks:
-        raise ValueError(f"The following tasks do not exist in the current project: {", ".join(invalid_tasks)}. Please enter valid tasks.")
-    
+def format_tasks(rows: list[tuple]) -> str:
     matching_task_info = [{
         "Task Name": name,
         "Task Description": desc,
         "Start Date": start,
         "End Date": end,
-    } for name, desc, start, end in select(
-        f"""
-        SELECT name, description, start, \"end\" 
-        FROM public.tasks 
-        WHERE
-            project_id = !p1
-            AND name {"=" if vtask_names else "!="} ANY(ARRAY[!p2]::varchar[])
-            AND start {"=" if vstart_dates else "!="} ANY(ARRAY[!p3]::date[])
-            AND (\"end\" {"=" if vend_dates else "!="} ANY(ARRAY[!p4]::date[]) OR \"end\" IS NULL)
-        """, project_id, vtask_names + VARCHAR_ARR_EMPTY_ARG, vstart_dates + DATE_ARR_EMPTY_ARG, vend_dates + DATE_ARR_EMPTY_ARG,
-    )]
+    } for name, desc, start, end in rows]
 
     return "These are all tasks in the current project that match the user's request:\n" + "\n".join([str(task) for task in matching_task_info])
 
-@tool
-def get_dependent_tasks(
-    existing_tasks: Annotated[int, InjectedState("existing_tasks")],
-    project_id: Annotated[int, InjectedState("project_id")],
-    independent_task_names: list[str] = [], 
-    dependent_task_names: list[str] = [],
-) -> str:
-    """Retrieves tasks dependent on the provided one or tasks that the provided one depends on."""
-    vindependent_task_names = [task for task in independent_task_names if task]
-    vdependent_task_names = [task for task in dependent_task_names if task]
-
-    invalid_tasks = get_invalid_values(vindependent_task_names + vdependent_task_names, existing_tasks)
-    if invalid_tasks:
-        raise ValueError(f"The following tasks do not exist in the current project: {", ".join(invalid_tasks)}. Please enter valid tasks.")
-    
+def format_dependent_tasks(rows: list[tuple]) -> str:
     matching_dependency_info = [{
         "Independent Task Name": itask_name,
         "Independent Task Description": itask_desc,
@@ -124,60 +120,20 @@ def get_dependent_tasks(
         "Dependent Task Start Date": dtask_start,
         "Dependent Task End Date": dtask_end,
         "Dependency Description": dep_desc,
-    } for itask_name, itask_desc, itask_start, itask_end, dtask_name, dtask_desc, dtask_start, dtask_end, dep_desc in select(
-        f"""
-        SELECT
-            itasks.name AS itask_name,
-            itasks.description AS itask_desc,
-            itasks.start AS itask_start,
-            itasks.end AS itask_end,
-            dtasks.name AS dtask_name,
-            dtasks.description AS dtask_desc,
-            dtasks.start AS dtask_start,
-            dtasks.end AS dtask_end,
-            task_dependencies.description AS dep_desc
-        FROM task_dependencies
-        LEFT JOIN tasks AS itasks
-            ON itasks.task_id = task_dependencies.task_id
-        LEFT JOIN tasks AS dtasks
-            ON dtasks.task_id = task_dependencies.dependent_id
-        WHERE
-            itasks.project_id = !p1,
-            AND dtasks.project_id = !p1,
-            AND itask_name {"=" if vindependent_task_names else "!="} ANY(ARRAY[!p2]::varchar[])
-            AND dtask_name {"=" if vdependent_task_names else "!="} ANY(ARRAY[!p3]::varchar[])
-        """, project_id, vindependent_task_names + VARCHAR_ARR_EMPTY_ARG, vdependent_task_names + VARCHAR_ARR_EMPTY_ARG,
-    )]
+    } for itask_name, itask_desc, itask_start, itask_end, dtask_name, dtask_desc, dtask_start, dtask_end, dep_desc in rows]
 
     return "These are all task dependencies in the current project that match the user's request:\n"+ "\n".join([str(dep) for dep in matching_dependency_info])
 
-@tool
-def get_all_resources() -> str:
-    """Retrieves all existing resources, including those that have not been assigned to tasks."""
+def format_all_resources(rows: list[tuple]) -> str:
     res = [{
         "First Name": first,
         "Last Name": last,
         "Contact": contact,
-    } for first, last, contact in select("SELECT first_name, last_name, contact FROM public.resources")]
+    } for first, last, contact in rows]
 
     return "These are all resources that have been created thus far:\n" + "\n".join([str(re) for re in res])
 
-@tool
-def get_resources_by_assignment(
-    existing_tasks: Annotated[list[str], InjectedState("existing_tasks")],
-    existing_resources: Annotated[list[tuple[str, str | None, str]], InjectedState("existing_resources")],
-    task_names: list[str] = [],
-    resource_first_names: list[str] = [],
-    resource_last_names: list[str] = [],
-    resource_contacts: list[str] = [],
-) -> str:
-    """Retrieves all resource assignments that belong to the provided tasks and fit the provided arguments"""
-    vtask_names = [task for task in task_names if task]
-
-    invalid_tasks = get_invalid_values(vtask_names, existing_tasks)
-    if invalid_tasks:
-        raise ValueError(f"The following tasks do not exist in the current project: {", ".join(invalid_tasks)}. Please enter valid tasks.")
-
+def format_resources_by_assignment(rows: list[tuple]) -> str:
     matching_re_info = [{
         "First Name": first,
         "Last Name": last,
@@ -186,31 +142,307 @@ def get_resources_by_assignment(
         "Task Description": desc,
         "Start Date": start,
         "End Date": end,
-    } for first, last, contact, task , desc, start, end in select(
-        f"""
-        SELECT
-            resources.first_name,
-            resources.last_name,
-            resources.contact,
-            tasks.name AS task_name,
-            tasks.description AS task_desc,
-            tasks.start,
-            tasks.end
-        FROM public.resource_assignments
-        LEFT JOIN resources
-            ON resources.resource_id = resource_assignments.resource_id
-        LEFT JOIN tasks
-            ON tasks.task_id = resource_assignments.task_id
-        WHERE
-            tasks.name {"=" if task_names else "!="} ANY(ARRAY[!p1]::varchar[])
-            AND first_name {"=" if resource_first_names else "!="} ANY(ARRAY[!p2]::varchar[])
-            AND (last_name {"=" if resource_last_names else "!="} ANY(ARRAY[!p3]::varchar[]) OR last_name IS NULL)
-            AND contact {"=" if resource_contacts else "!="} ANY(ARRAY[!p4]::varchar[])
-        """, vtask_names + VARCHAR_ARR_EMPTY_ARG, resource_first_names + VARCHAR_ARR_EMPTY_ARG, resource_last_names + VARCHAR_ARR_EMPTY_ARG, resource_contacts + VARCHAR_ARR_EMPTY_ARG,
-    )]
+    } for first, last, contact, task , desc, start, end in rows]
 
     return "These are all resource assignments that match the user's request:\n" + "\n".join([str(re) for re in matching_re_info])
 
+async def aget_analysis_context(tool_call_id: Annotated[str, InjectedToolCallId], config: RunnableConfig, project_name: str):
+    snapshot = await project_snapshots.aget(thread_of(config), project_name)
+    if snapshot is None:
+        raise missing_project(project_name, await entity_names.ainvalid("projects", [project_name]))
+
+    return analysis_context_update(tool_call_id, snapshot)
+
+@tool_with_async(aget_analysis_context)
+def get_analysis_context(tool_call_id: Annotated[str, InjectedToolCallId], config: RunnableConfig, project_name: str):
+    """Retrieves information about the project which the user wants to analyze."""
+    snapshot = project_snapshots.get(thread_of(config), project_name)
+    if snapshot is None:
+        raise missing_project(project_name, entity_names.invalid("projects", [project_name]))
+
+    return analysis_context_update(tool_call_id, snapshot)
+
+def format_requirements(snapshot: ProjectSnapshot) -> str:
+    return "These are all requirements belonging to the current project:\n" + "\n".join(snapshot.requirements)
+
+async def aget_project_requirements(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    return format_requirements(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name))
+
+@tool_with_async(aget_project_requirements)
+def get_project_requirements(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    """Retrieves all requirements for the current project."""
+    return format_requirements(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name))
+
+def find_tasks(snapshot: ProjectSnapshot, task_names: list[str], start_dates: list[str], end_dates: list[str]) -> str:
+    vtask_names = [task for task in task_names if task]
+    check_tasks(snapshot, vtask_names)
+
+    return format_tasks(matching_tasks(snapshot, vtask_names, valid_dates(start_dates), valid_dates(end_dates)))
+
+async def aget_tasks(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_names: list[str] = [], 
+    start_dates: list[str] = [], 
+    end_dates: list[str] = [],
+) -> str:
+    snapshot = snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name)
+    return find_tasks(snapshot, task_names, start_dates, end_dates)
+
+@tool_with_async(aget_tasks)
+def get_tasks(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_names: list[str] = [], 
+    start_dates: list[str] = [], 
+    end_dates: list[str] = [],
+) -> str:
+    "Retrieves all tasks that match the specified conditions."
+    snapshot = snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name)
+    return find_tasks(snapshot, task_names, start_dates, end_dates)
+
+def find_dependent_tasks(snapshot: ProjectSnapshot, independent_task_names: list[str], dependent_task_names: list[str]) -> str:
+    vindependent_task_names = [task for task in independent_task_names if task]
+    vdependent_task_names = [task for task in dependent_task_names if task]
+    check_tasks(snapshot, vindependent_task_names + vdependent_task_names)
+
+    return format_dependent_tasks(matching_dependencies(snapshot, vindependent_task_names, vdependent_task_names))
+
+async def aget_dependent_tasks(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    independent_task_names: list[str] = [], 
+    dependent_task_names: list[str] = [],
+) -> str:
+    snapshot = snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name)
+    return find_dependent_tasks(snapshot, independent_task_names, dependent_task_names)
+
+@tool_with_async(aget_dependent_tasks)
+def get_dependent_tasks(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    independent_task_names: list[str] = [], 
+    dependent_task_names: list[str] = [],
+) -> str:
+    """Retrieves tasks dependent on the provided one or tasks that the provided one depends on."""
+    snapshot = snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name)
+    return find_dependent_tasks(snapshot, independent_task_names, dependent_task_names)
+
+async def aget_all_resources() -> str:
+    return format_all_resources(await aselect("SELECT first_name, last_name, contact FROM public.resources"))
+
+@tool_with_async(aget_all_resources)
+def get_all_resources() -> str:
+    """Retrieves all existing resources, including those that have not been assigned to tasks."""
+    return format_all_resources(select("SELECT first_name, last_name, contact FROM public.resources"))
+
+def format_resource_utilization(rows: list[tuple]) -> str:
+    if not rows:
+        return "No resources have been assigned to tasks in the current project."
+
+    utilization = [{
+        "First Name": first,
+        "Last Name": last,
+        "Contact": contact,
+        "Booked Days": booked,
+        "Utilization": f"{booked / span:.0%}",
+        "Over-allocated Days": overbooked,
+        "Most Tasks At Once": peak,
+        "Overlapping Tasks": [f"{first_task} and {second_task} ({start} - {end})" for first_task, second_task, start, end in overlaps],
+    } for first, last, contact, booked, overbooked, peak, span, overlaps in rows]
+
+    return (
+        f"Utilization of every resource assigned in the current project over the {rows[0][6]} days from its first task start to its last task end, "
+        "counting their tasks in other projects too, most over-allocated first:\n" + "\n".join([str(re) for re in utilization])
+    )
+
+async def aget_resource_utilization(project_name: Annotated[str, InjectedState("project_name")]) -> str:
+    return format_resource_utilization(await aselect(RESOURCE_UTILIZATION_QUERY, project_name))
+
+@tool_with_async(aget_resource_utilization)
+def get_resource_utilization(project_name: Annotated[str, InjectedState("project_name")]) -> str:
+    """Retrieves how busy each resource of the current project is and which of them are booked on overlapping tasks."""
+    return format_resource_utilization(select(RESOURCE_UTILIZATION_QUERY, project_name))
+
+def find_resources_by_assignment(
+    snapshot: ProjectSnapshot,
+    task_names: list[str],
+    resource_first_names: list[str],
+    resource_last_names: list[str],
+    resource_contacts: list[str],
+) -> str:
+    vtask_names = [task for task in task_names if task]
+    check_tasks(snapshot, vtask_names)
+
+    return format_resources_by_assignment(matching_assignments(
+        snapshot,
+        vtask_names,
+        [first for first in resource_first_names if first],
+        [last for last in resource_last_names if last],
+        [contact for contact in resource_contacts if contact],
+    ))
+
+async def aget_resources_by_assignment(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_names: list[str] = [],
+    resource_first_names: list[str] = [],
+    resource_last_names: list[str] = [],
+    resource_contacts: list[str] = [],
+) -> str:
+    snapshot = snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name)
+    return find_resources_by_assignment(snapshot, task_names, resource_first_names, resource_last_names, resource_contacts)
+
+@tool_with_async(aget_resources_by_assignment)
+def get_resources_by_assignment(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_names: list[str] = [],
+    resource_first_names: list[str] = [],
+    resource_last_names: list[str] = [],
+    resource_contacts: list[str] = [],
+) -> str:
+    """Retrieves all resource assignments that belong to the provided tasks and fit the provided arguments"""
+    snapshot = snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name)
+    return find_resources_by_assignment(snapshot, task_names, resource_first_names, resource_last_names, resource_contacts)
+
+def format_task_order(snapshot: ProjectSnapshot) -> str:
+    order = ScheduleGraph.from_rows(snapshot.tasks, snapshot.dependencies).topological_order()
+    return "Tasks of the current project in an order that respects every dependency (each task comes after the tasks it depends on):\n" + "\n".join(order)
+
+async def aget_task_order(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    return format_task_order(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name))
+
+@tool_with_async(aget_task_order)
+def get_task_order(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    """Retrieves the tasks of the current project in an order in which they can be carried out, given their dependencies."""
+    return format_task_order(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name))
+
+def format_critical_path(snapshot: ProjectSnapshot) -> str:
+    critical_path = ScheduleGraph.from_rows(snapshot.tasks, snapshot.dependencies).critical_path()
+    if critical_path.finish is None:
+        return "The current project has no tasks."
+
+    slack = [
+        f"{name}: earliest start {timing.earliest_start}, latest start {timing.latest_start}, slack {timing.slack} days"
+        for name, timing in sorted(critical_path.timings.items(), key=lambda item: (item[1].slack, item[1].earliest_start))
+    ]
+
+    return (
+        f"The current project can finish on {critical_path.finish} at the earliest.\n"
+        f"Critical path (tasks that delay the whole project if they slip): {" -> ".join(critical_path.tasks)}\n"
+        "Schedule of every task, least slack first:\n" + "\n".join(slack)
+    )
+
+async def aget_critical_path(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    return format_critical_path(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name))
+
+@tool_with_async(aget_critical_path)
+def get_critical_path(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    """Retrieves the critical path of the current project, its earliest finish date, and the slack of every task."""
+    return format_critical_path(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name))
+
+def format_longest_chain(snapshot: ProjectSnapshot) -> str:
+    chain = ScheduleGraph.from_rows(snapshot.tasks, snapshot.dependencies).longest_chain()
+    return f"The longest chain of dependent tasks in the current project has {len(chain)} tasks:\n" + " -> ".join(chain)
+
+async def aget_longest_chain(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    return format_longest_chain(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name))
+
+@tool_with_async(aget_longest_chain)
+def get_longest_chain(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+) -> str:
+    """Retrieves the longest chain of tasks in the current project in which each task depends on the previous one."""
+    return format_longest_chain(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name))
+
+def format_slip_impact(snapshot: ProjectSnapshot, task_name: str, new_end_date: str) -> str:
+    check_tasks(snapshot, [task_name])
+    new_end, = valid_dates([new_end_date])
+
+    graph = ScheduleGraph.from_rows(snapshot.tasks, snapshot.dependencies)
+    before = graph.critical_path().finish
+    shifts = graph.slip(task_name, date.fromisoformat(new_end))
+    after = graph.rescheduled(shifts).critical_path().finish
+    finish = f"The project still finishes on {before}." if after == before else f"The project would finish on {after} instead of {before}."
+
+    if len(shifts) == 1:
+        return f"Moving the end of task {task_name} to {new_end} does not move any other task. {finish}"
+
+    moved = [f"{shift.name}: {shift.start} - {shift.end} becomes {shift.new_start} - {shift.new_end} ({shift.days:+d} days)" for shift in shifts[1:]]
+    return f"Moving the end of task {task_name} to {new_end} pushes back {len(moved)} dependent tasks:\n" + "\n".join(moved) + f"\n{finish}"
+
+async def aget_slip_impact(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_name: str,
+    new_end_date: str,
+) -> str:
+    return format_slip_impact(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name), task_name, new_end_date)
+
+@tool_with_async(aget_slip_impact)
+def get_slip_impact(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_name: str,
+    new_end_date: str,
+) -> str:
+    """Retrieves the tasks that would have to move, and by how much, if the provided task ended on new_end_date (YYYY-MM-DD) instead."""
+    return format_slip_impact(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name), task_name, new_end_date)
+
+def format_applied_shifts(task_name: str, shifts: list[Shift]) -> str:
+    moved = [f"{shift.name}: {shift.start} - {shift.end} is now {shift.new_start} - {shift.new_end} ({shift.days:+d} days)" for shift in shifts]
+    return f"The dates of {len(moved)} tasks were changed, starting with task {task_name}:\n" + "\n".join(moved)
+
+async def ashift_task_dates(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_name: str,
+    new_end_date: str,
+) -> str:
+    check_tasks(snapshot_of(await project_snapshots.aget(thread_of(config), project_name), project_name), [task_name])
+    new_end, = valid_dates([new_end_date])
+
+    return format_applied_shifts(task_name, await ashift_task_end(task_name, date.fromisoformat(new_end)))
+
+@tool_with_async(ashift_task_dates)
+def shift_task_dates(
+    project_name: Annotated[str, InjectedState("project_name")],
+    config: RunnableConfig,
+    task_name: str,
+    new_end_date: str,
+) -> str:
+    """
+    Moves the end of the provided task to new_end_date (YYYY-MM-DD) and pushes back every task that depends on it as little as needed.
+    Only use this after the user has seen the result of get_slip_impact and explicitly confirmed the change.
+    """
+    check_tasks(snapshot_of(project_snapshots.get(thread_of(config), project_name), project_name), [task_name])
+    new_end, = valid_dates([new_end_date])
+
+    return format_applied_shifts(task_name, shift_task_end(task_name, date.fromisoformat(new_end)))
+
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     """Finishes execution of the current portion of the analysis dialogue."""
@@ -220,10 +452,23 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 context_builder_tools = [get_analysis_context]
-context_builder = model.bind_tools(context_builder_tools)
-
-analyst_tools = [get_project_requirements, get_tasks, get_dependent_tasks, get_all_resources, get_resources_by_assignment, finish_execution]
-analyst = model.bind_tools(analyst_tools)
+context_builder = model_for("analyst").bind_tools(context_builder_tools)
+
+analyst_tools = [
+    get_project_requirements,
+    get_tasks,
+    get_dependent_tasks,
+    get_all_resources,
+    get_resources_by_assignment,
+    get_resource_utilization,
+    get_task_order,
+    get_critical_path,
+    get_longest_chain,
+    get_slip_impact,
+    shift_task_dates,
+    finish_execution,
+]
+analyst = model_for("analyst").bind_tools(analyst_tools)
 
 def analysis_context(state: AnalystState, config: RunnableConfig) -> Command[Literal["clarification", "context_tools", "dialogue"]]:
     if state.project_name:
@@ -269,6 +514,8 @@ def analysis_dialogue(state: AnalystState, config: RunnableConfig) -> Command[Li
 
         Use the tools at your disposal to retrieve information about the project and answer the user's questions.
         If the user asks for an analysis, use your best insight and offer an answer to their request.
+        For questions about task order, the critical path, slack, dependency chains or the effect of a delay, use the schedule tools rather than reasoning over task lists.
+        If the user wants to move the end of a task, show them its effect first and only shift the task dates once they have confirmed it.
         When retrieving information about the project, only use search arguments that the user has explicitly stated.
         Do not come up with your own arguments (e.g. task names, resource names, etc.)
 
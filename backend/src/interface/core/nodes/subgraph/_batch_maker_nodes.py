@@ -0,0 +1,363 @@
+from datetime import date
+from typing import Literal, Callable, NamedTuple
+from pydantic import BaseModel
+from langchain_core.messages import SystemMessage, AIMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.types import Command
+from langgraph.graph import StateGraph
+from interface.config import model_for
+from interface.core.schemas import (
+    SubgraphBatchState,
+    SubgraphBatchOutputState,
+    Action,
+    TaskBatchSchema,
+    ResourceBatchSchema,
+    RequirementBatchSchema,
+)
+from interface.utils._db_utils import execute
+from interface.utils._async_db_utils import aexecute
+from interface.utils._name_cache import entity_names
+from interface.utils._timeline_cache import timeline_cache
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._name_index import describe_invalid_values
+from interface.utils._intent_router import AFFIRMATIVE_PATTERN
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit
+
+# Every commit query returns one row: (project found, keys that already exist, keys inserted)
+
+COMMIT_TASKS_QUERY = """
+    WITH project AS (
+        SELECT project_id FROM public.projects WHERE name = !p1
+    ), new_tasks AS (
+        SELECT * FROM unnest(ARRAY[!p2]::varchar[], ARRAY[!p3]::varchar[], ARRAY[!p4]::date[], ARRAY[!p5]::date[])
+            AS new_tasks(name, description, start, \"end\")
+    ), conflicts AS (
+        SELECT new_tasks.name FROM new_tasks JOIN public.tasks ON tasks.name = new_tasks.name
+    ), inserted AS (
+        INSERT INTO public.tasks(project_id, name, description, start, \"end\")
+        SELECT project_id, new_tasks.name, new_tasks.description, new_tasks.start, new_tasks.\"end\"
+        FROM project, new_tasks
+        WHERE NOT EXISTS(SELECT 1 FROM conflicts)
+        ON CONFLICT DO NOTHING
+        RETURNING name
+    )
+    SELECT
+        EXISTS(SELECT 1 FROM project),
+        ARRAY(SELECT name FROM conflicts),
+        ARRAY(SELECT name FROM inserted)
+    """
+
+COMMIT_RESOURCES_QUERY = """
+    WITH new_resources AS (
+        SELECT * FROM unnest(ARRAY[!p1]::varchar[], ARRAY[!p2]::varchar[], ARRAY[!p3]::varchar[])
+            AS new_resources(first_name, last_name, contact)
+    ), conflicts AS (
+        SELECT new_resources.contact FROM new_resources JOIN public.resources ON resources.contact = new_resources.contact
+    ), inserted AS (
+        INSERT INTO public.resources(first_name, last_name, contact)
+        SELECT first_name, last_name, contact
+        FROM new_resources
+        WHERE NOT EXISTS(SELECT 1 FROM conflicts)
+        ON CONFLICT DO NOTHING
+        RETURNING contact
+    )
+    SELECT
+        TRUE,
+        ARRAY(SELECT contact FROM conflicts),
+        ARRAY(SELECT contact FROM inserted)
+    """
+
+COMMIT_REQUIREMENTS_QUERY = """
+    WITH project AS (
+        SELECT project_id FROM public.projects WHERE name = !p1
+    ), inserted AS (
+        INSERT INTO public.requirements(project_id, description)
+        SELECT project_id, description
+        FROM project, unnest(ARRAY[!p2]::varchar[]) AS description
+        RETURNING description
+    )
+    SELECT
+        EXISTS(SELECT 1 FROM project),
+        ARRAY[]::varchar[],
+        ARRAY(SELECT description FROM inserted)
+    """
+
+class BatchMaker(NamedTuple):
+    action: str
+    singular: str
+    plural: str
+    schema: type[BaseModel]
+    # Entity field that must be unique (and the name cache it is checked against), if any
+    key: str | None
+    cache: str | None
+    instructions: Callable[[], str]
+    normalize: Callable[[dict[str, str]], dict[str, str]]
+    problems: Callable[[dict[str, str]], list[str]]
+    describe: Callable[[dict[str, str]], str]
+    commit_query: str
+    commit_args: Callable[[SubgraphBatchState], tuple]
+
+def task_instructions() -> str:
+    return f"""
+        A task is an objective to be completed in a project.
+        A task has a name (required), description (optional), start date (required), and end date (optional).
+        All of the new tasks belong to the same existing project.
+        Each task's name must be quoted directly from the user's messages and must be formatted in title case.
+        If the user provides any dates in terms relative to today, use your knowledge of today's date (which is {date.today().strftime("%Y-%m-%d")}) to approximate the true values of these dates.
+        Dates must be formatted as YYYY-MM-DD. If the user does not specify a start date, leave it empty and today's date will be used.
+        """
+
+def normalize_task(task: dict[str, str]) -> dict[str, str]:
+    return {**task, "start_date": task["start_date"] or date.today().strftime("%Y-%m-%d")}
+
+def task_problems(task: dict[str, str]) -> list[str]:
+    if not task["task_name"]:
+        return ["One of the tasks has no name."]
+
+    problems = []
+    try:
+        start = date.fromisoformat(task["start_date"])
+        if task["end_date"] and date.fromisoformat(task["end_date"]) < start:
+            problems.append(f"Task {task["task_name"]} ends before it starts.")
+    except ValueError:
+        problems.append(f"Task {task["task_name"]} has a date that is not formatted as YYYY-MM-DD.")
+
+    return problems
+
+def describe_task(task: dict[str, str]) -> str:
+    return f"{task["task_name"]} ({task["start_date"]} to {task["end_date"] or "no end date"}): {task["task_desc"] or "no description"}"
+
+def resource_instructions() -> str:
+    return """
+        A resource is defined as an individual who contributes to a project by completing tasks within the project.
+        A resource has a first name (required), last name (optional), and contact (required).
+        First and last names must be properly capitalized as proper nouns.
+        A resource's contact should preferably be an email but can be any means of communication, and no two resources may share a contact.
+        """
+
+def resource_problems(resource: dict[str, str]) -> list[str]:
+    if not resource["first_name"]:
+        return [f"The resource with contact {resource["contact"] or "(none)"} has no first name."]
+    if not resource["contact"]:
+        return [f"{resource["first_name"]} has no contact."]
+    return []
+
+def describe_resource(resource: dict[str, str]) -> str:
+    return f"{resource["first_name"]} {resource["last_name"]}".strip() + f" ({resource["contact"]})"
+
+def requirement_instructions() -> str:
+    return """
+        A requirement is defined as a condition or capability that must be fulfilled for a project to be considered successful.
+        A requirement has a description (required), and all of the new requirements belong to the same existing project.
+        Each description must be formatted as a properly capitalized and punctuated paragraph that could be read without additional context. It should be in the third-person.
+        """
+
+def requirement_problems(requirement: dict[str, str]) -> list[str]:
+    return [] if requirement["req_desc"] else ["One of the requirements has no description."]
+
+task_batch = BatchMaker(
+    action="task_maker",
+    singular="task",
+    plural="tasks",
+    schema=TaskBatchSchema,
+    key="task_name",
+    cache="tasks",
+    instructions=task_instructions,
+    normalize=normalize_task,
+    problems=task_problems,
+    describe=describe_task,
+    commit_query=COMMIT_TASKS_QUERY,
+    commit_args=lambda state: (
+        state.project_name,
+        [task["task_name"] for task in state.entities],
+        [task["task_desc"] for task in state.entities],
+        [task["start_date"] for task in state.entities],
+        [task["end_date"] for task in state.entities],
+    ),
+)
+
+resource_batch = BatchMaker(
+    action="resource_maker",
+    singular="resource",
+    plural="resources",
+    schema=ResourceBatchSchema,
+    key="contact",
+    cache="contacts",
+    instructions=resource_instructions,
+    normalize=lambda resource: resource,
+    problems=resource_problems,
+    describe=describe_resource,
+    commit_query=COMMIT_RESOURCES_QUERY,
+    commit_args=lambda state: (
+        [resource["first_name"] for resource in state.entities],
+        [resource["last_name"] for resource in state.entities],
+        [resource["contact"] for resource in state.entities],
+    ),
+)
+
+requirement_batch = BatchMaker(
+    action="requirement_maker",
+    singular="requirement",
+    plural="requirements",
+    schema=RequirementBatchSchema,
+    key=None,
+    cache=None,
+    instructions=requirement_instructions,
+    normalize=lambda requirement: requirement,
+    problems=requirement_problems,
+    describe=lambda requirement: requirement["req_desc"],
+    commit_query=COMMIT_REQUIREMENTS_QUERY,
+    commit_args=lambda state: (state.project_name, [requirement["req_desc"] for requirement in state.entities]),
+)
+
+def needs_project(maker: BatchMaker) -> bool:
+    return "project_name" in maker.schema.model_fields
+
+def committed_keys(maker: BatchMaker, state: SubgraphBatchState) -> set[str]:
+    """Keys of the entities that an earlier commit of this batch already inserted, before the rest were rejected."""
+    if maker.key is None:
+        return set()
+    return {action.params[maker.key] for action in state.actions if action.name == maker.action}
+
+def missing_count(state: SubgraphBatchState, entities: list[dict[str, str]]) -> int:
+    """How many fewer entities than the router asked for are left to add, after those this batch already committed."""
+    return max(state.count - len(state.actions) - len(entities), 0)
+
+def batch_problems(maker: BatchMaker, state: SubgraphBatchState, project_name: str, entities: list[dict[str, str]]) -> list[str]:
+    """
+    Checks the extracted entities against each other and the name caches, so that all issues are raised in one question.
+    Fewer entities than requested is not a problem by itself: the confirmation points it out, and the user can accept the smaller batch.
+    """
+    problems = []
+
+    if needs_project(maker):
+        if not project_name:
+            problems.append(f"Which existing project do the new {maker.plural} belong to?")
+        elif invalid_projects := entity_names.invalid("projects", [project_name]):
+            problems.append(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects)}. Please enter a valid project.")
+
+    if not entities:
+        problems.append(f"Please describe the {maker.plural} you would like to add.")
+
+    for entity in entities:
+        problems.extend(maker.problems(entity))
+
+    if maker.key is not None:
+        keys = [entity[maker.key] for entity in entities if entity[maker.key]]
+        if duplicates := sorted({key for key in keys if keys.count(key) > 1}):
+            problems.append(f"The following {maker.plural} are listed more than once: {", ".join(duplicates)}.")
+        if existing := [key for key in dict.fromkeys(keys) if entity_names.contains(maker.cache, key)]:
+            problems.append(f"The following {maker.plural} already exist: {", ".join(existing)}. Please enter different ones.")
+
+    return problems
+
+def confirmation_message(maker: BatchMaker, project_name: str, entities: list[dict[str, str]], missing: int) -> str:
+    heading = f"Here are the {len(entities)} new {maker.plural}" + (f" for project {project_name}" if needs_project(maker) else "") + ":"
+    lines = [f"{i}. {maker.describe(entity)}" for i, entity in enumerate(entities, start=1)]
+    shortfall = [f"That is {missing} fewer than you asked for. Describe the rest, or confirm to add only these."] if missing else []
+
+    return "\n".join([heading, *lines, *shortfall, f"Shall I add these {maker.plural}? Otherwise, tell me what to change."])
+
+def batch_extract_node(maker: BatchMaker) -> Callable[[SubgraphBatchState, RunnableConfig], Command]:
+    extractor = model_for(maker.action).with_structured_output(maker.schema)
+
+    def extract_batch(state: SubgraphBatchState, config: RunnableConfig) -> Command[Literal["clarification", "commit"]]:
+        # A plain "yes" to the list that was just shown needs no model call
+        if state.awaiting_confirmation and AFFIRMATIVE_PATTERN.match(str(state.messages[-1].content)):
+            return Command(goto="commit")
+
+        system_prompt = SystemMessage(
+            f"""
+            You are in a direct dialogue with the user, helping them to add {state.count} new {maker.plural} at once as part of a project management application.
+            {maker.instructions()}
+            Extract every new {maker.singular} that the user has described so far, in the order they mentioned them, applying any corrections from later messages.
+            You must not add any details that the user does not explicitly mention, such as specific names.
+            Do not ask for more {maker.plural} than the user has described; they may settle for fewer than {state.count}.
+
+            If any required detail is missing for any of the {maker.plural}, ask for all of the missing details in a single followup question. Otherwise leave the followup empty.
+            Only set confirmed if the user's latest message accepts the list of {maker.plural} shown in the latest AI message without asking for changes.
+            """
+        )
+        response = extractor.invoke([system_prompt] + list(state.messages), config=config)
+
+        project_name = getattr(response, "project_name", "") or state.project_name
+        # The messages still describe the entities that a partly rejected commit inserted, which must not be added or checked again
+        committed = committed_keys(maker, state)
+        entities = [
+            entity for entity in (maker.normalize(entity.model_dump()) for entity in response.entities)
+            if maker.key is None or entity[maker.key] not in committed
+        ]
+        problems = batch_problems(maker, state, project_name, entities)
+        missing = missing_count(state, entities)
+        update = {"project_name": project_name, "entities": entities, "redirect": "extract"}
+
+        if problems or response.followup:
+            followup = "\n".join([response.followup] + problems if response.followup else problems)
+            return Command(
+                update={**update, "messages": [AIMessage(followup)], "followup": followup, "awaiting_confirmation": False},
+                goto="clarification",
+            )
+
+        # A smaller batch than requested is only committed once the user has accepted a list that pointed out the shortfall
+        if not response.confirmed or (missing and not state.awaiting_confirmation):
+            followup = confirmation_message(maker, project_name, entities, missing)
+            return Command(
+                update={**update, "messages": [AIMessage(followup)], "followup": followup, "awaiting_confirmation": True},
+                goto="clarification",
+            )
+
+        return Command(update=update, goto="commit")
+
+    return extract_batch
+
+def batch_commit_result(maker: BatchMaker, state: SubgraphBatchState, result: list[tuple[bool, list[str], list[str]]]) -> Command[Literal["clarification", "__end__"]]:
+    project_found, conflicts, inserted = result[0]
+
+    if not project_found:
+        return reject_commit(f"Project with name {state.project_name} no longer exists. Please enter a valid project.", "extract", project_name="", awaiting_confirmation=False)
+    if conflicts:
+        return reject_commit(f"The following {maker.plural} already exist: {", ".join(conflicts)}. Please enter different ones.", "extract", awaiting_confirmation=False)
+
+    committed = [entity for entity in state.entities if maker.key is None or entity[maker.key] in inserted]
+    remaining = [entity for entity in state.entities if entity not in committed]
+
+    if maker.cache is not None:
+        entity_names.add(maker.cache, *[entity[maker.key] for entity in committed])
+    if maker.cache == "tasks" and committed:
+        timeline_cache.touch()
+    if needs_project(maker) and committed:
+        project_snapshots.invalidate(project_name=state.project_name)
+
+    project = {"project_name": state.project_name} if needs_project(maker) else {}
+    actions = [Action(name=maker.action, params={**project, **entity}) for entity in committed]
+
+    # Rows claimed by a concurrent request between the conflict check and the insert
+    if remaining:
+        return reject_commit(
+            f"The following {maker.plural} were created by someone else in the meantime: {", ".join(entity[maker.key] for entity in remaining)}. Please enter different ones.",
+            "extract", actions=actions, entities=remaining, awaiting_confirmation=False,
+        )
+
+    return Command(update={"actions": actions}, goto="__end__")
+
+def compile_batch_maker(maker: BatchMaker):
+    """Batch variant of a maker subgraph: one extraction call per dialogue turn, one confirmation and one multi-row INSERT for all entities."""
+    def commit_batch(state: SubgraphBatchState) -> Command[Literal["clarification", "__end__"]]:
+        return batch_commit_result(maker, state, execute(maker.commit_query, *maker.commit_args(state)))
+
+    async def acommit_batch(state: SubgraphBatchState) -> Command[Literal["clarification", "__end__"]]:
+        return batch_commit_result(maker, state, await aexecute(maker.commit_query, *maker.commit_args(state)))
+
+    workflow = StateGraph(SubgraphBatchState, output=SubgraphBatchOutputState)
+
+    workflow.add_node("clarification", clarify_subgraph_input, destinations=("extract",))
+    workflow.add_node("extract", batch_extract_node(maker))
+    workflow.add_node("commit", RunnableLambda(commit_batch, afunc=acommit_batch))
+
+    workflow.set_entry_point("extract")
+
+    return workflow.compile()
+
+task_batch_maker_agent = compile_batch_maker(task_batch)
+resource_batch_maker_agent = compile_batch_maker(resource_batch)
+req_batch_maker_agent = compile_batch_maker(requirement_batch)
\ No newline at end of file
@@ -1,16 +1,105 @@
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import DependencyMakerState, SubgraphOutputState
 from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, get_invalid_values, compile_action_data
+from interface.utils._async_db_utils import aexecute, aselect
+from interface.utils._name_cache import entity_names
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._dependency_index import dependency_index, DependencyCycleError
+from interface.utils._name_index import describe_invalid_values
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
 
-@tool
+DEPENDENCY_CONTEXT_QUERY = """
+    SELECT
+        task1.description,
+        task2.description,
+        EXISTS(
+            SELECT 1
+            FROM public.task_dependencies
+            WHERE
+                task_id = ANY(ARRAY[task1.task_id, task2.task_id]::integer[])
+                AND dependent_id = ANY(ARRAY[task1.task_id, task2.task_id]::integer[])
+        )
+    FROM (SELECT 1) AS anchor
+    LEFT JOIN public.tasks AS task1
+        ON task1.name = !p1
+    LEFT JOIN public.tasks AS task2
+        ON task2.name = !p2
+    """
+
+TASK_IDS_QUERY = """
+    SELECT
+        (SELECT task_id FROM public.tasks WHERE name = !p1),
+        (SELECT task_id FROM public.tasks WHERE name = !p2)
+    """
+
+COMMIT_DEPENDENCY_QUERY = """
+    WITH task1 AS (
+        SELECT task_id FROM public.tasks WHERE name = !p1
+    ), task2 AS (
+        SELECT task_id FROM public.tasks WHERE name = !p2
+    ), inserted AS (
+        INSERT INTO public.task_dependencies(task_id, dependent_id, description)
+        SELECT task1.task_id, task2.task_id, !p3
+        FROM task1, task2
+        WHERE NOT EXISTS(
+            SELECT 1
+            FROM public.task_dependencies
+            WHERE
+                task_id = ANY(ARRAY[task1.task_id, task2.task_id]::integer[])
+                AND dependent_id = ANY(ARRAY[task1.task_id, task2.task_id]::integer[])
+        )
+        ON CONFLICT DO NOTHING
+        RETURNING task_id
+    )
+    SELECT
+        EXISTS(SELECT 1 FROM task1),
+        EXISTS(SELECT 1 FROM task2),
+        EXISTS(SELECT 1 FROM inserted)
+    """
+
+def dependency_context_update(
+    tool_call_id: str,
+    vtask1_name: str,
+    vtask2_name: str,
+    task1_desc: str | None,
+    task2_desc: str | None,
+    dependency_exists: bool,
+) -> Command:
+    if dependency_exists:
+        raise ValueError(f"A dependency already exists between tasks {vtask1_name} and {vtask2_name}. Please enter a valid dependency.")
+
+    return Command(update={
+        "messages": [ToolMessage(f"New dependency between task with (name: {vtask1_name}, description: {task1_desc}) and task with (name: {vtask2_name}, description: {task2_desc})", tool_call_id=tool_call_id)],
+        "task1_name": vtask1_name,
+        "task1_desc": task1_desc,
+        "task2_name": vtask2_name,
+        "task2_desc": task2_desc,
+    })
+
+async def aget_dependency_context(
+    current_task1_name: Annotated[str, InjectedState("task1_name")],
+    current_task2_name: Annotated[str, InjectedState("task2_name")],
+    tool_call_id: Annotated[str, InjectedToolCallId], 
+    task1_name: str, 
+    task2_name: str,
+):
+    vtask1_name = task1_name if task1_name else current_task1_name
+    vtask2_name = task2_name if task2_name else current_task2_name
+
+    invalid_tasks = await entity_names.ainvalid("tasks", [vtask1_name, vtask2_name])
+    if invalid_tasks:
+        raise ValueError(f"The following tasks do not exist: {describe_invalid_values("tasks", invalid_tasks)}. Please enter valid tasks.")
+
+    return dependency_context_update(tool_call_id, vtask1_name, vtask2_name, *(await aselect(DEPENDENCY_CONTEXT_QUERY, vtask1_name, vtask2_name))[0])
+
+@tool_with_async(aget_dependency_context)
 def get_dependency_context(
     current_task1_name: Annotated[str, InjectedState("task1_name")],
     current_task2_name: Annotated[str, InjectedState("task2_name")],
@@ -19,38 +108,54 @@ def get_dependency_context(
     task2_name: str,
 ):
     """Retrieves necessary context for the dependent and independent tasks."""
-    existing_tasks = [task for task, in select("SELECT name FROM public.tasks")]
     vtask1_name = task1_name if task1_name else current_task1_name
     vtask2_name = task2_name if task2_name else current_task2_name
 
-    invalid_tasks = get_invalid_values([vtask1_name, vtask2_name], existing_tasks)
+    invalid_tasks = entity_names.invalid("tasks", [vtask1_name, vtask2_name])
     if invalid_tasks:
-        raise ValueError(f"The following tasks do not exist: {", ".join(invalid_tasks)}. Please enter valid tasks. Existing tasks are {", ".join(existing_tasks)}.")
-    
-    task1_id, task1_desc = select("SELECT task_id, description FROM public.tasks WHERE name = !p1", vtask1_name)[0]
-    task2_id, task2_desc = select("SELECT task_id, description FROM public.tasks WHERE name = !p1", vtask2_name)[0]
+        raise ValueError(f"The following tasks do not exist: {describe_invalid_values("tasks", invalid_tasks)}. Please enter valid tasks.")
 
-    if select(
-        """
-        SELECT * 
-        FROM public.task_dependencies 
-        WHERE 
-            task_id = ANY(ARRAY[!p1, !p2]::integer[]) 
-            AND dependent_id = ANY(ARRAY[!p1, !p2]::integer[])
-        """, task1_id, task2_id,
-    ):
-        raise ValueError(f"A dependency already exists between tasks {vtask1_name} and {vtask2_name}. Please enter a valid dependency.")
+    return dependency_context_update(tool_call_id, vtask1_name, vtask2_name, *select(DEPENDENCY_CONTEXT_QUERY, vtask1_name, vtask2_name)[0])
+
+def cycle_message(task1_name: str, task2_name: str) -> str:
+    return (
+        f"Task {task2_name} already has to be finished before task {task1_name} (directly or through other tasks), "
+        f"so making {task2_name} depend on {task1_name} would create a circular dependency. Please enter a valid dependency."
+    )
 
+def task_dependency_update(tool_call_id: str, vtask1_name: str, vtask2_name: str, vdescription: str) -> Command:
     return Command(update={
-        "messages": [ToolMessage(f"New dependency between task with (name: {vtask1_name}, description: {task1_desc}) and task with (name: {vtask2_name}, description: {task2_desc})", tool_call_id=tool_call_id)],
-        "existing_tasks": existing_tasks,
+        "messages": [ToolMessage(
+            f"""
+            Updated Task 1 to: {vtask1_name}
+            Updated Task 2 to: {vtask2_name}
+            Updated description to: {vdescription}
+            """, tool_call_id=tool_call_id)],
         "task1_name": vtask1_name,
-        "task1_desc": task1_desc,
         "task2_name": vtask2_name,
-        "task2_desc": task2_desc,
+        "dep_desc": vdescription,
     })
 
-@tool
+async def aadd_task_dependency(
+    current_task1_name: Annotated[str, InjectedState("task1_name")],
+    current_task2_name: Annotated[str, InjectedState("task2_name")],
+    current_dep_desc: Annotated[str, InjectedState("dep_desc")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    task1_name: str,
+    task2_name: str,
+    description: str,
+):
+    vtask1_name = task1_name if task1_name else current_task1_name
+    vtask2_name = task2_name if task2_name else current_task2_name
+    vdescription = description if description else current_dep_desc
+
+    task1_id, task2_id = (await aselect(TASK_IDS_QUERY, vtask1_name, vtask2_name))[0]
+    if task1_id is not None and task2_id is not None and await dependency_index.acreates_cycle(task1_id, task2_id):
+        raise ValueError(cycle_message(vtask1_name, vtask2_name))
+
+    return task_dependency_update(tool_call_id, vtask1_name, vtask2_name, vdescription)
+
+@tool_with_async(aadd_task_dependency)
 def add_task_dependency(
     current_task1_name: Annotated[str, InjectedState("task1_name")],
     current_task2_name: Annotated[str, InjectedState("task2_name")],
@@ -65,17 +170,11 @@ def add_task_dependency(
     vtask2_name = task2_name if task2_name else current_task2_name
     vdescription = description if description else current_dep_desc
 
-    return Command(update={
-        "messages": [ToolMessage(
-            f"""
-            Updated Task 1 to: {vtask1_name}
-            Updated Task 2 to: {vtask2_name}
-            Updated description to: {vdescription}
-            """, tool_call_id=tool_call_id)],
-        "task1_name": vtask1_name,
-        "task2_name": vtask2_name,
-        "dep_desc": vdescription,
-    })
+    task1_id, task2_id = select(TASK_IDS_QUERY, vtask1_name, vtask2_name)[0]
+    if task1_id is not None and task2_id is not None and dependency_index.creates_cycle(task1_id, task2_id):
+        raise ValueError(cycle_message(vtask1_name, vtask2_name))
+
+    return task_dependency_update(tool_call_id, vtask1_name, vtask2_name, vdescription)
 
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
@@ -87,13 +186,13 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
 
 
 context_builder_tools = [get_dependency_context]
-context_builder = model.bind_tools(context_builder_tools)
+context_builder = model_for("dep_maker").bind_tools(context_builder_tools)
 
 dep_maker_tools = [add_task_dependency, finish_execution]
-dep_maker = model.bind_tools(dep_maker_tools)
+dep_maker = model_for("dep_maker").bind_tools(dep_maker_tools)
 
 def create_dep_context(state: DependencyMakerState, config: RunnableConfig) -> Command[Literal["clarification", "context_tools", "dialogue"]]:
-    if state.task1_name and state.task2_name and all(task in state.existing_tasks for task in [state.task1_name, state.task2_name]):
+    if state.task1_name and state.task2_name and all(entity_names.contains("tasks", task) for task in [state.task1_name, state.task2_name]):
         return Command(goto="dialogue")
     
     system_prompt = SystemMessage(
@@ -161,13 +260,73 @@ def create_dep_dialogue(state: DependencyMakerState, config: RunnableConfig) ->
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_dep_commit(state: DependencyMakerState) -> SubgraphOutputState:
-    task1_id = select("SELECT task_id FROM public.tasks WHERE name = !p1", state.task1_name)[0][0]
-    task2_id = select("SELECT task_id FROM public.tasks WHERE name = !p1", state.task2_name)[0][0]
+def dep_commit_result(state: DependencyMakerState, task_ids: tuple[int | None, int | None], result: list[tuple[bool, bool, bool]]) -> Command[Literal["clarification", "__end__"]]:
+    task1_found, task2_found, inserted = result[0]
+
+    if task1_found and task2_found:
+        if inserted:
+            dependency_index.committed(*task_ids)
+        else:
+            dependency_index.discard(*task_ids)
+
+    missing_tasks = [name for name, found in [(state.task1_name, task1_found), (state.task2_name, task2_found)] if not found]
+    if missing_tasks:
+        return reject_commit(f"The following tasks no longer exist: {", ".join(missing_tasks)}. Please enter valid tasks.", "context", task1_name="", task2_name="")
+    if not inserted:
+        return reject_commit(f"A dependency already exists between tasks {state.task1_name} and {state.task2_name}. Please enter a valid dependency.", "context", task1_name="", task2_name="")
+
+    project_snapshots.invalidate(task_names=[state.task1_name, state.task2_name])
+
+    return Command(
+        update={"action": compile_action_data("dependency_maker", state)},
+        goto="__end__",
+    )
+
+def reserve_dependency(state: DependencyMakerState, task_ids: tuple[int | None, int | None]) -> Command[Literal["clarification", "__end__"]] | None:
+    """
+    Records the dependency in the cycle index before it is inserted, so that no concurrent commit in this process can close a cycle with it.
+    Returns the rejection if one of the tasks is missing or the dependency would close a cycle.
+    """
+    task1_id, task2_id = task_ids
+    if task1_id is None or task2_id is None:
+        return dep_commit_result(state, task_ids, [(task1_id is not None, task2_id is not None, False)])
+
+    try:
+        dependency_index.add(task1_id, task2_id)
+    except DependencyCycleError:
+        return reject_commit(cycle_message(state.task1_name, state.task2_name), "dialogue")
+
+    return None
+
+def create_dep_commit(state: DependencyMakerState) -> Command[Literal["clarification", "__end__"]]:
+    dependency_index.refresh()
+    task_ids = select(TASK_IDS_QUERY, state.task1_name, state.task2_name)[0]
+    if rejection := reserve_dependency(state, task_ids):
+        return rejection
+
+    try:
+        result = execute(COMMIT_DEPENDENCY_QUERY, state.task1_name, state.task2_name, state.dep_desc)
+    except BaseException:
+        # The reserved edge was never inserted; an insert that did commit is picked up from the version counter on the next refresh
+        dependency_index.discard(*task_ids)
+        raise
+
+    return dep_commit_result(state, task_ids, result)
+
+async def acreate_dep_commit(state: DependencyMakerState) -> Command[Literal["clarification", "__end__"]]:
+    await dependency_index.arefresh()
+    task_ids = (await aselect(TASK_IDS_QUERY, state.task1_name, state.task2_name))[0]
+    if rejection := reserve_dependency(state, task_ids):
+        return rejection
 
-    execute("INSERT INTO public.task_dependencies(task_id, dependent_id, description) VALUES(!p1, !p2, !p3)", task1_id, task2_id, state.dep_desc)
+    try:
+        result = await aexecute(COMMIT_DEPENDENCY_QUERY, state.task1_name, state.task2_name, state.dep_desc)
+    except BaseException:
+        # Also on cancellation, which is not an Exception
+        dependency_index.discard(*task_ids)
+        raise
 
-    return {"action": compile_action_data("dependency_maker", state)}
+    return dep_commit_result(state, task_ids, result)
 
 dep_maker_workflow = StateGraph(DependencyMakerState, output=SubgraphOutputState)
 
@@ -176,11 +335,10 @@ dep_maker_workflow.add_node("context", create_dep_context)
 dep_maker_workflow.add_node("context_tools", ToolNode(context_builder_tools))
 dep_maker_workflow.add_node("dialogue", create_dep_dialogue)
 dep_maker_workflow.add_node("dialogue_tools", ToolNode(dep_maker_tools))
-dep_maker_workflow.add_node("commit", create_dep_commit)
+dep_maker_workflow.add_node("commit", RunnableLambda(create_dep_commit, afunc=acreate_dep_commit))
 
 dep_maker_workflow.set_entry_point("context")
 dep_maker_workflow.add_edge("context_tools", "context")
 dep_maker_workflow.add_edge("dialogue_tools", "dialogue")
-dep_maker_workflow.set_finish_point("commit")
 
 dep_maker_agent = dep_maker_workflow.compile()
\ No newline at end of file
@@ -1,18 +1,56 @@
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import ProjectMakerState, SubgraphOutputState
-from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data
+from interface.utils._db_utils import execute
+from interface.utils._async_db_utils import aexecute
+from interface.utils._name_cache import entity_names
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
+
+COMMIT_PROJECT_QUERY = """
+    INSERT INTO public.projects(name, description) VALUES(!p1, !p2)
+    ON CONFLICT DO NOTHING
+    RETURNING project_id
+    """
+
+def project_name_update(
+    current_name: str,
+    current_description: str,
+    tool_call_id: str,
+    name: str,
+    description: str | None,
+) -> tuple[str, Command]:
+    vname = name if name else current_name
+    vdesc = description if description else current_description
 
-@tool
+    return vname, Command(update={
+        "messages": [ToolMessage(f"Updated project name to: {vname}.\nUpdated project description to: {vdesc}", tool_call_id=tool_call_id)],
+        "project_name": vname,
+        "project_desc": vdesc,
+    })
+
+async def aadd_project(
+    current_name: Annotated[str, InjectedState("project_name")], 
+    current_description: Annotated[str, InjectedState("project_desc")], 
+    tool_call_id: Annotated[str, InjectedToolCallId], 
+    name: str, 
+    description: str | None = "",
+):
+    """Loads provided name and description information into a new project to be created."""
+    vname, update = project_name_update(current_name, current_description, tool_call_id, name, description)
+
+    if await entity_names.acontains("projects", vname):
+        raise ValueError(f"Project with name {vname} already exists. Please enter a valid project name.")
+
+    return update
+
+@tool_with_async(aadd_project)
 def add_project(
-    existing_projects: Annotated[list[str], InjectedState("existing_projects")],
     current_name: Annotated[str, InjectedState("project_name")], 
     current_description: Annotated[str, InjectedState("project_desc")], 
     tool_call_id: Annotated[str, InjectedToolCallId], 
@@ -20,17 +58,12 @@ def add_project(
     description: str | None = "",
 ):
     """Loads provided name and description information into a new project to be created."""
-    vname = name if name else current_name
-    vdesc = description if description else current_description
+    vname, update = project_name_update(current_name, current_description, tool_call_id, name, description)
 
-    if vname in existing_projects:
+    if entity_names.contains("projects", vname):
         raise ValueError(f"Project with name {vname} already exists. Please enter a valid project name.")
 
-    return Command(update={
-        "messages": [ToolMessage(f"Updated project name to: {vname}.\nUpdated project description to: {vdesc}", tool_call_id=tool_call_id)],
-        "project_name": vname,
-        "project_desc": vdesc,
-    })
+    return update
 
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
@@ -41,12 +74,7 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 project_maker_tools = [add_project, finish_execution]
-project_maker = model.bind_tools(project_maker_tools)
-
-def create_project_context(state: ProjectMakerState) -> ProjectMakerState:
-    existing_projects = [project for project, in select("SELECT name FROM public.projects")]
-
-    return {"existing_projects": existing_projects}
+project_maker = model_for("project_maker").bind_tools(project_maker_tools)
 
 def create_project_dialogue(state: ProjectMakerState, config: RunnableConfig) -> Command[Literal["clarification", "dialogue_tools", "commit"]]:
     if state.finish:
@@ -83,22 +111,31 @@ def create_project_dialogue(state: ProjectMakerState, config: RunnableConfig) ->
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_project_commit(state: ProjectMakerState) -> SubgraphOutputState:
-    execute(f"INSERT INTO public.projects(name, description) VALUES(!p1, !p2)", state.project_name, state.project_desc)
+def project_commit_result(state: ProjectMakerState, inserted: list[tuple[int]]) -> Command[Literal["clarification", "__end__"]]:
+    if not inserted:
+        return reject_commit(f"Project with name {state.project_name} already exists. Please enter a valid project name.", "dialogue")
+
+    entity_names.add("projects", state.project_name)
+
+    return Command(
+        update={"action": compile_action_data("project_maker", state)},
+        goto="__end__",
+    )
+
+def create_project_commit(state: ProjectMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return project_commit_result(state, execute(COMMIT_PROJECT_QUERY, state.project_name, state.project_desc))
 
-    return {"action": compile_action_data("project_maker", state)}
+async def acreate_project_commit(state: ProjectMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return project_commit_result(state, await aexecute(COMMIT_PROJECT_QUERY, state.project_name, state.project_desc))
 
 project_maker_workflow = StateGraph(ProjectMakerState, output=SubgraphOutputState)
 
-project_maker_workflow.add_node("clarification", clarify_subgraph_input)
-project_maker_workflow.add_node("context", create_project_context)
+project_maker_workflow.add_node("clarification", clarify_subgraph_input, destinations=("dialogue",))
 project_maker_workflow.add_node("dialogue", create_project_dialogue)
 project_maker_workflow.add_node("dialogue_tools", ToolNode(project_maker_tools))
-project_maker_workflow.add_node("commit", create_project_commit)
+project_maker_workflow.add_node("commit", RunnableLambda(create_project_commit, afunc=acreate_project_commit))
 
-project_maker_workflow.set_entry_point("context")
-project_maker_workflow.add_edge("context", "dialogue")
+project_maker_workflow.set_entry_point("dialogue")
 project_maker_workflow.add_edge("dialogue_tools", "dialogue")
-project_maker_workflow.set_finish_point("commit")
 
 project_maker_agent = project_maker_workflow.compile()
\ No newline at end of file
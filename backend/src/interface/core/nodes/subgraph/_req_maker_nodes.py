@@ -1,31 +1,56 @@
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import ReqMakerState, SubgraphOutputState
 from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data
-
-@tool
-def get_requirement_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
-    """Retrieves necessary context for the project that the new requirement belongs to."""
-    existing_projects = [project for project, in select("SELECT name FROM public.projects")]
-    if project_name not in existing_projects:
-        raise ValueError(f"Project with name {project_name} does not exist. Please enter a valid project. Existing projects are: {", ".join(existing_projects)}.")
-    
-    project_desc = select("SELECT description FROM public.projects WHERE name = !p1", project_name)[0][0]
-
+from interface.utils._async_db_utils import aexecute, aselect
+from interface.utils._name_cache import entity_names
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._name_index import describe_invalid_values
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
+
+REQUIREMENT_CONTEXT_QUERY = "SELECT description FROM public.projects WHERE name = !p1"
+
+COMMIT_REQUIREMENT_QUERY = """
+    INSERT INTO public.requirements(project_id, description)
+    SELECT project_id, !p2
+    FROM public.projects
+    WHERE name = !p1
+    RETURNING project_id
+    """
+
+def requirement_context_update(tool_call_id: str, project_name: str, project_desc: str | None) -> Command:
     return Command(update={
         "messages": [ToolMessage(f"New requirement belongs to project with (name: {project_name}) and (description: {project_desc})", tool_call_id=tool_call_id)],
-        "existing_projects": existing_projects,
         "project_name": project_name,
         "project_desc": project_desc,
     })
 
+async def aget_requirement_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
+    invalid_projects = await entity_names.ainvalid("projects", [project_name])
+    if invalid_projects:
+        raise ValueError(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects)}. Please enter a valid project.")
+
+    project_desc = next((desc for desc, in await aselect(REQUIREMENT_CONTEXT_QUERY, project_name)), None)
+
+    return requirement_context_update(tool_call_id, project_name, project_desc)
+
+@tool_with_async(aget_requirement_context)
+def get_requirement_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
+    """Retrieves necessary context for the project that the new requirement belongs to."""
+    invalid_projects = entity_names.invalid("projects", [project_name])
+    if invalid_projects:
+        raise ValueError(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects)}. Please enter a valid project.")
+
+    project_desc = next((desc for desc, in select(REQUIREMENT_CONTEXT_QUERY, project_name)), None)
+
+    return requirement_context_update(tool_call_id, project_name, project_desc)
+
 @tool
 def add_requirement(
     current_project_name: Annotated[str, InjectedState("project_name")],
@@ -53,13 +78,13 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 context_builder_tools = [get_requirement_context]
-context_builder = model.bind_tools(context_builder_tools)
+context_builder = model_for("req_maker").bind_tools(context_builder_tools)
 
 req_maker_tools = [add_requirement, finish_execution]
-req_maker = model.bind_tools(req_maker_tools)
+req_maker = model_for("req_maker").bind_tools(req_maker_tools)
 
 def create_req_context(state: ReqMakerState, config: RunnableConfig) -> Command[Literal["clarification", "context_tools", "dialogue"]]:
-    if state.project_name and state.project_name in state.existing_projects:
+    if state.project_name and entity_names.contains("projects", state.project_name):
         return Command(goto="dialogue")
 
     system_prompt = SystemMessage(
@@ -121,12 +146,22 @@ def create_req_dialogue(state: ReqMakerState, config: RunnableConfig) -> Command
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_req_commit(state: ReqMakerState) -> SubgraphOutputState:
-    project_id = select("SELECT project_id FROM public.projects WHERE name = !p1", state.project_name)[0][0]
+def req_commit_result(state: ReqMakerState, inserted: list[tuple[int]]) -> Command[Literal["clarification", "__end__"]]:
+    if not inserted:
+        return reject_commit(f"Project with name {state.project_name} no longer exists. Please enter a valid project.", "context", project_name="")
+
+    project_snapshots.invalidate(project_name=state.project_name)
+
+    return Command(
+        update={"action": compile_action_data("requirement_maker", state)},
+        goto="__end__",
+    )
 
-    execute("INSERT INTO public.requirements(project_id, description) VALUES(!p1, !p2)", project_id, state.req_desc)
+def create_req_commit(state: ReqMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return req_commit_result(state, execute(COMMIT_REQUIREMENT_QUERY, state.project_name, state.req_desc))
 
-    return {"action": compile_action_data("requirement_maker", state)}
+async def acreate_req_commit(state: ReqMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return req_commit_result(state, await aexecute(COMMIT_REQUIREMENT_QUERY, state.project_name, state.req_desc))
 
 req_maker_workflow = StateGraph(ReqMakerState, output=SubgraphOutputState)
 
@@ -135,11 +170,10 @@ req_maker_workflow.add_node("context", create_req_context)
 req_maker_workflow.add_node("context_tools", ToolNode(context_builder_tools))
 req_maker_workflow.add_node("dialogue", create_req_dialogue)
 req_maker_workflow.add_node("dialogue_tools", ToolNode(req_maker_tools))
-req_maker_workflow.add_node("commit", create_req_commit)
+req_maker_workflow.add_node("commit", RunnableLambda(create_req_commit, afunc=acreate_req_commit))
 
 req_maker_workflow.set_entry_point("context")
 req_maker_workflow.add_edge("context_tools", "context")
 req_maker_workflow.add_edge("dialogue_tools", "dialogue")
-req_maker_workflow.set_finish_point("commit")
 
 req_maker_agent = req_maker_workflow.compile()
\ No newline at end of file
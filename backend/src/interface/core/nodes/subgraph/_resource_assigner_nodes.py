@@ -1,17 +1,94 @@
 from collections import namedtuple
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import ResourceAssignerState, SubgraphOutputState
 from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data
+from interface.utils._async_db_utils import aexecute, aselect
+from interface.utils._name_cache import entity_names
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._resource_calendar import Booking, resource_calendar
+from interface.utils._name_index import describe_invalid_values
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
 
-@tool
+RESOURCE_ASSIGNMENT_CONTEXT_QUERY = """
+    SELECT ARRAY[first_name, last_name, contact]
+    FROM public.resources
+    WHERE first_name = !p1 and last_name IS NOT DISTINCT FROM !p2
+    """
+
+RESOURCE_ASSIGNMENT_CHECK_QUERY = """
+    SELECT
+        EXISTS(SELECT 1 FROM public.resources WHERE contact = !p2),
+        EXISTS(
+            SELECT 1
+            FROM public.resource_assignments
+            JOIN public.tasks
+                ON tasks.task_id = resource_assignments.task_id
+            JOIN public.resources
+                ON resources.resource_id = resource_assignments.resource_id
+            WHERE tasks.name = !p1 and resources.contact = !p2
+        ),
+        (SELECT ARRAY[start, COALESCE(\"end\", start)] FROM public.tasks WHERE name = !p1)
+    """
+
+COMMIT_RESOURCE_ASSIGNMENT_QUERY = """
+    WITH task AS (
+        SELECT task_id FROM public.tasks WHERE name = !p1
+    ), resource AS (
+        SELECT resource_id FROM public.resources WHERE contact = !p2
+    ), inserted AS (
+        INSERT INTO public.resource_assignments(task_id, resource_id)
+        SELECT task.task_id, resource.resource_id
+        FROM task, resource
+        WHERE NOT EXISTS(
+            SELECT 1
+            FROM public.resource_assignments
+            WHERE task_id = task.task_id and resource_id = resource.resource_id
+        )
+        ON CONFLICT DO NOTHING
+        RETURNING task_id
+    )
+    SELECT
+        EXISTS(SELECT 1 FROM task),
+        EXISTS(SELECT 1 FROM resource),
+        EXISTS(SELECT 1 FROM inserted)
+    """
+
+def resource_assignment_context_update(
+    tool_call_id: str,
+    vfirst_name: str,
+    vlast_name: str,
+    matching_resources: list[tuple[list[str | None]]],
+) -> Command:
+    if not matching_resources:
+        raise ValueError(f"No resources with first name {vfirst_name} and last name {vlast_name} exist. Please enter valid resource information.")
+
+    return Command(update={
+        "messages": [ToolMessage(f"Resource has first name {vfirst_name} and last name {vlast_name}", tool_call_id=tool_call_id)],
+        "matching_resources": [tuple(re_info) for re_info, in matching_resources],
+        "re_first_name": vfirst_name,
+        "re_last_name": vlast_name,
+    })
+
+async def aget_resource_assignment_context(
+    current_first_name: Annotated[str, InjectedState("re_first_name")],
+    current_last_name: Annotated[str, InjectedState("re_last_name")],
+    tool_call_id: Annotated[str, InjectedToolCallId], 
+    first_name: str, 
+    last_name: str,
+):
+    vfirst_name = first_name if first_name else current_first_name
+    vlast_name = last_name if last_name else current_last_name
+
+    return resource_assignment_context_update(tool_call_id, vfirst_name, vlast_name, await aselect(RESOURCE_ASSIGNMENT_CONTEXT_QUERY, vfirst_name, vlast_name))
+
+@tool_with_async(aget_resource_assignment_context)
 def get_resource_assignment_context(
     current_first_name: Annotated[str, InjectedState("re_first_name")],
     current_last_name: Annotated[str, InjectedState("re_last_name")],
@@ -20,30 +97,58 @@ def get_resource_assignment_context(
     last_name: str,
 ):
     """Retrieves necessary context for the assignment of an existing resource."""
-    existing_tasks = [task for task, in select("SELECT name FROM public.tasks")]
     vfirst_name = first_name if first_name else current_first_name
     vlast_name = last_name if last_name else current_last_name
 
-    if vlast_name:
-        query_results = select("SELECT first_name, last_name, contact FROM public.resources WHERE first_name = !p1 and last_name = !p2", vfirst_name, vlast_name)
-    else:
-        query_results = select("SELECT first_name, last_name, contact FROM public.resources WHERE first_name = !p1 and last_name IS NULL", vfirst_name)
+    return resource_assignment_context_update(tool_call_id, vfirst_name, vlast_name, select(RESOURCE_ASSIGNMENT_CONTEXT_QUERY, vfirst_name, vlast_name))
 
-    matching_resources = [re_info for re_info in query_results]
-    if not matching_resources:
-        raise ValueError(f"No resources with first name {vfirst_name} and last name {vlast_name} exist. Please enter valid resource information.")
+def check_resource_assignment(vtask_name: str, vresource_contact: str, resource_exists: bool, already_assigned: bool):
+    if not resource_exists:
+        raise ValueError(f"Resource with contact {vresource_contact} does not exist. Please enter a valid contact.")
+    if already_assigned:
+        raise ValueError(f"Resource with contact {vresource_contact} has already been assigned to task {vtask_name}. Please enter a valid assignment.")
+
+def resource_assignment_update(
+    tool_call_id: str,
+    vtask_name: str,
+    vresource_contact: str,
+    conflicts: list[Booking],
+) -> Command:
+    # Being booked on overlapping tasks does not block the assignment, but the user has to know before confirming it
+    warning = (
+        f"\nWarning: the resource is already booked during this task on the following tasks, so tell the user before they confirm: "
+        + ", ".join(f"{booking.task} ({booking.start} - {booking.end})" for booking in conflicts)
+        if conflicts else ""
+    )
 
     return Command(update={
-        "messages": [ToolMessage(f"Resource has first name {vfirst_name} and last name {vlast_name}", tool_call_id=tool_call_id)],
-        "existing_tasks": existing_tasks,
-        "matching_resources": matching_resources,
-        "re_first_name": vfirst_name,
-        "re_last_name": vlast_name,
+        "messages": [ToolMessage(f"Updated task name to: {vtask_name}\nUpdated contact to: {vresource_contact}{warning}", tool_call_id=tool_call_id)],
+        "task_name": vtask_name,
+        "re_contact": vresource_contact,
     })
-    
-@tool
+
+async def aassign_resource(
+    current_task_name: Annotated[str, InjectedState("task_name")],
+    current_resource_contact: Annotated[str, InjectedState("re_contact")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    task_name: str,
+    resource_contact: str,
+):
+    vtask_name = task_name if task_name else current_task_name
+    vresource_contact = resource_contact if resource_contact else current_resource_contact
+
+    invalid_tasks = await entity_names.ainvalid("tasks", [vtask_name])
+    if invalid_tasks:
+        raise ValueError(f"The following tasks do not exist: {describe_invalid_values("tasks", invalid_tasks)}. Please enter a valid task.")
+
+    resource_exists, already_assigned, task_dates = (await aselect(RESOURCE_ASSIGNMENT_CHECK_QUERY, vtask_name, vresource_contact))[0]
+    check_resource_assignment(vtask_name, vresource_contact, resource_exists, already_assigned)
+    conflicts = await resource_calendar.aconflicts(vresource_contact, *task_dates, task=vtask_name) if task_dates else []
+
+    return resource_assignment_update(tool_call_id, vtask_name, vresource_contact, conflicts)
+
+@tool_with_async(aassign_resource)
 def assign_resource(
-    existing_tasks: Annotated[list[str], InjectedState("existing_tasks")],
     current_task_name: Annotated[str, InjectedState("task_name")],
     current_resource_contact: Annotated[str, InjectedState("re_contact")],
     tool_call_id: Annotated[str, InjectedToolCallId],
@@ -54,19 +159,15 @@ def assign_resource(
     vtask_name = task_name if task_name else current_task_name
     vresource_contact = resource_contact if resource_contact else current_resource_contact
 
-    if vtask_name not in existing_tasks:
-        raise ValueError(f"Task with name {vtask_name} does not exist. Please enter a valid task. Existing tasks are {", ".join(existing_tasks)}")
-    
-    task_id = select("SELECT task_id FROM public.tasks WHERE name = !p1", vtask_name)[0][0]
-    resource_id = select("SELECT resource_id FROM public.resources WHERE contact = !p1", vresource_contact)[0][0]
-    if select("SELECT * FROM public.resource_assignments WHERE task_id = !p1 and resource_id = !p2", task_id, resource_id):
-        raise ValueError(f"Resource with contact {vresource_contact} has already been assigned to task {vtask_name}. Please enter a valid assignment.")
-    
-    return Command(update={
-        "messages": [ToolMessage(f"Updated task name to: {vtask_name}\nUpdated contact to: {vresource_contact}", tool_call_id=tool_call_id)],
-        "task_name": vtask_name,
-        "re_contact": vresource_contact,
-    })
+    invalid_tasks = entity_names.invalid("tasks", [vtask_name])
+    if invalid_tasks:
+        raise ValueError(f"The following tasks do not exist: {describe_invalid_values("tasks", invalid_tasks)}. Please enter a valid task.")
+
+    resource_exists, already_assigned, task_dates = select(RESOURCE_ASSIGNMENT_CHECK_QUERY, vtask_name, vresource_contact)[0]
+    check_resource_assignment(vtask_name, vresource_contact, resource_exists, already_assigned)
+    conflicts = resource_calendar.conflicts(vresource_contact, *task_dates, task=vtask_name) if task_dates else []
+
+    return resource_assignment_update(tool_call_id, vtask_name, vresource_contact, conflicts)
 
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
@@ -77,10 +178,10 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 context_builder_tools = [get_resource_assignment_context]
-context_builder = model.bind_tools(context_builder_tools)
+context_builder = model_for("resource_assigner").bind_tools(context_builder_tools)
 
 resource_assigner_tools = [assign_resource, finish_execution]
-resource_assigner = model.bind_tools(resource_assigner_tools)
+resource_assigner = model_for("resource_assigner").bind_tools(resource_assigner_tools)
 
 def create_resource_assignment_context(state: ResourceAssignerState, config: RunnableConfig) -> Command[Literal["clarification", "context_tools", "dialogue"]]:
     if state.matching_resources:
@@ -133,6 +234,7 @@ def create_resource_assignment_dialogue(state: ResourceAssignerState, config: Ru
 
         The task to which the resource is assigned must be an existing task.
         Ask the user for a new task name if they enter one which does not exist. This is the one you should refer to at all times. 
+        If the resource is already booked on other tasks during the task, tell the user which ones before asking them to confirm the assignment.
 
         Once you have confirmed that the resource has been assigned, finish execution.
         Do not ask any followup questions at this point.
@@ -149,13 +251,29 @@ def create_resource_assignment_dialogue(state: ResourceAssignerState, config: Ru
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_resource_assignment_commit(state: ResourceAssignerState) -> SubgraphOutputState:
-    task_id = select("SELECT task_id FROM public.tasks WHERE name = !p1", state.task_name)[0][0]
-    resource_id = select("SELECT resource_id FROM public.resources WHERE contact = !p1", state.re_contact)[0][0]
+def resource_assignment_commit_result(state: ResourceAssignerState, result: list[tuple[bool, bool, bool]]) -> Command[Literal["clarification", "__end__"]]:
+    task_found, resource_found, inserted = result[0]
+
+    if not resource_found:
+        return reject_commit(f"Resource with contact {state.re_contact} no longer exists. Please enter valid resource information.", "context", matching_resources=[])
+    if not task_found:
+        return reject_commit(f"Task with name {state.task_name} no longer exists. Please enter a valid task.", "dialogue")
+    if not inserted:
+        return reject_commit(f"Resource with contact {state.re_contact} has already been assigned to task {state.task_name}. Please enter a valid assignment.", "dialogue")
+
+    project_snapshots.invalidate(task_names=[state.task_name])
+    resource_calendar.invalidate()
+
+    return Command(
+        update={"action": compile_action_data("resource_assigner", state)},
+        goto="__end__",
+    )
 
-    execute("INSERT INTO public.resource_assignments(task_id, resource_id) VALUES(!p1, !p2)", task_id, resource_id)
+def create_resource_assignment_commit(state: ResourceAssignerState) -> Command[Literal["clarification", "__end__"]]:
+    return resource_assignment_commit_result(state, execute(COMMIT_RESOURCE_ASSIGNMENT_QUERY, state.task_name, state.re_contact))
 
-    return {"action": compile_action_data("resource_assigner", state)}
+async def acreate_resource_assignment_commit(state: ResourceAssignerState) -> Command[Literal["clarification", "__end__"]]:
+    return resource_assignment_commit_result(state, await aexecute(COMMIT_RESOURCE_ASSIGNMENT_QUERY, state.task_name, state.re_contact))
 
 resource_assigner_workflow = StateGraph(ResourceAssignerState, output=SubgraphOutputState)
 
@@ -164,11 +282,10 @@ resource_assigner_workflow.add_node("context", create_resource_assignment_contex
 resource_assigner_workflow.add_node("context_tools", ToolNode(context_builder_tools))
 resource_assigner_workflow.add_node("dialogue", create_resource_assignment_dialogue)
 resource_assigner_workflow.add_node("dialogue_tools", ToolNode(resource_assigner_tools))
-resource_assigner_workflow.add_node("commit", create_resource_assignment_commit)
+resource_assigner_workflow.add_node("commit", RunnableLambda(create_resource_assignment_commit, afunc=acreate_resource_assignment_commit))
 
 resource_assigner_workflow.set_entry_point("context")
 resource_assigner_workflow.add_edge("context_tools", "context")
 resource_assigner_workflow.add_edge("dialogue_tools", "dialogue")
-resource_assigner_workflow.set_finish_point("commit")
 
 resource_assigner_agent = resource_assigner_workflow.compile()
\ No newline at end of file
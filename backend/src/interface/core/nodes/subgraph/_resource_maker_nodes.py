@@ -1,35 +1,37 @@
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import ResourceMakerState, SubgraphOutputState
-from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data
-
-@tool
-def add_resource(
-    existing_contacts: Annotated[list[str], InjectedState("existing_contacts")],
-    current_first_name: Annotated[str, InjectedState("first_name")],
-    current_last_name: Annotated[str, InjectedState("last_name")],
-    current_contact: Annotated[str, InjectedState("contact")],
-    tool_call_id: Annotated[str, InjectedToolCallId],
+from interface.utils._db_utils import execute
+from interface.utils._async_db_utils import aexecute
+from interface.utils._name_cache import entity_names
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
+
+COMMIT_RESOURCE_QUERY = """
+    INSERT INTO public.resources(first_name, last_name, contact) VALUES(!p1, !p2, !p3)
+    ON CONFLICT DO NOTHING
+    RETURNING resource_id
+    """
+
+def resource_update(
+    current_first_name: str,
+    current_last_name: str,
+    current_contact: str,
+    tool_call_id: str,
     first_name: str,
     last_name: str,
     contact: str,
-):
-    """Loads provided first name, last name, and contact into a new resource to be created."""
+) -> tuple[str, Command]:
     vfirst_name = first_name if first_name else current_first_name
     vlast_name =  last_name if last_name else current_last_name
     vcontact = contact if contact else current_contact
 
-    if vcontact in existing_contacts:
-        raise ValueError(f"Resource with contact {vcontact} already exists. Please enter a valid contact.")
-    
-    return Command(update={
+    return vcontact, Command(update={
         "messages": [ToolMessage(
             f"""
             Updated first name to: {vfirst_name}
@@ -41,6 +43,41 @@ def add_resource(
         "contact": vcontact,
     })
 
+async def aadd_resource(
+    current_first_name: Annotated[str, InjectedState("first_name")],
+    current_last_name: Annotated[str, InjectedState("last_name")],
+    current_contact: Annotated[str, InjectedState("contact")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    first_name: str,
+    last_name: str,
+    contact: str,
+):
+    """Loads provided first name, last name, and contact into a new resource to be created."""
+    vcontact, update = resource_update(current_first_name, current_last_name, current_contact, tool_call_id, first_name, last_name, contact)
+
+    if await entity_names.acontains("contacts", vcontact):
+        raise ValueError(f"Resource with contact {vcontact} already exists. Please enter a valid contact.")
+
+    return update
+
+@tool_with_async(aadd_resource)
+def add_resource(
+    current_first_name: Annotated[str, InjectedState("first_name")],
+    current_last_name: Annotated[str, InjectedState("last_name")],
+    current_contact: Annotated[str, InjectedState("contact")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    first_name: str,
+    last_name: str,
+    contact: str,
+):
+    """Loads provided first name, last name, and contact into a new resource to be created."""
+    vcontact, update = resource_update(current_first_name, current_last_name, current_contact, tool_call_id, first_name, last_name, contact)
+
+    if entity_names.contains("contacts", vcontact):
+        raise ValueError(f"Resource with contact {vcontact} already exists. Please enter a valid contact.")
+
+    return update
+
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     """Finishes execution of the current portion of the resource creation dialogue."""
@@ -50,12 +87,7 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 resource_maker_tools = [add_resource, finish_execution]
-resource_maker = model.bind_tools(resource_maker_tools)
-
-def create_resource_context(state: ResourceMakerState) -> ResourceMakerState:
-    existing_contacts = [contact for contact, in select("SELECT contact FROM public.resources")]
-
-    return {"existing_contacts": existing_contacts}
+resource_maker = model_for("resource_maker").bind_tools(resource_maker_tools)
 
 def create_resource_dialogue(state: ResourceMakerState, config: RunnableConfig) -> Command[Literal["clarification", "dialogue_tools", "commit"]]:
     if state.finish:
@@ -92,22 +124,31 @@ def create_resource_dialogue(state: ResourceMakerState, config: RunnableConfig)
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_resource_commit(state: ResourceMakerState) -> SubgraphOutputState:
-    execute("INSERT INTO public.resources(first_name, last_name, contact) VALUES(!p1, !p2, !p3)", state.first_name, state.last_name, state.contact)
+def resource_commit_result(state: ResourceMakerState, inserted: list[tuple[int]]) -> Command[Literal["clarification", "__end__"]]:
+    if not inserted:
+        return reject_commit(f"Resource with contact {state.contact} already exists. Please enter a valid contact.", "dialogue")
+
+    entity_names.add("contacts", state.contact)
+
+    return Command(
+        update={"action": compile_action_data("resource_maker", state)},
+        goto="__end__",
+    )
+
+def create_resource_commit(state: ResourceMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return resource_commit_result(state, execute(COMMIT_RESOURCE_QUERY, state.first_name, state.last_name, state.contact))
 
-    return {"action": compile_action_data("resource_maker", state)}
+async def acreate_resource_commit(state: ResourceMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return resource_commit_result(state, await aexecute(COMMIT_RESOURCE_QUERY, state.first_name, state.last_name, state.contact))
 
 resource_maker_workflow = StateGraph(ResourceMakerState, output=SubgraphOutputState)
 
-resource_maker_workflow.add_node("clarification", clarify_subgraph_input)
-resource_maker_workflow.add_node("context", create_resource_context)
+resource_maker_workflow.add_node("clarification", clarify_subgraph_input, destinations=("dialogue",))
 resource_maker_workflow.add_node("dialogue", create_resource_dialogue)
 resource_maker_workflow.add_node("dialogue_tools", ToolNode(resource_maker_tools))
-resource_maker_workflow.add_node("commit", create_resource_commit)
+resource_maker_workflow.add_node("commit", RunnableLambda(create_resource_commit, afunc=acreate_resource_commit))
 
-resource_maker_workflow.set_entry_point("context")
-resource_maker_workflow.add_edge("context", "dialogue")
+resource_maker_workflow.set_entry_point("dialogue")
 resource_maker_workflow.add_edge("dialogue_tools", "dialogue")
-resource_maker_workflow.set_finish_point("commit")
 
 resource_maker_agent = resource_maker_workflow.compile()
\ No newline at end of file
@@ -1,57 +1,82 @@
 from datetime import date
 from typing import Literal, Annotated
 from langchain_core.messages import SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.types import Command
 from langgraph.graph import StateGraph
-from interface.config import model
+from interface.config import model_for
 from interface.core.schemas import TaskMakerState, SubgraphOutputState
 from interface.utils._db_utils import execute, select
-from interface.utils._agent_utils import clarify_subgraph_input, compile_action_data
-
-@tool
-def get_task_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
-    """Retrieves necessary context for the project which the new task belongs to."""
-    existing_projects = [project for project, in select("SELECT name FROM public.projects")]
-    if project_name not in existing_projects:
-        raise ValueError(f"Project with name {project_name} does not exist. Please enter a valid project. Existing projects are: {", ".join(existing_projects)}.")
-    
-    existing_tasks = [task for task, in select("SELECT name FROM public.tasks")]
-    project_desc = select("SELECT description FROM public.projects WHERE name = !p1", project_name)[0][0]
+from interface.utils._async_db_utils import aexecute, aselect
+from interface.utils._name_cache import entity_names
+from interface.utils._timeline_cache import timeline_cache
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._name_index import describe_invalid_values
+from interface.utils._agent_utils import clarify_subgraph_input, reject_commit, compile_action_data, tool_with_async
+
+TASK_CONTEXT_QUERY = "SELECT description FROM public.projects WHERE name = !p1"
+
+COMMIT_TASK_QUERY = """
+    WITH project AS (
+        SELECT project_id FROM public.projects WHERE name = !p1
+    ), inserted AS (
+        INSERT INTO public.tasks(project_id, name, description, start, \"end\")
+        SELECT project_id, !p2, !p3, !p4::date, !p5::date
+        FROM project
+        ON CONFLICT DO NOTHING
+        RETURNING task_id
+    )
+    SELECT
+        EXISTS(SELECT 1 FROM project),
+        EXISTS(SELECT 1 FROM inserted)
+    """
 
+def task_context_update(tool_call_id: str, project_name: str, project_desc: str | None) -> Command:
     return Command(update={
         "messages": [ToolMessage(f"New task belongs to project with (name: {project_name}) and (description: {project_desc})", tool_call_id=tool_call_id)],
-        "existing_projects": existing_projects,
-        "existing_tasks": existing_tasks,
         "project_name": project_name,
         "project_desc": project_desc,
     })
 
-@tool
-def add_task(
-    existing_tasks: Annotated[list[str], InjectedState("existing_tasks")],
-    current_name: Annotated[str, InjectedState("task_name")],
-    current_desc: Annotated[str, InjectedState("task_desc")],
-    current_start: Annotated[str, InjectedState("start_date")],
-    current_end: Annotated[str, InjectedState("end_date")],
-    tool_call_id: Annotated[str, InjectedToolCallId],
+async def aget_task_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
+    invalid_projects = await entity_names.ainvalid("projects", [project_name])
+    if invalid_projects:
+        raise ValueError(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects)}. Please enter a valid project.")
+
+    project_desc = next((desc for desc, in await aselect(TASK_CONTEXT_QUERY, project_name)), None)
+
+    return task_context_update(tool_call_id, project_name, project_desc)
+
+@tool_with_async(aget_task_context)
+def get_task_context(tool_call_id: Annotated[str, InjectedToolCallId], project_name: str):
+    """Retrieves necessary context for the project which the new task belongs to."""
+    invalid_projects = entity_names.invalid("projects", [project_name])
+    if invalid_projects:
+        raise ValueError(f"The following projects do not exist: {describe_invalid_values("projects", invalid_projects)}. Please enter a valid project.")
+
+    project_desc = next((desc for desc, in select(TASK_CONTEXT_QUERY, project_name)), None)
+
+    return task_context_update(tool_call_id, project_name, project_desc)
+
+def task_update(
+    current_name: str,
+    current_desc: str,
+    current_start: str,
+    current_end: str,
+    tool_call_id: str,
     task_name: str,
-    start_date: str = date.today().strftime("%Y-%m-%d"),
-    end_date: str | None = "",
-    task_description: str | None = "",
-):
-    """Loads provided information into a new task to be created."""
+    start_date: str,
+    end_date: str | None,
+    task_description: str | None,
+) -> tuple[str, Command]:
     vtask_name = task_name if task_name else current_name
     vtask_desc = task_description if task_description else current_desc
     vstart = start_date if start_date else current_start
     vend = end_date if end_date else current_end
 
-    if vtask_name in existing_tasks:
-        raise ValueError(f"Task with name {vtask_name} already exists. Please enter a valid task name.")
-
-    return Command(update={
+    return vtask_name, Command(update={
         "messages": [ToolMessage(
             f"""
             Updated name to: {vtask_name}
@@ -65,6 +90,45 @@ def add_task(
         "end_date": vend,
     })
 
+async def aadd_task(
+    current_name: Annotated[str, InjectedState("task_name")],
+    current_desc: Annotated[str, InjectedState("task_desc")],
+    current_start: Annotated[str, InjectedState("start_date")],
+    current_end: Annotated[str, InjectedState("end_date")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    task_name: str,
+    start_date: str = date.today().strftime("%Y-%m-%d"),
+    end_date: str | None = "",
+    task_description: str | None = "",
+):
+    """Loads provided information into a new task to be created."""
+    vtask_name, update = task_update(current_name, current_desc, current_start, current_end, tool_call_id, task_name, start_date, end_date, task_description)
+
+    if await entity_names.acontains("tasks", vtask_name):
+        raise ValueError(f"Task with name {vtask_name} already exists. Please enter a valid task name.")
+
+    return update
+
+@tool_with_async(aadd_task)
+def add_task(
+    current_name: Annotated[str, InjectedState("task_name")],
+    current_desc: Annotated[str, InjectedState("task_desc")],
+    current_start: Annotated[str, InjectedState("start_date")],
+    current_end: Annotated[str, InjectedState("end_date")],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    task_name: str,
+    start_date: str = date.today().strftime("%Y-%m-%d"),
+    end_date: str | None = "",
+    task_description: str | None = "",
+):
+    """Loads provided information into a new task to be created."""
+    vtask_name, update = task_update(current_name, current_desc, current_start, current_end, tool_call_id, task_name, start_date, end_date, task_description)
+
+    if entity_names.contains("tasks", vtask_name):
+        raise ValueError(f"Task with name {vtask_name} already exists. Please enter a valid task name.")
+
+    return update
+
 @tool
 def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     """Finishes execution of the current portion of the task creation dialogue."""
@@ -74,13 +138,13 @@ def finish_execution(tool_call_id: Annotated[str, InjectedToolCallId]):
     })
 
 context_builder_tools = [get_task_context]
-context_builder = model.bind_tools(context_builder_tools)
+context_builder = model_for("task_maker").bind_tools(context_builder_tools)
 
 task_maker_tools = [add_task, finish_execution]
-task_maker = model.bind_tools(task_maker_tools)
+task_maker = model_for("task_maker").bind_tools(task_maker_tools)
 
 def create_task_context(state: TaskMakerState, config: RunnableConfig) -> Command[Literal["clarification", "context_tools", "dialogue"]]:
-    if state.project_name and state.project_name in state.existing_projects:
+    if state.project_name and entity_names.contains("projects", state.project_name):
         return Command(goto="dialogue")
     
     system_prompt = SystemMessage(
@@ -146,12 +210,28 @@ def create_task_dialogue(state: TaskMakerState, config: RunnableConfig) -> Comma
         }, goto="dialogue_tools" if response.tool_calls else "clarification",
     )
 
-def create_task_commit(state: TaskMakerState) -> SubgraphOutputState:
-    project_id = select("SELECT project_id FROM public.projects WHERE name = !p1", state.project_name)[0][0]
+def task_commit_result(state: TaskMakerState, result: list[tuple[bool, bool]]) -> Command[Literal["clarification", "__end__"]]:
+    project_found, inserted = result[0]
+
+    if not project_found:
+        return reject_commit(f"Project with name {state.project_name} no longer exists. Please enter a valid project.", "context", project_name="")
+    if not inserted:
+        return reject_commit(f"Task with name {state.task_name} already exists. Please enter a valid task name.", "dialogue")
+
+    entity_names.add("tasks", state.task_name)
+    timeline_cache.touch()
+    project_snapshots.invalidate(project_name=state.project_name)
+
+    return Command(
+        update={"action": compile_action_data("task_maker", state)},
+        goto="__end__",
+    )
 
-    execute("INSERT INTO public.tasks(project_id, name, description, start, \"end\") VALUES(!p1, !p2, !p3, !p4, !p5)", project_id, state.task_name, state.task_desc, state.start_date, state.end_date)
+def create_task_commit(state: TaskMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return task_commit_result(state, execute(COMMIT_TASK_QUERY, state.project_name, state.task_name, state.task_desc, state.start_date, state.end_date))
 
-    return {"action": compile_action_data("task_maker", state)}
+async def acreate_task_commit(state: TaskMakerState) -> Command[Literal["clarification", "__end__"]]:
+    return task_commit_result(state, await aexecute(COMMIT_TASK_QUERY, state.project_name, state.task_name, state.task_desc, state.start_date, state.end_date))
 
 task_maker_workflow = StateGraph(TaskMakerState, output=SubgraphOutputState)
 
@@ -160,11 +240,10 @@ task_maker_workflow.add_node("context", create_task_context)
 task_maker_workflow.add_node("context_tools", ToolNode(context_builder_tools))
 task_maker_workflow.add_node("dialogue", create_task_dialogue)
 task_maker_workflow.add_node("dialogue_tools", ToolNode(task_maker_tools))
-task_maker_workflow.add_node("commit", create_task_commit)
+task_maker_workflow.add_node("commit", RunnableLambda(create_task_commit, afunc=acreate_task_commit))
 
 task_maker_workflow.set_entry_point("context")
 task_maker_workflow.add_edge("context_tools", "context")
 task_maker_workflow.add_edge("dialogue_tools", "dialogue")
-task_maker_workflow.set_finish_point("commit")
 
 task_maker_agent = task_maker_workflow.compile()
\ No newline at end of file
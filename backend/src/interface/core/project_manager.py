@@ -1,19 +1,36 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph.state import CompiledStateGraph
 from interface.core.schemas import InputState, OutputState, OverallState
 from interface.core.nodes.graph.parent_nodes import (
     assign_workflow,
     direct_workflow, 
     clarify_input, 
     create_project,
+    acreate_project,
     create_req,
+    acreate_req,
     create_task,
+    acreate_task,
     create_dep,
+    acreate_dep,
     create_resource,
+    acreate_resource,
     assign_resource,
+    aassign_resource,
     analyze_project,
+    aanalyze_project,
+    create_task_batch,
+    acreate_task_batch,
+    create_resource_batch,
+    acreate_resource_batch,
+    create_req_batch,
+    acreate_req_batch,
     suggest_next,
     suggest_commit,
+    compact_history,
+    acompact_history,
     should_finish,
 )
 
@@ -22,17 +39,22 @@ workflow = StateGraph(OverallState, input=InputState, output=OutputState)
 workflow.add_node("liaison", assign_workflow)
 workflow.add_node("supervisor", direct_workflow)
 workflow.add_node("clarification", clarify_input)
-workflow.add_node("project_maker", create_project)
-workflow.add_node("req_maker", create_req)
-workflow.add_node("task_maker", create_task)
-workflow.add_node("dep_maker", create_dep)
-workflow.add_node("resource_maker", create_resource)
-workflow.add_node("resource_assigner", assign_resource)
-workflow.add_node("analyst", analyze_project)
+workflow.add_node("project_maker", RunnableLambda(create_project, afunc=acreate_project))
+workflow.add_node("req_maker", RunnableLambda(create_req, afunc=acreate_req))
+workflow.add_node("task_maker", RunnableLambda(create_task, afunc=acreate_task))
+workflow.add_node("dep_maker", RunnableLambda(create_dep, afunc=acreate_dep))
+workflow.add_node("resource_maker", RunnableLambda(create_resource, afunc=acreate_resource))
+workflow.add_node("resource_assigner", RunnableLambda(assign_resource, afunc=aassign_resource))
+workflow.add_node("analyst", RunnableLambda(analyze_project, afunc=aanalyze_project))
+workflow.add_node("task_batch_maker", RunnableLambda(create_task_batch, afunc=acreate_task_batch))
+workflow.add_node("resource_batch_maker", RunnableLambda(create_resource_batch, afunc=acreate_resource_batch))
+workflow.add_node("req_batch_maker", RunnableLambda(create_req_batch, afunc=acreate_req_batch))
 workflow.add_node("suggestion", suggest_next)
 workflow.add_node("suggestion_commit", suggest_commit)
+workflow.add_node("compaction", RunnableLambda(compact_history, afunc=acompact_history))
 
 workflow.set_entry_point("liaison")
+workflow.add_edge("compaction", "supervisor")
 workflow.add_edge("project_maker", "suggestion")
 workflow.add_edge("req_maker", "suggestion")
 workflow.add_edge("task_maker", "suggestion")
@@ -40,14 +62,18 @@ workflow.add_edge("dep_maker", "suggestion")
 workflow.add_edge("resource_maker", "suggestion")
 workflow.add_edge("resource_assigner", "suggestion")
 workflow.add_edge("analyst", "suggestion")
+workflow.add_edge("task_batch_maker", "suggestion")
+workflow.add_edge("resource_batch_maker", "suggestion")
+workflow.add_edge("req_batch_maker", "suggestion")
 workflow.add_conditional_edges(
     "suggestion_commit",
     should_finish,
     {
-        "loop": "supervisor",
+        "loop": "compaction",
         "end": END,
     },
 )
 
-checkpointer = MemorySaver()
-project_manager = workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
+def compile_project_manager(checkpointer: BaseCheckpointSaver) -> CompiledStateGraph:
+    """Compiles the project manager graph against a checkpointer opened with open_checkpointer or aopen_checkpointer."""
+    return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
@@ -43,6 +43,37 @@ class RouterSchema(BaseModel):
 class DialogueSchema(BaseModel):
     followup: str = Field(description="A followup question for the user to answer and give further clarification, if necessary.")
 
+class TaskDraft(BaseModel):
+    task_name: str = Field(description="The name of the task, quoted directly from the user's messages and formatted in title case.", default="")
+    task_desc: str = Field(description="The task description as a properly capitalized and punctuated third-person paragraph, if the user gave one.", default="")
+    start_date: str = Field(description="The task's start date formatted as YYYY-MM-DD.", default="")
+    end_date: str = Field(description="The task's end date formatted as YYYY-MM-DD, if the user gave one.", default="")
+
+class TaskBatchSchema(BaseModel):
+    project_name: str = Field(description="The name of the existing project that the new tasks belong to.", default="")
+    entities: list[TaskDraft] = Field(description="Every new task the user wants to create, in the order they mentioned them.", default=[])
+    confirmed: bool = Field(description="True only if the user's latest message accepts the list of tasks in the latest AI message without changes.", default=False)
+    followup: str = Field(description="A single question asking the user for every missing required detail, if any are missing.", default="")
+
+class ResourceDraft(BaseModel):
+    first_name: str = Field(description="The resource's first name, capitalized as a proper noun.", default="")
+    last_name: str = Field(description="The resource's last name, capitalized as a proper noun, if the user gave one.", default="")
+    contact: str = Field(description="The resource's contact, preferably an email address.", default="")
+
+class ResourceBatchSchema(BaseModel):
+    entities: list[ResourceDraft] = Field(description="Every new resource the user wants to create, in the order they mentioned them.", default=[])
+    confirmed: bool = Field(description="True only if the user's latest message accepts the list of resources in the latest AI message without changes.", default=False)
+    followup: str = Field(description="A single question asking the user for every missing required detail, if any are missing.", default="")
+
+class RequirementDraft(BaseModel):
+    req_desc: str = Field(description="The requirement description as a properly capitalized and punctuated third-person paragraph.", default="")
+
+class RequirementBatchSchema(BaseModel):
+    project_name: str = Field(description="The name of the existing project that the new requirements belong to.", default="")
+    entities: list[RequirementDraft] = Field(description="Every new requirement the user wants to create, in the order they mentioned them.", default=[])
+    confirmed: bool = Field(description="True only if the user's latest message accepts the list of requirements in the latest AI message without changes.", default=False)
+    followup: str = Field(description="A single question asking the user for every missing required detail, if any are missing.", default="")
+
 # Unique wrappers
 
 class Action(BaseModel):
@@ -58,6 +89,10 @@ class Task(BaseModel):
 
 # Graph states
 
+def latest(old: Any, new: Any) -> Any:
+    """Reducer for channels that parallel branches may write in the same step; the last write wins."""
+    return new
+
 class InputState(BaseModel):
     user_input: str
 
@@ -71,8 +106,13 @@ class SubgraphOutputState(BaseModel):
 class OverallState(InputState, OutputState):
     messages: Annotated[Sequence[AnyMessage], add_messages]
     tool_queue: list[str] = []
-    prev: str | None = None
+    prev: Annotated[str | None, latest] = None
     followup: str | None = None
+    summary: str = ""
+    # Set only on the input of a subgraph run dispatched in parallel with others of the same kind
+    branch: str = ""
+    # Set only on the input of a batch maker run, to the number of entities the router asked for
+    batch_size: int = 0
 
 class SubgraphState(SubgraphOutputState):
     messages: Annotated[Sequence[AnyMessage], add_messages]
@@ -80,22 +120,27 @@ class SubgraphState(SubgraphOutputState):
     followup: str | None = None
     finish: bool = False
 
+class SubgraphBatchOutputState(BaseModel):
+    actions: Annotated[Sequence[Action], add] = []
+
+class SubgraphBatchState(SubgraphState, SubgraphBatchOutputState):
+    count: int = 1
+    project_name: str = ""
+    entities: list[dict[str, str]] = []
+    awaiting_confirmation: bool = False
+
 # Subgraph-specific graph states
 
 class ProjectMakerState(SubgraphState):
-    existing_projects: list[str] = []
     project_name: Annotated[str, "__action_param__"] = ""
     project_desc: Annotated[str, "__action_param__"] = ""
 
 class ReqMakerState(SubgraphState):
-    existing_projects: list[str] = []
     project_name: Annotated[str, "__action_param__"] = ""
     project_desc: str = ""
     req_desc: Annotated[str, "__action_param__"] = ""
 
 class TaskMakerState(SubgraphState):
-    existing_projects: list[str] = []
-    existing_tasks: list[str] = []
     project_name: Annotated[str, "__action_param__"] = ""
     project_desc: str = ""
     task_name: Annotated[str, "__action_param__"] = ""
@@ -104,7 +149,6 @@ class TaskMakerState(SubgraphState):
     end_date: Annotated[str, "__action_param__"] = ""
 
 class DependencyMakerState(SubgraphState):
-    existing_tasks: list[str] = []
     task1_name: Annotated[str, "__action_param__"] = ""
     task1_desc: str = ""
     task2_name: Annotated[str, "__action_param__"] = ""
@@ -112,13 +156,11 @@ class DependencyMakerState(SubgraphState):
     dep_desc: Annotated[str, "__action_param__"] = ""
 
 class ResourceMakerState(SubgraphState):
-    existing_contacts: list[str] = []
     contact: Annotated[str, "__action_param__"] = ""
     first_name: Annotated[str, "__action_param__"] = ""
     last_name: Annotated[str, "__action_param__"] = ""
 
 class ResourceAssignerState(SubgraphState):
-    existing_tasks: list[str] = []
     matching_resources: list[tuple[str]] = []
     task_name: Annotated[str, "__action_param__"] = ""
     re_first_name: Annotated[str, "__action_param__"] = ""
@@ -1 +1,17 @@
-from ._db_utils import execute, select
\ No newline at end of file
+from ._db_utils import execute, select, close_pool, pool_stats
+from ._async_db_utils import aexecute, aselect, close_async_pool, async_pool_stats
+from ._migrations import migrate
+from ._name_cache import entity_names
+from ._checkpointer import open_checkpointer, aopen_checkpointer, compact_checkpoints, acompact_checkpoints, run_checkpoint_compaction
+from ._thread_locks import thread_lock, shared_thread_locks, ThreadBusyError
+from ._intent_router import intent_router
+from ._llm_cache import ResponseCache
+from ._streaming import stream_graph_events, stream_stats, sse_event
+from ._admission import admission, AdmissionRejected
+from ._coalescing import request_key, request_coalescer
+from ._timeline_cache import timeline_cache
+from ._project_snapshot import project_snapshots
+from ._schedule import ScheduleGraph
+from ._dependency_index import dependency_index, DependencyCycleError
+from ._rescheduling import shift_task_end, ashift_task_end, TaskNotFoundError
+from ._resource_calendar import resource_calendar
\ No newline at end of file
@@ -0,0 +1,117 @@
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+class AdmissionRejected(Exception):
+    """Raised when a graph run cannot be admitted: status is 429 when the wait queue is full and 503 when the wait timed out."""
+    def __init__(self, status: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.retry_after = retry_after
+        self.detail = detail
+
+def admission_settings() -> dict[str, int | float]:
+    """
+    Admission settings read from the environment:
+    - LLM_MAX_CONCURRENCY: graph runs (and so model calls in flight) allowed at once per worker (default 4)
+    - LLM_QUEUE_SIZE: runs allowed to wait for a free slot before new ones are turned away with 429 (default 16)
+    - LLM_QUEUE_TIMEOUT: seconds a run may wait for a slot before it is turned away with 503 (default 30)
+    """
+    return {
+        "max_concurrency": int(os.environ.get("LLM_MAX_CONCURRENCY", 4)),
+        "queue_size": int(os.environ.get("LLM_QUEUE_SIZE", 16)),
+        "queue_timeout": float(os.environ.get("LLM_QUEUE_TIMEOUT", 30)),
+    }
+
+class AdmissionController:
+    """
+    Bounds the graph runs that may talk to the model server at once.
+
+    Runs beyond the concurrency limit wait in a bounded FIFO queue. A full queue or a wait beyond the timeout rejects the run
+    with a Retry-After estimate, so that load is shed at the API instead of slowing down every run on the model server.
+    """
+    def __init__(self):
+        self._settings: dict[str, int | float] | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_service = 0.0
+        self._completed = 0
+
+    def _ensure_ready(self) -> dict[str, int | float]:
+        # Created on first use so that settings are read after .env is loaded, inside the running event loop
+        if self._settings is None:
+            self._settings = admission_settings()
+            self._slots = asyncio.Semaphore(self._settings["max_concurrency"])
+        return self._settings
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up for a new run, from the mean service time and the current queue."""
+        settings = self._ensure_ready()
+        service = self._total_service / self._completed if self._completed else settings["queue_timeout"]
+        return max(1, math.ceil(service * (self._waiting + 1) / settings["max_concurrency"]))
+
+    def check(self):
+        """Raises AdmissionRejected with status 429 when every slot is taken and the wait queue is full."""
+        settings = self._ensure_ready()
+        if self._in_flight >= settings["max_concurrency"] and self._waiting >= settings["queue_size"]:
+            self._rejected += 1
+            raise AdmissionRejected(429, self.retry_after(), "Too many requests are waiting for the model; please retry later")
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        settings = self._ensure_ready()
+        self.check()
+
+        start = time.monotonic()
+        self._waiting += 1
+        self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), settings["queue_timeout"])
+        except TimeoutError:
+            self._timed_out += 1
+            raise AdmissionRejected(503, self.retry_after(), "The model server is busy; please retry later")
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - start
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        self._in_flight += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            self._total_service += time.monotonic() - started
+            self._slots.release()
+
+    def stats(self) -> dict[str, int | float]:
+        settings = self._settings or admission_settings()
+        return {
+            **settings,
+            "in_flight": self._in_flight,
+            "queue_depth": self._waiting,
+            "max_queue_depth": self._max_waiting,
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "timed_out": self._timed_out,
+            "avg_wait_ms": 1000 * self._total_wait / self._admitted if self._admitted else 0.0,
+            "max_wait_ms": 1000 * self._max_wait,
+            "avg_service_ms": 1000 * self._total_service / self._completed if self._completed else 0.0,
+        }
+
+admission = AdmissionController()
\ No newline at end of file
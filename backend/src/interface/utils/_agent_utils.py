@@ -1,14 +1,18 @@
-from typing import Literal, Annotated, Any
-from langchain_core.messages import HumanMessage
+from typing import Literal, Annotated, Any, Awaitable, Callable
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import StructuredTool
 from langgraph.types import Command, interrupt
 from interface.core.schemas import SubgraphState, Action
 
-def get_invalid_values[T](vals_to_check: list[T], existing_vals: list[T]) -> list[T]:
-    """Returns all values in vals_to_check that are not present in existing_vals."""
-    bool_mask = [val not in existing_vals for val in vals_to_check]
-    invalid_vals = [val for val, bool in zip(vals_to_check, bool_mask) if bool]
+def tool_with_async(coroutine: Callable[..., Awaitable[Any]]) -> Callable[[Callable[..., Any]], StructuredTool]:
+    """
+    Builds a tool from the decorated function that awaits coroutine instead when the graph is run asynchronously.
+    Both must accept the same arguments.
+    """
+    def decorator(func: Callable[..., Any]) -> StructuredTool:
+        return StructuredTool.from_function(func=func, coroutine=coroutine)
 
-    return invalid_vals
+    return decorator
 
 def clarify_subgraph_input(state: SubgraphState) -> Command[Literal["context", "dialogue"]]:
     new_request = interrupt(state.followup)
@@ -18,6 +22,18 @@ def clarify_subgraph_input(state: SubgraphState) -> Command[Literal["context", "
         goto=state.redirect,
     )
 
+def reject_commit(followup: str, redirect: str, **update) -> Command[Literal["clarification"]]:
+    """Sends the dialogue back to the user when a commit finds missing or duplicate entities."""
+    return Command(
+        update={
+            "messages": [AIMessage(followup)],
+            "redirect": redirect,
+            "followup": followup,
+            "finish": False,
+            **update,
+        }, goto="clarification",
+    )
+
 def compile_action_data(name: str, state: SubgraphState) -> Action:
     param_flag = type(Annotated[Any, "__action_param__"])
     params = {}
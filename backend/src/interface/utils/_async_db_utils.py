@@ -0,0 +1,95 @@
+import os
+import asyncio
+from datetime import date
+from psycopg import AsyncCursor
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+from interface.utils._formatting import parameterize_sql_query
+
+_async_pool: AsyncConnectionPool | None = None
+_async_pool_lock = asyncio.Lock()
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Returns the process-wide async connection pool, opening it on first use.
+
+    Sizing is read from the same environment variables as the sync pool (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_IDLE, DB_POOL_TIMEOUT).
+    """
+    global _async_pool
+
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = AsyncConnectionPool(
+                make_conninfo(
+                    dbname=os.environ.get("DB"),
+                    host=os.environ.get("DB_HOST"),
+                    user=os.environ.get("DB_USER"),
+                    password=os.environ.get("DB_PASSWORD"),
+                ),
+                min_size=int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                max_idle=float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+                timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open()
+            _async_pool = pool
+
+        return _async_pool
+
+async def close_async_pool():
+    """Closes every pooled async connection. Called on application shutdown."""
+    global _async_pool
+
+    async with _async_pool_lock:
+        if _async_pool is not None:
+            await _async_pool.close()
+            _async_pool = None
+
+def async_pool_stats() -> dict[str, int]:
+    """Returns size, request and wait time statistics for the async connection pool."""
+    return _async_pool.get_stats() if _async_pool is not None else {}
+
+async def arun_statement(cur: AsyncCursor, query: str, *args):
+    """Runs query on the cursor with driver-bound arguments, as a prepared statement."""
+    statement = parameterize_sql_query(query)
+    params = statement.bind(*args)
+
+    await cur.execute(statement.text, {f"p{i + 1}": param for i, param in enumerate(params)} or None, prepare=True)
+
+async def aexecute(query: str, *args) -> list[tuple[int | str | date, ...]]:
+    """
+    Awaitable version of execute. Rows produced by a RETURNING clause are returned.
+
+    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be bound to **val**.  
+    Indexing begins at 1. A list argument must appear in the query as ARRAY[!p*i*].
+    ```
+    # Equivalent to "UPDATE table SET count = 6 WHERE id = 5 RETURNING id"
+    await aexecute("UPDATE table SET count = !p2 WHERE id = !p1 RETURNING id", 5, 6)
+    ```
+    """
+    pool = await get_async_pool()
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await arun_statement(cur, query, *args)
+            return await cur.fetchall() if cur.description is not None else []
+
+async def aselect(query: str, *args) -> list[tuple[int | str | date, ...]]:
+    """
+    Awaitable version of select.
+
+    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be bound to **val**.  
+    Indexing begins at 1. A list argument must appear in the query as ARRAY[!p*i*].
+    ```
+    # Equivalent to "SELECT * FROM table WHERE id = 5 AND count = 5"
+    await aselect("SELECT * FROM table WHERE id = !p1 AND count = !p1", 5)
+    ```
+    """
+    pool = await get_async_pool()
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await arun_statement(cur, query, *args)
+            return await cur.fetchall()
\ No newline at end of file
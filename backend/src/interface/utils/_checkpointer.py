@@ -0,0 +1,236 @@
+import os
+import uuid
+import time
+import asyncio
+import logging
+import sqlite3
+import aiosqlite
+from contextlib import contextmanager, asynccontextmanager, closing
+from typing import Iterator, AsyncIterator
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool as PgConnectionPool, AsyncConnectionPool as PgAsyncConnectionPool
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.checkpoint.postgres import PostgresSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from interface.utils._db_utils import get_cursor
+from interface.utils._async_db_utils import get_async_pool
+
+logger = logging.getLogger(__name__)
+
+# Offset between the UUID epoch (1582-10-15) and the Unix epoch, in 100 ns intervals
+UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+# Tables written by each backend: (checkpoints, writes, blobs)
+SQLITE_TABLES = ("checkpoints", "writes", None)
+POSTGRES_TABLES = ("checkpoints", "checkpoint_writes", "checkpoint_blobs")
+
+# PostgresSaver.put writes a checkpoint's new blobs before the checkpoint row that references them, in separate statements,
+# so blobs are only treated as orphaned once they are older than CHECKPOINT_BLOB_GRACE seconds
+BLOB_TIMESTAMP_STATEMENT = "ALTER TABLE checkpoint_blobs ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+
+def checkpoint_settings() -> dict[str, int | float]:
+    """
+    Retention settings read from the environment:
+    - CHECKPOINT_TTL: seconds a thread may sit idle before all of its checkpoints are deleted (default 604800, one week)
+    - CHECKPOINT_MAX_PER_THREAD: checkpoints kept per thread and namespace, newest first (default 20)
+    - CHECKPOINT_COMPACT_INTERVAL: seconds between background compactions (default 300)
+    - CHECKPOINT_BLOB_GRACE: seconds an unreferenced Postgres blob is kept, so that checkpoints being written are not affected (default 600)
+    """
+    return {
+        "ttl": float(os.environ.get("CHECKPOINT_TTL", 604_800)),
+        "max_per_thread": int(os.environ.get("CHECKPOINT_MAX_PER_THREAD", 20)),
+        "interval": float(os.environ.get("CHECKPOINT_COMPACT_INTERVAL", 300)),
+        "blob_grace": float(os.environ.get("CHECKPOINT_BLOB_GRACE", 600)),
+    }
+
+def checkpoint_id_at(timestamp: float) -> str:
+    """
+    Returns the smallest checkpoint id that could have been created at the given Unix time.
+
+    Checkpoint ids are version 6 UUIDs, whose text form sorts in creation order,
+    so comparing against this id selects checkpoints older than timestamp without decoding every row.
+    """
+    ticks = int(timestamp * 10_000_000) + UUID_EPOCH_OFFSET
+    return str(uuid.UUID(int=((ticks >> 12) & 0xFFFF_FFFF_FFFF) << 80 | (0x6000 | ticks & 0x0FFF) << 64 | 0x8000 << 48))
+
+def compaction_statements(tables: tuple[str, str, str | None], placeholder: str) -> list[str]:
+    """Builds the statements that expire idle threads, cap checkpoints per thread and drop orphaned writes and blobs."""
+    checkpoints, writes, blobs = tables
+
+    statements = [
+        f"""
+        DELETE FROM {checkpoints}
+        WHERE thread_id IN (
+            SELECT thread_id
+            FROM {checkpoints}
+            GROUP BY thread_id
+            HAVING MAX(checkpoint_id) < {placeholder}
+        )
+        """,
+        f"""
+        DELETE FROM {checkpoints}
+        WHERE (thread_id, checkpoint_ns, checkpoint_id) IN (
+            SELECT thread_id, checkpoint_ns, checkpoint_id
+            FROM (
+                SELECT
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint_id,
+                    ROW_NUMBER() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS position
+                FROM {checkpoints}
+            ) AS ranked
+            WHERE position > {placeholder}
+        )
+        """,
+        f"""
+        DELETE FROM {writes}
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM {checkpoints}
+            WHERE
+                {checkpoints}.thread_id = {writes}.thread_id
+                AND {checkpoints}.checkpoint_ns = {writes}.checkpoint_ns
+                AND {checkpoints}.checkpoint_id = {writes}.checkpoint_id
+        )
+        """,
+    ]
+
+    if blobs is not None:
+        # Channel values are stored once per version and referenced from each checkpoint's channel_versions
+        statements.append(
+            f"""
+            DELETE FROM {blobs}
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM {checkpoints}
+                WHERE
+                    {checkpoints}.thread_id = {blobs}.thread_id
+                    AND {checkpoints}.checkpoint_ns = {blobs}.checkpoint_ns
+                    AND {checkpoints}.checkpoint -> 'channel_versions' ->> {blobs}.channel = {blobs}.version
+            )
+            AND {blobs}.created_at < now() - make_interval(secs => {placeholder})
+            """
+        )
+
+    return statements
+
+def compaction_params(tables: tuple[str, str, str | None]) -> list[tuple]:
+    settings = checkpoint_settings()
+    cutoff = checkpoint_id_at(time.time() - settings["ttl"])
+    params = [(cutoff,), (settings["max_per_thread"],), ()]
+
+    return params + [(settings["blob_grace"],)] if tables[2] is not None else params
+
+def compact_checkpoints(checkpointer: BaseCheckpointSaver) -> int:
+    """Expires idle threads and trims old checkpoints. Returns the number of rows deleted."""
+    deleted = 0
+
+    if isinstance(checkpointer, SqliteSaver):
+        statements = compaction_statements(SQLITE_TABLES, "?")
+        with checkpointer.lock, closing(checkpointer.conn.cursor()) as cur:
+            for statement, params in zip(statements, compaction_params(SQLITE_TABLES)):
+                cur.execute(statement, params)
+                deleted += cur.rowcount
+            checkpointer.conn.commit()
+    elif isinstance(checkpointer, PostgresSaver):
+        # The checkpoint tables live in the application database, so one pooled transaction of its own does the compaction
+        statements = compaction_statements(POSTGRES_TABLES, "%s")
+        with get_cursor() as cur:
+            for statement, params in zip(statements, compaction_params(POSTGRES_TABLES)):
+                cur.execute(statement, params)
+                deleted += cur.rowcount
+    else:
+        raise TypeError(f"Compaction is not supported for {type(checkpointer).__name__}")
+
+    return deleted
+
+async def acompact_checkpoints(checkpointer: BaseCheckpointSaver) -> int:
+    """Awaitable version of compact_checkpoints, for the async checkpointers."""
+    deleted = 0
+
+    if isinstance(checkpointer, AsyncSqliteSaver):
+        statements = compaction_statements(SQLITE_TABLES, "?")
+        async with checkpointer.lock:
+            for statement, params in zip(statements, compaction_params(SQLITE_TABLES)):
+                async with checkpointer.conn.execute(statement, params) as cur:
+                    deleted += cur.rowcount
+            await checkpointer.conn.commit()
+    elif isinstance(checkpointer, AsyncPostgresSaver):
+        statements = compaction_statements(POSTGRES_TABLES, "%s")
+        async with (await get_async_pool()).connection() as conn, conn.cursor() as cur:
+            for statement, params in zip(statements, compaction_params(POSTGRES_TABLES)):
+                await cur.execute(statement, params)
+                deleted += cur.rowcount
+    else:
+        raise TypeError(f"Compaction is not supported for {type(checkpointer).__name__}")
+
+    return deleted
+
+async def run_checkpoint_compaction(checkpointer: BaseCheckpointSaver):
+    """Compacts the checkpointer every CHECKPOINT_COMPACT_INTERVAL seconds until cancelled."""
+    while True:
+        try:
+            await acompact_checkpoints(checkpointer)
+        except Exception:
+            logger.exception("Checkpoint compaction failed")
+
+        await asyncio.sleep(checkpoint_settings()["interval"])
+
+def postgres_conninfo() -> str:
+    return make_conninfo(
+        dbname=os.environ.get("DB"),
+        host=os.environ.get("DB_HOST"),
+        user=os.environ.get("DB_USER"),
+        password=os.environ.get("DB_PASSWORD"),
+    )
+
+# Connection settings required by the Postgres checkpointers
+POSTGRES_CONN_KWARGS = {"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row}
+
+@contextmanager
+def open_checkpointer() -> Iterator[BaseCheckpointSaver]:
+    """
+    Opens the checkpointer selected by CHECKPOINTER for synchronous graph runs.
+
+    - sqlite (default): a local file at CHECKPOINT_SQLITE_PATH (default checkpoints.sqlite)
+    - postgres: the application database, through its own small connection pool
+    """
+    backend = os.environ.get("CHECKPOINTER", "sqlite")
+
+    if backend == "sqlite":
+        with closing(sqlite3.connect(os.environ.get("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite"), check_same_thread=False)) as conn:
+            checkpointer = SqliteSaver(conn)
+            checkpointer.setup()
+            yield checkpointer
+    elif backend == "postgres":
+        with PgConnectionPool(postgres_conninfo(), max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 10)), kwargs=POSTGRES_CONN_KWARGS) as pool:
+            checkpointer = PostgresSaver(pool)
+            checkpointer.setup()
+            with pool.connection() as conn:
+                conn.execute(BLOB_TIMESTAMP_STATEMENT)
+            yield checkpointer
+    else:
+        raise ValueError(f"Unknown checkpointer {backend}. Expected sqlite or postgres.")
+
+@asynccontextmanager
+async def aopen_checkpointer() -> AsyncIterator[BaseCheckpointSaver]:
+    """Opens the checkpointer selected by CHECKPOINTER for asynchronous graph runs. See open_checkpointer."""
+    backend = os.environ.get("CHECKPOINTER", "sqlite")
+
+    if backend == "sqlite":
+        async with aiosqlite.connect(os.environ.get("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")) as conn:
+            checkpointer = AsyncSqliteSaver(conn)
+            await checkpointer.setup()
+            yield checkpointer
+    elif backend == "postgres":
+        async with PgAsyncConnectionPool(postgres_conninfo(), max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 10)), kwargs=POSTGRES_CONN_KWARGS, open=False) as pool:
+            checkpointer = AsyncPostgresSaver(pool)
+            await checkpointer.setup()
+            async with pool.connection() as conn:
+                await conn.execute(BLOB_TIMESTAMP_STATEMENT)
+            yield checkpointer
+    else:
+        raise ValueError(f"Unknown checkpointer {backend}. Expected sqlite or postgres.")
\ No newline at end of file
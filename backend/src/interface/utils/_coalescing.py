@@ -0,0 +1,102 @@
+import os
+import time
+import asyncio
+import hashlib
+from uuid import UUID
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator
+
+def request_key(thread_id: UUID | str, idempotency_key: str | None, *parts: Any) -> tuple[str, bool]:
+    """
+    Key under which a submission is coalesced, and whether it was given explicitly.
+    Without an idempotency key, submissions are keyed on their content, so that a double submit is still caught while it runs.
+    """
+    if idempotency_key is not None:
+        return f"{thread_id}:{idempotency_key}", True
+
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f"{thread_id}:~{digest}", False
+
+class RequestCoalescer:
+    """
+    Runs each submission once: duplicates that arrive while it is running attach to it and receive its result.
+
+    Results of submissions with an explicit idempotency key are also kept for IDEMPOTENCY_TTL seconds (default 300),
+    so that a client retrying after a dropped connection gets the original reply instead of a second graph run.
+    """
+    def __init__(self, size: int = 1024):
+        self._in_flight = dict[str, asyncio.Future]()
+        self._done = OrderedDict[str, tuple[float, Any]]()
+        self._size = size
+        self._runs = 0
+        self._coalesced = 0
+        self._replayed = 0
+
+    def _ttl(self) -> float:
+        return float(os.environ.get("IDEMPOTENCY_TTL", 300))
+
+    def lookup(self, key: str) -> Awaitable | None:
+        """Returns an awaitable of the result of a running or remembered submission with key, if there is one."""
+        if (future := self._in_flight.get(key)) is not None:
+            self._coalesced += 1
+            return asyncio.shield(future)
+
+        if (done := self._done.get(key)) is not None:
+            expires, result = done
+            if expires > time.monotonic():
+                self._replayed += 1
+                future = asyncio.get_running_loop().create_future()
+                future.set_result(result)
+                return future
+            del self._done[key]
+
+        return None
+
+    @contextmanager
+    def claim(self, key: str, remember: bool) -> Iterator[asyncio.Future]:
+        """
+        Registers a submission as running under key. The caller sets the result on the yielded future;
+        if it leaves without one, attached duplicates receive the error it raised.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._runs += 1
+
+        try:
+            yield future
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+            raise
+        finally:
+            del self._in_flight[key]
+            # Cancelled with the request that claimed it, e.g. on a client disconnect
+            if not future.done():
+                future.cancel()
+            # Retrieved here, so that a failure nobody attached to is not reported as never retrieved
+            elif not future.cancelled() and future.exception() is None and remember:
+                self._done[key] = (time.monotonic() + self._ttl(), future.result())
+                self._done.move_to_end(key)
+                while len(self._done) > self._size:
+                    self._done.popitem(last=False)
+
+    async def run(self, key: str, remember: bool, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of compute, or of the submission already running or remembered under key."""
+        if (existing := self.lookup(key)) is not None:
+            return await existing
+
+        with self.claim(key, remember) as future:
+            future.set_result(await compute())
+            return future.result()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "runs": self._runs,
+            "in_flight": len(self._in_flight),
+            "coalesced": self._coalesced,
+            "replayed": self._replayed,
+            "remembered": len(self._done),
+        }
+
+request_coalescer = RequestCoalescer()
\ No newline at end of file
@@ -1,68 +1,317 @@
 import os
+import time
+import threading
 import psycopg2
+from collections import deque
+from contextlib import contextmanager
 from datetime import date
-from interface.utils._formatting import format_sql_query
+from interface.utils._formatting import parameterize_sql_query
 
+# Upper bound on prepared statements held by a single connection before they are deallocated
+MAX_PREPARED_STATEMENTS = 256
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements have been prepared on its server session."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set[str]()
+
+# Statements that Postgres could not prepare (e.g. indeterminate parameter types)
+_unpreparable = set[str]()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived Postgres connections.
+
+    - Keeps at least *min_size* and at most *max_size* connections open
+    - Pings connections that have been idle longer than *check_after* seconds before handing them out
+    - Closes connections that have been idle longer than *max_idle* seconds (down to *min_size*)
+    - Tracks checkout counts and wait times for sizing
+    """
+    def __init__(self, min_size: int, max_size: int, max_idle: float, check_after: float, timeout: float, **conn_kwargs):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size (min: {min_size}, max: {max_size})")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.check_after = check_after
+        self.timeout = timeout
+        self._conn_kwargs = conn_kwargs
+
+        self._idle = deque[tuple[PreparingConnection, float]]()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self) -> PreparingConnection:
+        return psycopg2.connect(connection_factory=PreparingConnection, **self._conn_kwargs)
+
+    def _is_healthy(self, conn: PreparingConnection, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if idle_for < self.check_after:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn: PreparingConnection):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _trim_idle(self, now: float):
+        # Least recently used connections sit at the left end of the deque
+        while self._idle and self._size > self.min_size and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._discard(conn)
+            self._size -= 1
+            self._recycled += 1
+
+    def getconn(self) -> PreparingConnection:
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+
+            self._waiting += 1
+            try:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        self._timeouts += 1
+                        raise TimeoutError(f"No database connection available after {self.timeout} seconds")
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+            finally:
+                self._waiting -= 1
+
+            now = time.monotonic()
+            self._trim_idle(now)
+
+            if self._idle:
+                conn, last_used = self._idle.pop()
+            else:
+                conn, last_used = None, now
+                # Reserve the slot before connecting outside of the lock
+                self._size += 1
+
+            waited = now - start
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, now - last_used):
+                self._discard(conn)
+                conn = None
+                with self._cond:
+                    self._recycled += 1
+
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def putconn(self, conn: PreparingConnection, broken: bool = False):
+        with self._cond:
+            if self._closed or broken or conn.closed:
+                self._discard(conn)
+                self._size -= 1
+            else:
+                try:
+                    if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    now = time.monotonic()
+                    self._idle.append((conn, now))
+                    self._trim_idle(now)
+                except psycopg2.Error:
+                    self._discard(conn)
+                    self._size -= 1
+
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+                self._size -= 1
+
+            self._cond.notify_all()
+
+    def stats(self) -> dict[str, int | float]:
+        with self._cond:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "avg_wait_ms": 1000 * self._total_wait / self._checkouts if self._checkouts else 0.0,
+                "max_wait_ms": 1000 * self._max_wait,
+            }
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+
+    Sizing is read from the environment:
+    - DB_POOL_MIN_SIZE: connections opened up front (default 1)
+    - DB_POOL_MAX_SIZE: upper bound on open connections (default 10)
+    - DB_POOL_MAX_IDLE: seconds before an idle connection is recycled (default 300)
+    - DB_POOL_CHECK_AFTER: seconds of idleness before a connection is pinged on checkout (default 30)
+    - DB_POOL_TIMEOUT: seconds to wait for a free connection (default 30)
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                min_size=int(os.environ.get("DB_POOL_MIN_SIZE", 1)),
+                max_size=int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+                max_idle=float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+                check_after=float(os.environ.get("DB_POOL_CHECK_AFTER", 30)),
+                timeout=float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+                database=os.environ.get("DB"),
+                host=os.environ.get("DB_HOST"),
+                user=os.environ.get("DB_USER"),
+                password=os.environ.get("DB_PASSWORD"),
+            )
+
+        return _pool
+
+def close_pool():
+    """Closes every pooled connection. Called on application shutdown."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def pool_stats() -> dict[str, int | float]:
+    """Returns size, checkout and wait time statistics for the connection pool."""
+    with _pool_lock:
+        return _pool.stats() if _pool is not None else {}
+
+@contextmanager
 def get_cursor():
-    conn = None
-    cur = None
+    """
+    Checks a connection out of the pool for the duration of one transaction, which is committed on exit.
+    Errors from connecting or waiting for a free connection are raised to the caller.
+    """
+    pool = get_pool()
+    conn = pool.getconn()
 
+    broken = False
     try:
-        conn = psycopg2.connect(
-            database=os.environ.get("DB"),
-            host=os.environ.get("DB_HOST"),
-            user=os.environ.get("DB_USER"),
-            password=os.environ.get("DB_PASSWORD"),
-        )
-
-        cur = conn.cursor()
-    except (Exception, psycopg2.DatabaseError) as error:
-        print(error)
+        with conn.cursor() as cur:
+            yield cur
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        return conn, cur
+        pool.putconn(conn, broken=broken)
 
-def execute(query: str, *args):
+def run_statement(cur: psycopg2.extensions.cursor, query: str, *args):
     """
-    Given query is formatted with sanitized arguments.
+    Runs query on the cursor with driver-bound arguments.
 
-    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be replaced with **val**.  
-    Indexing begins at 1.
+    The query is translated once per distinct text and prepared on the cursor's connection the first time it is seen there,
+    so later calls only send EXECUTE with the new arguments.
+    """
+    statement = parameterize_sql_query(query)
+    params = statement.bind(*args)
+    conn = cur.connection
+
+    if statement.name not in conn.prepared and statement.name not in _unpreparable:
+        if len(conn.prepared) >= MAX_PREPARED_STATEMENTS:
+            cur.execute("DEALLOCATE ALL")
+            conn.prepared.clear()
+
+        in_transaction = conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        if in_transaction:
+            cur.execute("SAVEPOINT prepare_statement")
+
+        try:
+            cur.execute(f"PREPARE {statement.name} AS {statement.prepared_text}")
+            conn.prepared.add(statement.name)
+        except psycopg2.ProgrammingError:
+            if in_transaction:
+                cur.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+            else:
+                conn.rollback()
+            _unpreparable.add(statement.name)
+
+    if statement.name in conn.prepared:
+        cur.execute(statement.execute_text, params or None)
+    else:
+        cur.execute(statement.text, {f"p{i + 1}": param for i, param in enumerate(params)} or None)
+
+def execute(query: str, *args) -> list[tuple[int | str | date, ...]]:
+    """
+    Given query is executed with driver-bound arguments and committed. Rows produced by a RETURNING clause are returned.
+
+    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be bound to **val**.  
+    Indexing begins at 1. A list argument must appear in the query as ARRAY[!p*i*].
     ```
-    # Equivalent to "SELECT * FROM table WHERE id = 5 AND count = 5"
-    select("SELECT * FROM table WHERE id = !p1 AND count = !p1", 5)
+    # Equivalent to "UPDATE table SET count = 6 WHERE id = 5 RETURNING id"
+    execute("UPDATE table SET count = !p2 WHERE id = !p1 RETURNING id", 5, 6)
     ```
     """
-    conn, cur = get_cursor()
-    formatted_query = format_sql_query(query, *args)
-
-    if cur is not None:
-        cur.execute(formatted_query)
-        cur.close()
-    
-    if conn is not None:
-        conn.commit()
-        conn.close()
+    with get_cursor() as cur:
+        run_statement(cur, query, *args)
+        return cur.fetchall() if cur.description is not None else []
 
 def select(query: str, *args) -> list[tuple[int | str | date, ...]]:
     """
-    Given query is formatted with sanitized arguments.
+    Given query is executed with driver-bound arguments.
 
-    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be replaced with **val**.  
-    Indexing begins at 1.
+    For argument **val** with index *i* in the packed tuple, any instances of !p*i* in the query string will be bound to **val**.  
+    Indexing begins at 1. A list argument must appear in the query as ARRAY[!p*i*].
     ```
     # Equivalent to "SELECT * FROM table WHERE id = 5 AND count = 5"
     select("SELECT * FROM table WHERE id = !p1 AND count = !p1", 5)
     ```
     """
-    conn, cur = get_cursor()
-    result = []
-    formatted_query = format_sql_query(query, *args)
-
-    if cur is not None:
-        cur.execute(formatted_query)
-        result = cur.fetchall()
-
-    if conn is not None:
-        conn.close()
-
-    return result
\ No newline at end of file
+    with get_cursor() as cur:
+        run_statement(cur, query, *args)
+        return cur.fetchall()
\ No newline at end of file
@@ -0,0 +1,215 @@
+import os
+import time
+import threading
+from interface.utils._db_utils import select
+from interface.utils._async_db_utils import aselect
+
+DEPENDENCY_VERSION_QUERY = "SELECT version FROM public.entity_versions WHERE entity = 'task_dependencies'"
+
+DEPENDENCY_LOAD_QUERY = """
+    SELECT
+        (SELECT version FROM public.entity_versions WHERE entity = 'task_dependencies'),
+        ARRAY(SELECT task_id FROM public.task_dependencies ORDER BY task_id, dependent_id),
+        ARRAY(SELECT dependent_id FROM public.task_dependencies ORDER BY task_id, dependent_id)
+    """
+
+class DependencyCycleError(ValueError):
+    """Raised when a new dependency would make a task (indirectly) depend on itself."""
+
+class DependencyIndex:
+    """
+    Online topological order of all task dependencies, used to reject dependencies that would close a cycle.
+
+    Every task with a dependency holds a position such that each task comes before the tasks that depend on it (Pearce-Kelly).
+    A new dependency whose prerequisite already comes first cannot close a cycle and is accepted in constant time; otherwise only
+    the tasks positioned between the two are searched and reordered, never the whole graph.
+
+    The index is loaded once and kept current by the dependency commit node. Writes made by other processes are detected through
+    the task_dependencies counter in public.entity_versions, checked at most once every NAME_CACHE_CHECK_INTERVAL seconds (default 1).
+    Two processes committing opposite dependencies at the same moment are not serialized against each other.
+    """
+    def __init__(self):
+        self._order = dict[int, int]()
+        self._successors = dict[int, set[int]]()
+        self._predecessors = dict[int, set[int]]()
+        self._next = 0
+        # Dependencies recorded by add whose insert has not finished yet, mapped to whether the loaded version already counts their row
+        self._pending = dict[tuple[int, int], bool]()
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        check_interval = float(os.environ.get("NAME_CACHE_CHECK_INTERVAL", 1.0))
+        return self._version is None or time.monotonic() - self._checked_at >= check_interval
+
+    def _is_current(self, result: list[tuple[int]]) -> bool:
+        with self._lock:
+            if result and result[0][0] == self._version:
+                self._checked_at = time.monotonic()
+                return True
+            return False
+
+    def _store(self, rows: list[tuple[int, list[int], list[int]]]):
+        for version, tasks, dependents in rows:
+            successors = dict[int, set[int]]()
+            predecessors = dict[int, set[int]]()
+            for task, dependent in zip(tasks, dependents):
+                successors.setdefault(task, set()).add(dependent)
+                predecessors.setdefault(dependent, set()).add(task)
+                successors.setdefault(dependent, set())
+                predecessors.setdefault(task, set())
+
+            # Kahn's algorithm; tasks on cycles committed before this index existed are placed last, in any order
+            remaining = {task: len(preds) for task, preds in predecessors.items()}
+            order = [task for task, count in remaining.items() if count == 0]
+            for task in order:
+                for dependent in successors[task]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        order.append(dependent)
+            order.extend(task for task, count in remaining.items() if count > 0)
+
+            with self._lock:
+                self._successors = successors
+                self._predecessors = predecessors
+                self._order = {task: position for position, task in enumerate(order)}
+                self._next = len(order)
+                self._version = version
+                self._checked_at = time.monotonic()
+
+                # Dependencies still being inserted by this process must keep blocking the reverse dependency
+                for task, dependent in list(self._pending):
+                    if dependent in successors.get(task, ()):
+                        self._pending[(task, dependent)] = True
+                        continue
+                    try:
+                        self._link(task, dependent)
+                    except DependencyCycleError:
+                        # Another process committed the reverse dependency, which this index cannot prevent
+                        pass
+
+    def refresh(self):
+        """Reloads the index if another process has written task dependencies since it was loaded."""
+        if not self._is_stale():
+            return
+        if self._version is not None and self._is_current(select(DEPENDENCY_VERSION_QUERY)):
+            return
+
+        self._store(select(DEPENDENCY_LOAD_QUERY))
+
+    async def arefresh(self):
+        """Awaitable version of refresh."""
+        if not self._is_stale():
+            return
+        if self._version is not None and self._is_current(await aselect(DEPENDENCY_VERSION_QUERY)):
+            return
+
+        self._store(await aselect(DEPENDENCY_LOAD_QUERY))
+
+    def _reaches(self, start: int, target: int, bound: int, visited: set[int]) -> bool:
+        """Searches forward from start through tasks positioned before bound, collecting them into visited."""
+        stack = [start]
+        visited.add(start)
+
+        while stack:
+            for dependent in self._successors[stack.pop()]:
+                if dependent == target:
+                    return True
+                if dependent not in visited and self._order[dependent] < bound:
+                    visited.add(dependent)
+                    stack.append(dependent)
+
+        return False
+
+    def _ancestors(self, start: int, bound: int) -> set[int]:
+        """Searches backward from start through tasks positioned after bound."""
+        stack = [start]
+        visited = {start}
+
+        while stack:
+            for task in self._predecessors[stack.pop()]:
+                if task not in visited and self._order[task] > bound:
+                    visited.add(task)
+                    stack.append(task)
+
+        return visited
+
+    def _creates_cycle(self, task: int, dependent: int) -> bool:
+        if task == dependent:
+            return True
+        if task not in self._order or dependent not in self._order or self._order[task] < self._order[dependent]:
+            return False
+        return self._reaches(dependent, task, self._order[task], set())
+
+    def creates_cycle(self, task: int, dependent: int) -> bool:
+        """Whether making dependent depend on task would make a task depend on itself."""
+        self.refresh()
+        with self._lock:
+            return self._creates_cycle(task, dependent)
+
+    async def acreates_cycle(self, task: int, dependent: int) -> bool:
+        """Awaitable version of creates_cycle."""
+        await self.arefresh()
+        with self._lock:
+            return self._creates_cycle(task, dependent)
+
+    def add(self, task: int, dependent: int):
+        """
+        Records that dependent depends on task, reordering the tasks between them if needed.
+        Raises DependencyCycleError instead if the dependency would close a cycle.
+        Called before the dependency is inserted, so that concurrent commits in this process see it; see committed and discard.
+        """
+        if task == dependent:
+            raise DependencyCycleError("A task cannot depend on itself")
+
+        with self._lock:
+            if self._link(task, dependent):
+                self._pending[(task, dependent)] = False
+
+    def _link(self, task: int, dependent: int) -> bool:
+        """Adds the dependency to the graph and the order, or raises DependencyCycleError. Returns whether it is new. Called with the lock held."""
+        for node in (task, dependent):
+            if node not in self._order:
+                self._order[node] = self._next
+                self._next += 1
+                self._successors[node] = set()
+                self._predecessors[node] = set()
+
+        lower, upper = self._order[dependent], self._order[task]
+        if lower < upper:
+            forward = set[int]()
+            if self._reaches(dependent, task, upper, forward):
+                raise DependencyCycleError("The dependent task is already a direct or indirect prerequisite of the other task")
+            backward = self._ancestors(task, lower)
+
+            # The affected tasks keep their positions as a set; everything that leads to task now comes before everything after dependent
+            moved = sorted(backward, key=self._order.__getitem__) + sorted(forward, key=self._order.__getitem__)
+            for node, position in zip(moved, sorted(self._order[node] for node in moved)):
+                self._order[node] = position
+
+        if dependent in self._successors[task]:
+            return False
+
+        self._successors[task].add(dependent)
+        self._predecessors[dependent].add(task)
+        return True
+
+    def committed(self, task: int, dependent: int):
+        """Accounts for a dependency inserted by this process after add; its row bumps the version by one, unless a reload already counted it."""
+        with self._lock:
+            counted = self._pending.pop((task, dependent), False)
+            if self._version is not None and not counted:
+                self._version += 1
+
+    def discard(self, task: int, dependent: int):
+        """
+        Removes a dependency recorded by add that was not inserted after all, unless a reload has since found its row in the database.
+        Removing edges never invalidates the order.
+        """
+        with self._lock:
+            if self._pending.pop((task, dependent), True) is False:
+                self._successors[task].discard(dependent)
+                self._predecessors[dependent].discard(task)
+
+dependency_index = DependencyIndex()
\ No newline at end of file
@@ -1,4 +1,7 @@
 import re
+import hashlib
+from functools import lru_cache
+from typing import NamedTuple
 
 def sanitize(arg: int | str | list[int | str]) -> str:
     """
@@ -38,4 +41,85 @@ def format_sql_query(query: str, *args) -> str:
     for i, arg in enumerate(args):
         formatted_query = formatted_query.replace(f"!p{i + 1}", sanitize(arg))
 
-    return formatted_query
\ No newline at end of file
+    return formatted_query
+
+def array_literal(vals: list[int | str | None]) -> str:
+    """Formats a list of values as a Postgres array literal, e.g. ["a", None] -> '{"a",NULL}'."""
+    elements = []
+    for val in vals:
+        if val is None:
+            elements.append("NULL")
+        else:
+            elements.append('"' + str(val).replace("\\", "\\\\").replace('"', '\\"') + '"')
+
+    return "{" + ",".join(elements) + "}"
+
+def bind_param(arg: int | str | list[int | str] | None, is_array: bool = False) -> int | str | None:
+    """
+    Converts argument to a driver-bound query parameter, following the same rules as sanitize.
+    - Converts falsy strings to NULL
+    - Converts lists (or any argument used as ARRAY[!p*i*]) to an array literal
+    """
+    if is_array:
+        vals = arg if isinstance(arg, list) else [arg]
+        return array_literal([bind_param(val) for val in vals])
+
+    if isinstance(arg, int):
+        return arg
+
+    if not arg:
+        return None
+    return arg
+
+class ParameterizedQuery(NamedTuple):
+    name: str
+    text: str
+    prepared_text: str
+    execute_text: str
+    param_count: int
+    array_params: frozenset[int]
+
+    def bind(self, *args) -> tuple[int | str | None, ...]:
+        """Converts packed arguments to driver parameters ordered by their !p*i* index."""
+        arg_count = len(args)
+        if self.param_count != arg_count:
+            raise TypeError(f"Expected {self.param_count} query arguments but received {arg_count}")
+
+        return tuple(bind_param(arg, i + 1 in self.array_params) for i, arg in enumerate(args))
+
+@lru_cache(maxsize=512)
+def parameterize_sql_query(query: str) -> ParameterizedQuery:
+    """
+    Translates a query using the !p*i* convention into driver-parameterized forms, once per distinct query text.
+
+    - **prepared_text** uses $*i* placeholders and is suitable for PREPARE
+    - **text** uses %(p*i*)s placeholders and is suitable for direct execution
+    - **execute_text** runs the prepared statement, e.g. EXECUTE name(%s, %s)
+
+    A parameter written as ARRAY[!p*i*] is bound as a single array value, so lists can be passed as before.
+    ```
+    # Prepared as "SELECT name FROM tasks WHERE name = ANY($1::varchar[])"
+    parameterize_sql_query("SELECT name FROM tasks WHERE name = ANY(ARRAY[!p1]::varchar[])")
+    ```
+    """
+    indices = {int(index) for index in re.findall(r"!p([0-9]+)", query)}
+    array_params = frozenset(int(index) for index in re.findall(r"ARRAY\[\s*!p([0-9]+)\s*\]", query))
+    if indices != set(range(1, len(indices) + 1)):
+        raise ValueError(f"Query parameters must be numbered consecutively from !p1: {query}")
+
+    array_pattern = r"ARRAY\[\s*!p([0-9]+)\s*\]|!p([0-9]+)"
+    prepared_text = re.sub(array_pattern, lambda match: f"${match[1] or match[2]}", query)
+    # The driver only interpolates (and so only unescapes %%) when parameters are passed
+    text = re.sub(array_pattern, lambda match: f"%(p{match[1] or match[2]})s", query.replace("%", "%%")) if indices else query
+
+    name = "pm_" + hashlib.blake2b(query.encode(), digest_size=8).hexdigest()
+    execute_text = f"EXECUTE {name}" + (f"({", ".join(["%s"] * len(indices))})" if indices else "")
+
+    return ParameterizedQuery(
+        name=name,
+        text=text,
+        prepared_text=prepared_text,
+        execute_text=execute_text,
+        param_count=len(indices),
+        array_params=array_params,
+    )
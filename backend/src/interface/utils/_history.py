@@ -0,0 +1,111 @@
+import os
+from typing import Sequence
+from langchain_core.messages import AnyMessage, AIMessage, HumanMessage, SystemMessage, RemoveMessage
+from interface.core.schemas import Action, OverallState
+
+# Rough characters per token for English text with the llama tokenizer; only used to decide when to compact
+CHARS_PER_TOKEN = 4
+
+def history_settings() -> dict[str, int]:
+    """
+    Compaction settings read from the environment:
+    - HISTORY_TOKEN_BUDGET: estimated prompt tokens of conversation history above which older turns are summarized (default 3000)
+    - HISTORY_KEEP_TURNS: most recent user turns that are always kept verbatim (default 4)
+    - HISTORY_MAX_ACTIONS: most recent actions listed in the compacted view (default 20)
+    - SUBGRAPH_MAX_ACTIONS: most recent actions listed in the context handed to a subgraph (default 5)
+    """
+    return {
+        "token_budget": int(os.environ.get("HISTORY_TOKEN_BUDGET", 3000)),
+        "keep_turns": int(os.environ.get("HISTORY_KEEP_TURNS", 4)),
+        "max_actions": int(os.environ.get("HISTORY_MAX_ACTIONS", 20)),
+        "subgraph_actions": int(os.environ.get("SUBGRAPH_MAX_ACTIONS", 5)),
+    }
+
+def estimate_tokens(messages: Sequence[AnyMessage]) -> int:
+    return sum(len(str(message.content)) for message in messages) // CHARS_PER_TOKEN
+
+def split_history(messages: Sequence[AnyMessage], keep_turns: int) -> tuple[list[AnyMessage], list[AnyMessage]]:
+    """Splits messages into the turns to fold into the summary and the last keep_turns turns, each of which starts at a user message."""
+    turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+
+    if len(turn_starts) <= keep_turns:
+        return [], list(messages)
+
+    cut = turn_starts[-keep_turns] if keep_turns else len(messages)
+    return list(messages[:cut]), list(messages[cut:])
+
+def needs_compaction(state: OverallState) -> bool:
+    settings = history_settings()
+    older, _ = split_history(state.messages, settings["keep_turns"])
+
+    return bool(older) and estimate_tokens(state.messages) > settings["token_budget"]
+
+def format_actions(actions: Sequence[Action], max_actions: int) -> str:
+    shown = list(actions)[-max_actions:] if max_actions else []
+    lines = [f"- {action.name}: " + ", ".join(f"{key}={value}" for key, value in action.params.items()) for action in shown]
+
+    if len(actions) > len(shown):
+        lines.insert(0, f"- ({len(actions) - len(shown)} earlier actions omitted)")
+
+    return "\n".join(lines) if lines else "None"
+
+def compaction_update(state: OverallState, summary: str) -> dict:
+    """State update that replaces the folded turns with the new rolling summary."""
+    older, _ = split_history(state.messages, history_settings()["keep_turns"])
+
+    return {
+        "messages": [RemoveMessage(id=message.id) for message in older],
+        "summary": summary,
+    }
+
+def conversation_view(state: OverallState) -> list[AnyMessage]:
+    """
+    Returns the messages that nodes should send to the model: the recent turns verbatim,
+    preceded by the rolling summary and a record of completed actions once older turns have been compacted.
+    """
+    if not state.summary:
+        return list(state.messages)
+
+    context = SystemMessage(
+        f"""
+        Summary of the earlier conversation with the user:
+        {state.summary}
+
+        Project management actions completed so far in this conversation:
+        {format_actions(state.actions_taken, history_settings()["max_actions"])}
+        """
+    )
+
+    return [context] + list(state.messages)
+
+def triggering_turn(messages: Sequence[AnyMessage]) -> list[AnyMessage]:
+    """
+    Returns the latest user message together with everything after it (the outputs of workers that already ran for it),
+    preceded by the assistant question it answered, if any.
+    """
+    turn_starts = [i for i, message in enumerate(messages) if isinstance(message, HumanMessage)]
+    if not turn_starts:
+        return list(messages)
+
+    start = turn_starts[-1]
+    if start > 0 and isinstance(messages[start - 1], AIMessage):
+        start -= 1
+
+    return list(messages[start:])
+
+def subgraph_view(state: OverallState) -> list[AnyMessage]:
+    """
+    Returns the scoped context handed to a subgraph: the turn that triggered it,
+    preceded by the rolling summary (if any), the most recent completed actions and, for parallel runs, which item this run handles.
+    """
+    turn = triggering_turn(state.messages)
+    context = []
+
+    if state.summary:
+        context.append(f"Summary of the earlier conversation with the user:\n{state.summary}")
+    if state.actions_taken:
+        context.append(f"Most recent project management actions completed in this conversation:\n{format_actions(state.actions_taken, history_settings()["subgraph_actions"])}")
+    if state.branch:
+        context.append(state.branch)
+
+    return ([SystemMessage("\n\n".join(context))] if context else []) + turn
\ No newline at end of file
@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import NamedTuple
+from interface.core.schemas import RouterSchema
+
+logger = logging.getLogger(__name__)
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "another": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+
+COUNT = r"(?:(?P<count>a|an|one|another|two|three|four|five|six|seven|eight|nine|ten|\d+|some|several|few|more|multiple)\s+)?"
+CREATE_VERBS = r"(?:add|create|make|start|set\s+up|register|enter|put\s+in|build|include)"
+CREATE = rf"\b{CREATE_VERBS}\s+"
+ADJECTIVES = r"(?:(?:new|more|other|additional|extra)\s+)?"
+
+# RouterSchema field -> nouns that name the entity it creates
+FUNCTION_NOUNS = {
+    "add_project": r"projects?",
+    "add_requirement": r"requirements?",
+    "add_task": r"tasks?",
+    "add_task_dependency": r"(?:task\s+)?dependenc(?:y|ies)",
+    "add_resource": r"(?:resources?|team\s+members?|people|persons?|members?|employees?)",
+}
+
+CREATE_PATTERNS = {
+    field: re.compile(CREATE + COUNT + ADJECTIVES + rf"(?P<noun>{noun})\b", re.IGNORECASE)
+    for field, noun in FUNCTION_NOUNS.items()
+}
+ASSIGN_PATTERN = re.compile(r"\bassign(?:s|ing)?\b", re.IGNORECASE)
+DEPENDS_PATTERN = re.compile(r"\b(?:depends?|dependent)\s+(?:up)?on\b|\bmust\s+(?:finish|be\s+(?:done|finished|completed))\s+before\b", re.IGNORECASE)
+QUESTION_PATTERN = re.compile(
+    r"^\s*(?:what|which|who|when|how|why|is|are|does|do|show|list|give\s+me|tell\s+me|summari[sz]e|analy[sz]e|describe)\b|\?\s*$",
+    re.IGNORECASE,
+)
+# A new entity mentioned without a verb that the patterns understand (e.g. "add a task and a dependency")
+LOOSE_ENTITY_PATTERN = re.compile(
+    r"\b(?:a|an|another|one|two|three|four|five|\d+)\s+" + ADJECTIVES + rf"(?:{"|".join(FUNCTION_NOUNS.values())})\b",
+    re.IGNORECASE,
+)
+NEGATIVE_PATTERN = re.compile(
+    r"^\s*(?:no|nope|nah|not\s+now|no\s+thanks?|no,?\s+thank\s+you|that'?s\s+(?:all|it)|i'?m\s+(?:done|good)|nothing(?:\s+else)?|all\s+good|stop)\b[\s.!,]*(?:thanks?|thank\s+you)?[\s.!]*$",
+    re.IGNORECASE,
+)
+# Names the user gives to new entities, which may contain any of the keywords above (e.g. "add a task called Create Project Plan"):
+# quoted text, and whatever follows "called", "named" or "titled" up to the end of the clause or the next request
+NAME_PATTERN = re.compile(
+    r"\"[^\"]*\"|“[^”]*”|(?<!\w)'[^']*'(?!\w)|"
+    rf"\b(?:called|named|titled)\s+.*?(?=[,.;!?](?:\s|$)|\s+and\s+(?:then\s+)?(?:{CREATE_VERBS}|assign)\b|$)",
+    re.IGNORECASE,
+)
+# Anything that takes back or rules out a request (e.g. "don't add a project, just add a task")
+NEGATION_PATTERN = re.compile(
+    r"\b(?:don[’']?t|do\s+not|doesn[’']?t|does\s+not|didn[’']?t|won[’']?t|not|never|no\s+need|without|instead\s+of|rather\s+than|skip|cancel)\b",
+    re.IGNORECASE,
+)
+AFFIRMATIVE_PATTERN = re.compile(
+    r"^\s*(?:yes|yeah|yep|yup|sure|ok(?:ay)?|please(?:\s+do)?|go\s+ahead|sounds\s+good|do\s+it|y)\b[\s.!,]*(?:please|thanks?|thank\s+you)?[\s.!]*$",
+    re.IGNORECASE,
+)
+# Mentions of each function in an assistant suggestion, used to resolve a bare "yes"
+SUGGESTION_PATTERNS = {
+    "add_requirement": re.compile(r"\brequirements?\b", re.IGNORECASE),
+    "add_task_dependency": re.compile(r"\bdependenc(?:y|ies)\b", re.IGNORECASE),
+    "assign_resource": re.compile(r"\bassign", re.IGNORECASE),
+    "add_resource": re.compile(r"\b(?:add|create)\w*\s+(?:a\s+)?(?:new\s+)?resources?\b", re.IGNORECASE),
+    "add_task": re.compile(r"\b(?:add|create)\w*\s+(?:a\s+|another\s+)?(?:new\s+)?tasks?\b", re.IGNORECASE),
+    "add_project": re.compile(r"\b(?:add|create)\w*\s+(?:a\s+|another\s+)?(?:new\s+)?projects?\b", re.IGNORECASE),
+}
+
+# RouterSchema fields that are flags rather than counts, so a route made of them can be predicted from its label alone
+UNCOUNTED_FIELDS = {"analyze_project"}
+
+class Route(NamedTuple):
+    schema: RouterSchema
+    confidence: float
+    source: str
+
+def parse_count(word: str | None, noun: str) -> int | None:
+    """
+    Returns the number of entities requested, or None when the wording is too vague to count.
+    A plural noun without a count (e.g. "add tasks for design, build and test") names an unknown number of entities.
+    """
+    if word is None:
+        noun = noun.lower()
+        return None if noun == "people" or noun.endswith("s") else 1
+    word = word.lower()
+    if word.isdigit():
+        return int(word)
+
+    return NUMBER_WORDS.get(word)
+
+def route_by_rules(text: str, question: str | None = None) -> Route | None:
+    """
+    Routes messages whose intent is unambiguous from their wording alone.
+
+    With a question (the assistant suggestion being answered), bare negative replies route to nothing
+    and bare affirmative replies route to the single function the suggestion mentions.
+    Requests that contain a negation are left to the model, since the rules cannot tell which request is ruled out.
+    Entity names (quoted, or introduced by "called", "named" or "titled") are removed first, so that their words are not read as requests.
+    """
+    if question is not None:
+        if NEGATIVE_PATTERN.match(text):
+            return Route(RouterSchema(), 1.0, "rules")
+        if AFFIRMATIVE_PATTERN.match(text):
+            suggested = [field for field, pattern in SUGGESTION_PATTERNS.items() if pattern.search(question)]
+            if len(suggested) == 1:
+                return Route(RouterSchema(**{suggested[0]: 1}), 0.95, "rules")
+            return None
+
+    text = NAME_PATTERN.sub(" ", text)
+    counts = Counter[str]()
+    consumed = list[tuple[int, int]]()
+    confidence = 1.0
+
+    for field, pattern in CREATE_PATTERNS.items():
+        for match in pattern.finditer(text):
+            count = parse_count(match.group("count"), match.group("noun"))
+            if count is None:
+                return None
+            counts[field] += count
+            consumed.append(match.span())
+
+    assignments = len(ASSIGN_PATTERN.findall(text))
+    if assignments:
+        counts["assign_resource"] += assignments
+    if DEPENDS_PATTERN.search(text) and not counts["add_task_dependency"]:
+        counts["add_task_dependency"] += 1
+        confidence = min(confidence, 0.9)
+    if counts and NEGATION_PATTERN.search(text):
+        return None
+
+    for match in LOOSE_ENTITY_PATTERN.finditer(text):
+        if not any(start <= match.start() < end for start, end in consumed):
+            # Some requested entity was not attributed to a function, so the counts may be short
+            confidence = min(confidence, 0.5)
+
+    if QUESTION_PATTERN.search(text):
+        if counts:
+            return None
+        return Route(RouterSchema(analyze_project=1), 0.9, "rules")
+
+    if not counts:
+        return None
+
+    return Route(RouterSchema(**counts), confidence, "rules")
+
+def tokenize(text: str) -> list[str]:
+    words = re.findall(r"[a-z']+|\d+", text.lower())
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+def route_label(schema: RouterSchema) -> str:
+    fields = [field for field in FUNCTION_NOUNS | {"assign_resource": "", "analyze_project": ""} if getattr(schema, field)]
+    return "+".join(sorted(fields)) if fields else "none"
+
+class IntentClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams, predicting which functions a message asks for."""
+    def __init__(self):
+        self._label_counts = Counter[str]()
+        self._word_counts = defaultdict[str, Counter[str]](Counter)
+        self._word_totals = Counter[str]()
+        self._vocabulary = set[str]()
+
+    def learn(self, text: str, schema: RouterSchema):
+        label = route_label(schema)
+        words = tokenize(text)
+
+        self._label_counts[label] += 1
+        self._word_counts[label].update(words)
+        self._word_totals[label] += len(words)
+        self._vocabulary.update(words)
+
+    def predict(self, text: str) -> tuple[str, float] | None:
+        if not self._label_counts:
+            return None
+
+        words = tokenize(text)
+        total = sum(self._label_counts.values())
+        vocabulary = len(self._vocabulary) + 1
+
+        log_scores = {
+            label: math.log(count / total) + sum(
+                math.log((self._word_counts[label][word] + 1) / (self._word_totals[label] + vocabulary))
+                for word in words
+            )
+            for label, count in self._label_counts.items()
+        }
+        best = max(log_scores, key=log_scores.get)
+        normalizer = sum(math.exp(score - log_scores[best]) for score in log_scores.values())
+
+        return best, 1 / normalizer
+
+class IntentRouter:
+    """
+    Deterministic router consulted before the structured-output model call in the liaison and suggestion nodes.
+
+    Messages are routed by keyword and regular expression rules first, then by a naive Bayes classifier trained on the routes that the model
+    produced for earlier messages (logged to ROUTER_LOG_PATH). The classifier predicts which functions are asked for but not how often,
+    so it only routes messages that ask for nothing or for an analysis. Routes below ROUTER_CONFIDENCE (default 0.9) are left to the model.
+    """
+    def __init__(self):
+        self._classifier = IntentClassifier()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._stats = defaultdict[str, Counter[str]](Counter)
+
+    def _log_path(self) -> str:
+        return os.environ.get("ROUTER_LOG_PATH", "router_examples.jsonl")
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+
+            min_examples = int(os.environ.get("ROUTER_MIN_EXAMPLES", 50))
+            try:
+                with open(self._log_path()) as log:
+                    examples = [json.loads(line) for line in log if line.strip()]
+            except FileNotFoundError:
+                return
+            except (OSError, json.JSONDecodeError):
+                logger.exception("Could not load router examples from %s", self._log_path())
+                return
+
+            if len(examples) >= min_examples:
+                for example in examples:
+                    self._classifier.learn(example["text"], RouterSchema(**example["route"]))
+
+    def route(self, site: str, text: str, question: str | None = None) -> RouterSchema | None:
+        """Returns a route for text if one is known with enough confidence, otherwise None so that the caller asks the model."""
+        threshold = float(os.environ.get("ROUTER_CONFIDENCE", 0.9))
+        route = route_by_rules(text, question)
+
+        if (route is None or route.confidence < threshold) and question is None:
+            self._load()
+            with self._lock:
+                prediction = self._classifier.predict(text)
+            if prediction is not None and prediction[1] >= threshold:
+                label, probability = prediction
+                fields = [] if label == "none" else label.split("+")
+                # Labels only say which functions were asked for, so routes that need a count are left to the model
+                if UNCOUNTED_FIELDS.issuperset(fields):
+                    route = Route(RouterSchema(**{field: 1 for field in fields}), probability, "classifier")
+
+        source = route.source if route is not None and route.confidence >= threshold else "model"
+        with self._lock:
+            self._stats[site][source] += 1
+
+        return route.schema if source != "model" else None
+
+    def record(self, text: str, schema: RouterSchema):
+        """Logs a route produced by the model so that the classifier can learn it."""
+        if schema.followup:
+            return
+
+        try:
+            with open(self._log_path(), "a") as log:
+                log.write(json.dumps({"text": text, "route": schema.model_dump(exclude={"followup"})}) + "\n")
+        except OSError:
+            logger.exception("Could not log router example to %s", self._log_path())
+            return
+
+        with self._lock:
+            if self._loaded:
+                self._classifier.learn(text, schema)
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Returns per-node counts of messages routed by rules, classifier and model, and the share that skipped the model."""
+        with self._lock:
+            return {
+                site: {
+                    **counts,
+                    "hit_rate": 1 - counts["model"] / total if (total := sum(counts.values())) else 0.0,
+                } for site, counts in self._stats.items()
+            }
+
+intent_router = IntentRouter()
\ No newline at end of file
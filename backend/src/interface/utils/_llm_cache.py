@@ -0,0 +1,175 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.runnables.config import var_child_runnable_config
+
+WHITESPACE = re.compile(r"\s+")
+
+def llm_cache_settings() -> dict[str, Any]:
+    """
+    Response cache settings read from the environment:
+    - LLM_CACHE: "off" disables the cache entirely (default "on")
+    - LLM_CACHE_SIZE: responses kept in memory, least recently used first out (default 1024)
+    - LLM_CACHE_TTL: seconds a response stays valid in either tier (default 3600)
+    - LLM_CACHE_PATH: sqlite file for the on-disk tier shared by workers; empty keeps the cache in memory only (default "")
+    - LLM_CACHE_NODES: comma-separated graph nodes whose model calls are cached; only nodes that route or extract with a deterministic model belong here,
+      since replaying a free-form dialogue reply would repeat it word for word (default "liaison,suggestion_commit,extract")
+    - LLM_CACHE_EXCLUDE: comma-separated graph nodes whose model calls are never cached, even inside a cached node, e.g. "req_batch_maker" (default "")
+    """
+    return {
+        "enabled": os.environ.get("LLM_CACHE", "on") != "off",
+        "size": int(os.environ.get("LLM_CACHE_SIZE", 1024)),
+        "ttl": float(os.environ.get("LLM_CACHE_TTL", 3600)),
+        "path": os.environ.get("LLM_CACHE_PATH", ""),
+        "nodes": {node.strip() for node in os.environ.get("LLM_CACHE_NODES", "liaison,suggestion_commit,extract").split(",") if node.strip()},
+        "exclude": {node.strip() for node in os.environ.get("LLM_CACHE_EXCLUDE", "").split(",") if node.strip()},
+    }
+
+def normalize_message(message: dict) -> dict:
+    """Keeps the parts of a serialized message that the model sees; ids, timings and token counts differ between identical calls."""
+    kwargs = message.get("kwargs", {})
+    content = kwargs.get("content", "")
+
+    return {
+        "type": kwargs.get("type", message.get("id", [""])[-1]),
+        "content": WHITESPACE.sub(" ", content).strip() if isinstance(content, str) else content,
+        "name": kwargs.get("name"),
+        "tool_calls": [{"name": call["name"], "args": call["args"]} for call in kwargs.get("tool_calls", [])],
+    }
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Hashes the model parameters (including bound tools and output schema) with the normalized messages."""
+    try:
+        normalized = json.dumps([normalize_message(message) for message in json.loads(prompt)], sort_keys=True)
+    except (json.JSONDecodeError, AttributeError, KeyError, TypeError):
+        normalized = WHITESPACE.sub(" ", prompt)
+
+    return hashlib.blake2b(f"{llm_string}\x00{normalized}".encode(), digest_size=16).hexdigest()
+
+def current_nodes() -> set[str]:
+    """Names of the graph nodes (including enclosing subgraph nodes) that the current model call runs in."""
+    config = var_child_runnable_config.get() or {}
+    metadata = config.get("metadata", {})
+    nodes = {segment.split(":")[0] for segment in metadata.get("checkpoint_ns", "").split("|") if segment}
+
+    if "langgraph_node" in metadata:
+        nodes.add(metadata["langgraph_node"])
+    return nodes
+
+def copy_generations(generations: RETURN_VAL_TYPE) -> RETURN_VAL_TYPE:
+    """Deep copies of cached generations, so that callers never share or modify the stored messages."""
+    return [generation.model_copy(deep=True) for generation in generations]
+
+class ResponseCache(BaseCache):
+    """
+    Two-tier cache for chat model responses.
+
+    Lookups hit an in-memory LRU first and fall back to an optional sqlite tier, which survives restarts and is shared between workers.
+    Entries expire after LLM_CACHE_TTL seconds. Only calls made from nodes listed in LLM_CACHE_NODES, or with the run metadata
+    {"llm_cache": True}, use the cache; calls from nodes listed in LLM_CACHE_EXCLUDE, or with {"llm_cache": False}, bypass it in both directions.
+    Every lookup returns copies of the stored generations, since the caller annotates the messages it receives.
+    """
+    def __init__(self):
+        settings = llm_cache_settings()
+        self.enabled = settings["enabled"]
+        self.size = settings["size"]
+        self.ttl = settings["ttl"]
+        self.nodes = settings["nodes"]
+        self.exclude = settings["exclude"]
+
+        self._entries = OrderedDict[str, tuple[float, RETURN_VAL_TYPE]]()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+        self._updates = 0
+
+        self._disk = None
+        if settings["path"]:
+            self._disk = sqlite3.connect(settings["path"], check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, expires REAL NOT NULL, value TEXT NOT NULL)")
+
+    def _bypassed(self) -> bool:
+        if not self.enabled:
+            return True
+
+        config = var_child_runnable_config.get() or {}
+        opted = config.get("metadata", {}).get("llm_cache")
+        if opted is not None:
+            return not opted
+
+        nodes = current_nodes()
+        return not self.nodes & nodes or bool(self.exclude & nodes)
+
+    def _remember(self, key: str, expires: float, value: RETURN_VAL_TYPE):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        if self._bypassed():
+            with self._lock:
+                self._stats["bypassed"] += 1
+            return None
+
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy_generations(entry[1])
+            self._entries.pop(key, None)
+
+            if self._disk is not None:
+                row = self._disk.execute("SELECT expires, value FROM llm_cache WHERE key = ? AND expires > ?", (key, now)).fetchone()
+                if row is not None:
+                    value = loads(row[1], allowed_objects=[ChatGeneration, AIMessage])
+                    self._remember(key, row[0], value)
+                    self._stats["disk_hits"] += 1
+                    return copy_generations(value)
+
+            self._stats["misses"] += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        if self._bypassed():
+            return
+
+        key = cache_key(prompt, llm_string)
+        expires = time.time() + self.ttl
+
+        with self._lock:
+            self._remember(key, expires, copy_generations(return_val))
+            if self._disk is not None:
+                self._disk.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)", (key, expires, dumps(return_val)))
+                self._updates += 1
+                if self._updates % self.size == 0:
+                    self._disk.execute("DELETE FROM llm_cache WHERE expires <= ?", (time.time(),))
+
+    def clear(self, **kwargs: Any):
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+            }
\ No newline at end of file
@@ -0,0 +1,254 @@
+from typing import NamedTuple
+from interface.utils._db_utils import get_cursor
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    statements: tuple[str, ...]
+
+# Arbitrary key for the advisory lock that serializes concurrent migrators (e.g. several workers starting at once)
+MIGRATION_LOCK_KEY = 7_402_915
+# Arbitrary key for the transaction-level advisory lock that every write to a timeline row took before migration 7
+TIMELINE_LOCK_KEY = 7_402_916
+
+def require_unique(table: str, column: str, description: str) -> str:
+    """
+    Statement that aborts the migration with the duplicated values if column is not unique in table,
+    since rows that users tell apart by that column cannot be merged automatically.
+    """
+    return f"""
+        DO $$
+        DECLARE
+            duplicates TEXT;
+        BEGIN
+            SELECT string_agg(quote_literal({column}), ', ' ORDER BY {column}) INTO duplicates
+            FROM (SELECT {column} FROM public.{table} GROUP BY {column} HAVING COUNT(*) > 1) AS duplicated;
+
+            IF duplicates IS NOT NULL THEN
+                RAISE EXCEPTION 'Cannot make {description} unique, these are used more than once: %', duplicates
+                    USING HINT = 'Rename or remove the duplicate rows in public.{table}, then restart the application.';
+            END IF;
+        END
+        $$
+        """
+
+MIGRATIONS = (
+    Migration(1, "Create base tables", (
+        """
+        CREATE TABLE IF NOT EXISTS public.projects (
+            project_id SERIAL PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            description VARCHAR
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.requirements (
+            requirement_id SERIAL PRIMARY KEY,
+            project_id INTEGER NOT NULL REFERENCES public.projects(project_id) ON DELETE CASCADE,
+            description VARCHAR NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.tasks (
+            task_id SERIAL PRIMARY KEY,
+            project_id INTEGER REFERENCES public.projects(project_id) ON DELETE CASCADE,
+            name VARCHAR NOT NULL,
+            description VARCHAR,
+            start DATE NOT NULL DEFAULT CURRENT_DATE,
+            "end" DATE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.task_dependencies (
+            task_id INTEGER NOT NULL REFERENCES public.tasks(task_id) ON DELETE CASCADE,
+            dependent_id INTEGER NOT NULL REFERENCES public.tasks(task_id) ON DELETE CASCADE,
+            description VARCHAR
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.resources (
+            resource_id SERIAL PRIMARY KEY,
+            first_name VARCHAR NOT NULL,
+            last_name VARCHAR,
+            contact VARCHAR NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS public.resource_assignments (
+            task_id INTEGER NOT NULL REFERENCES public.tasks(task_id) ON DELETE CASCADE,
+            resource_id INTEGER NOT NULL REFERENCES public.resources(resource_id) ON DELETE CASCADE
+        )
+        """,
+    )),
+    Migration(2, "Index name-keyed lookups", (
+        require_unique("projects", "name", "project names"),
+        require_unique("tasks", "name", "task names"),
+        require_unique("resources", "contact", "resource contacts"),
+        # Repeated links between the same two rows carry no information, so all but one are dropped
+        """
+        DELETE FROM public.resource_assignments AS duplicate
+        USING public.resource_assignments AS kept
+        WHERE duplicate.task_id = kept.task_id and duplicate.resource_id = kept.resource_id and duplicate.ctid > kept.ctid
+        """,
+        """
+        DELETE FROM public.task_dependencies AS duplicate
+        USING public.task_dependencies AS kept
+        WHERE duplicate.task_id = kept.task_id and duplicate.dependent_id = kept.dependent_id and duplicate.ctid > kept.ctid
+        """,
+        # Entities are resolved by name (or contact) everywhere, and duplicates are rejected with ON CONFLICT
+        "CREATE UNIQUE INDEX IF NOT EXISTS projects_name_key ON public.projects(name)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS tasks_name_key ON public.tasks(name)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS resources_contact_key ON public.resources(contact)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS resource_assignments_task_resource_key ON public.resource_assignments(task_id, resource_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS task_dependencies_task_dependent_key ON public.task_dependencies(task_id, dependent_id)",
+        # Reverse directions of the join tables (assignments by resource, dependencies by dependent task)
+        "CREATE INDEX IF NOT EXISTS resource_assignments_resource_id_idx ON public.resource_assignments(resource_id)",
+        "CREATE INDEX IF NOT EXISTS task_dependencies_dependent_id_idx ON public.task_dependencies(dependent_id)",
+        # Per-project listings in the analyst and the timeline ordering in GET /chat
+        "CREATE INDEX IF NOT EXISTS tasks_project_id_idx ON public.tasks(project_id)",
+        "CREATE INDEX IF NOT EXISTS tasks_end_idx ON public.tasks(\"end\")",
+        "CREATE INDEX IF NOT EXISTS requirements_project_id_idx ON public.requirements(project_id)",
+        # Resource lookup by first and last name when assigning
+        "CREATE INDEX IF NOT EXISTS resources_first_last_name_idx ON public.resources(first_name, last_name)",
+    )),
+    Migration(3, "Track entity versions for in-process name caches", (
+        """
+        CREATE TABLE IF NOT EXISTS public.entity_versions (
+            entity VARCHAR PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT INTO public.entity_versions(entity) VALUES('projects'), ('tasks'), ('resources') ON CONFLICT DO NOTHING",
+        """
+        CREATE OR REPLACE FUNCTION public.bump_entity_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE public.entity_versions SET version = version + 1 WHERE entity = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        # One bump per affected row, so a process that wrote n rows can account for its own writes
+        "DROP TRIGGER IF EXISTS projects_bump_version ON public.projects",
+        "CREATE TRIGGER projects_bump_version AFTER INSERT OR DELETE OR UPDATE OF name ON public.projects FOR EACH ROW EXECUTE FUNCTION public.bump_entity_version()",
+        "DROP TRIGGER IF EXISTS tasks_bump_version ON public.tasks",
+        "CREATE TRIGGER tasks_bump_version AFTER INSERT OR DELETE OR UPDATE OF name ON public.tasks FOR EACH ROW EXECUTE FUNCTION public.bump_entity_version()",
+        "DROP TRIGGER IF EXISTS resources_bump_version ON public.resources",
+        "CREATE TRIGGER resources_bump_version AFTER INSERT OR DELETE OR UPDATE OF contact ON public.resources FOR EACH ROW EXECUTE FUNCTION public.bump_entity_version()",
+    )),
+    Migration(4, "Version timeline rows for incremental GET /chat", (
+        "CREATE SEQUENCE IF NOT EXISTS public.timeline_version_seq",
+        # Writers of timeline rows are serialized until commit, so versions become visible in increasing order and no client skips one (until migration 7)
+        f"""
+        CREATE OR REPLACE FUNCTION public.next_timeline_version() RETURNS BIGINT AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock({TIMELINE_LOCK_KEY});
+            RETURN nextval('public.timeline_version_seq');
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "ALTER TABLE public.tasks ADD COLUMN IF NOT EXISTS timeline_version BIGINT NOT NULL DEFAULT public.next_timeline_version()",
+        "CREATE INDEX IF NOT EXISTS tasks_timeline_version_idx ON public.tasks(timeline_version)",
+        # Names that left the timeline (deleted or renamed tasks), so that delta responses can tell clients to drop them
+        """
+        CREATE TABLE IF NOT EXISTS public.timeline_removals (
+            name VARCHAR PRIMARY KEY,
+            timeline_version BIGINT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS timeline_removals_timeline_version_idx ON public.timeline_removals(timeline_version)",
+        """
+        CREATE OR REPLACE FUNCTION public.bump_task_timeline_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.timeline_version := public.next_timeline_version();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION public.record_timeline_removal() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO public.timeline_removals(name, timeline_version)
+            VALUES(OLD.name, public.next_timeline_version())
+            ON CONFLICT (name) DO UPDATE SET timeline_version = EXCLUDED.timeline_version;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION public.bump_project_timeline_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE public.tasks SET timeline_version = public.next_timeline_version() WHERE project_id = NEW.project_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS tasks_bump_timeline_version ON public.tasks",
+        "CREATE TRIGGER tasks_bump_timeline_version BEFORE UPDATE OF project_id, name, description, start, \"end\" ON public.tasks FOR EACH ROW EXECUTE FUNCTION public.bump_task_timeline_version()",
+        "DROP TRIGGER IF EXISTS tasks_record_timeline_removal ON public.tasks",
+        "CREATE TRIGGER tasks_record_timeline_removal AFTER DELETE ON public.tasks FOR EACH ROW EXECUTE FUNCTION public.record_timeline_removal()",
+        "DROP TRIGGER IF EXISTS tasks_record_timeline_rename ON public.tasks",
+        "CREATE TRIGGER tasks_record_timeline_rename AFTER UPDATE OF name ON public.tasks FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION public.record_timeline_removal()",
+        # Timeline rows show their project's name
+        "DROP TRIGGER IF EXISTS projects_bump_timeline_version ON public.projects",
+        "CREATE TRIGGER projects_bump_timeline_version AFTER UPDATE OF name ON public.projects FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) EXECUTE FUNCTION public.bump_project_timeline_version()",
+    )),
+    Migration(5, "Track task dependency versions for the in-process cycle index", (
+        "INSERT INTO public.entity_versions(entity) VALUES('task_dependencies') ON CONFLICT DO NOTHING",
+        "DROP TRIGGER IF EXISTS task_dependencies_bump_version ON public.task_dependencies",
+        "CREATE TRIGGER task_dependencies_bump_version AFTER INSERT OR DELETE OR UPDATE OF task_id, dependent_id ON public.task_dependencies FOR EACH ROW EXECUTE FUNCTION public.bump_entity_version()",
+    )),
+    Migration(6, "Track resource assignment versions for the in-process resource calendar", (
+        "INSERT INTO public.entity_versions(entity) VALUES('resource_assignments') ON CONFLICT DO NOTHING",
+        "DROP TRIGGER IF EXISTS resource_assignments_bump_version ON public.resource_assignments",
+        "CREATE TRIGGER resource_assignments_bump_version AFTER INSERT OR DELETE OR UPDATE OF task_id, resource_id ON public.resource_assignments FOR EACH ROW EXECUTE FUNCTION public.bump_entity_version()",
+    )),
+    Migration(7, "Draw timeline versions without serializing task writers", (
+        # Versions may now commit out of order; the transaction id taken first lets readers wait for every writer that could
+        # still commit a lower version (see TimelineCache), instead of every task write waiting for a global lock
+        """
+        CREATE OR REPLACE FUNCTION public.next_timeline_version() RETURNS BIGINT AS $$
+        BEGIN
+            PERFORM pg_current_xact_id();
+            RETURN nextval('public.timeline_version_seq');
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )),
+)
+
+def migrate() -> list[int]:
+    """
+    Applies every migration that has not yet been recorded in public.schema_migrations, in version order.
+
+    All pending migrations run in one transaction under an advisory lock, so it is safe to call from every process at startup.
+    Returns the versions that were applied.
+    """
+    applied = list[int]()
+
+    with get_cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS public.schema_migrations (
+                version INTEGER PRIMARY KEY,
+                description VARCHAR NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+        cur.execute("SELECT version FROM public.schema_migrations")
+        current_versions = {version for version, in cur.fetchall()}
+
+        for migration in sorted(MIGRATIONS):
+            if migration.version in current_versions:
+                continue
+
+            for statement in migration.statements:
+                cur.execute(statement)
+            cur.execute(
+                "INSERT INTO public.schema_migrations(version, description) VALUES(%s, %s)",
+                (migration.version, migration.description),
+            )
+            applied.append(migration.version)
+
+    return applied
\ No newline at end of file
@@ -0,0 +1,123 @@
+import os
+import time
+import threading
+from interface.utils._db_utils import select
+from interface.utils._async_db_utils import aselect
+from interface.utils._name_index import NameIndex
+
+# Cached entity -> (table, column); the table name is also the entity_versions key bumped by its trigger
+CACHED_ENTITIES = {
+    "projects": ("projects", "name"),
+    "tasks": ("tasks", "name"),
+    "contacts": ("resources", "contact"),
+}
+
+class NameCache:
+    """
+    Write-through, in-process cache of the names that identify projects, tasks and resources.
+
+    Each entity set is loaded once, then kept current by the commit nodes through add.
+    Writes made by other processes are detected through the per-table counters in public.entity_versions,
+    which are checked at most once every NAME_CACHE_CHECK_INTERVAL seconds (default 1).
+    """
+    def __init__(self):
+        self._names = dict[str, NameIndex]()
+        self._versions = dict[str, int]()
+        self._checked_at = dict[str, float]()
+        self._lock = threading.Lock()
+
+    def _is_stale(self, entity: str) -> bool:
+        if entity not in CACHED_ENTITIES:
+            raise KeyError(f"Unknown cached entity {entity}")
+
+        check_interval = float(os.environ.get("NAME_CACHE_CHECK_INTERVAL", 1.0))
+        return entity not in self._names or time.monotonic() - self._checked_at[entity] >= check_interval
+
+    def _version_query(self, entity: str) -> str:
+        table, _ = CACHED_ENTITIES[entity]
+        return f"SELECT version FROM public.entity_versions WHERE entity = '{table}'"
+
+    def _load_query(self, entity: str) -> str:
+        table, column = CACHED_ENTITIES[entity]
+        return f"""
+            SELECT
+                (SELECT version FROM public.entity_versions WHERE entity = '{table}'),
+                ARRAY(SELECT {column} FROM public.{table})
+            """
+
+    def _store(self, entity: str, version: int, names: list[str]):
+        with self._lock:
+            self._names[entity] = NameIndex(names)
+            self._versions[entity] = version
+            self._checked_at[entity] = time.monotonic()
+
+    def _is_current(self, entity: str, result: list[tuple[int]]) -> bool:
+        with self._lock:
+            if result and result[0][0] == self._versions.get(entity):
+                self._checked_at[entity] = time.monotonic()
+                return True
+            return False
+
+    def refresh(self, entity: str):
+        """Reloads the entity's names if another process has written to its table since they were loaded."""
+        if not self._is_stale(entity):
+            return
+        if entity in self._names and self._is_current(entity, select(self._version_query(entity))):
+            return
+
+        for version, names in select(self._load_query(entity)):
+            self._store(entity, version, names)
+
+    async def arefresh(self, entity: str):
+        """Awaitable version of refresh."""
+        if not self._is_stale(entity):
+            return
+        if entity in self._names and self._is_current(entity, await aselect(self._version_query(entity))):
+            return
+
+        for version, names in await aselect(self._load_query(entity)):
+            self._store(entity, version, names)
+
+    def contains(self, entity: str, name: str) -> bool:
+        self.refresh(entity)
+        return name in self._names.get(entity, ())
+
+    async def acontains(self, entity: str, name: str) -> bool:
+        await self.arefresh(entity)
+        return name in self._names.get(entity, ())
+
+    def list_names(self, entity: str) -> list[str]:
+        self.refresh(entity)
+        return sorted(self._names.get(entity, ()))
+
+    async def alist_names(self, entity: str) -> list[str]:
+        await self.arefresh(entity)
+        return sorted(self._names.get(entity, ()))
+
+    def invalid(self, entity: str, vals: list[str]) -> dict[str, list[str]]:
+        """Maps every value that is not an existing name to the closest existing names."""
+        self.refresh(entity)
+        return self._names.get(entity, NameIndex()).invalid(vals)
+
+    async def ainvalid(self, entity: str, vals: list[str]) -> dict[str, list[str]]:
+        await self.arefresh(entity)
+        return self._names.get(entity, NameIndex()).invalid(vals)
+
+    def version(self, entity: str) -> int | None:
+        """Version of the entity's names as last loaded or written, for use in cache validators."""
+        return self._versions.get(entity)
+
+    def add(self, entity: str, *names: str):
+        """Records names just inserted by this process. Each inserted row bumps the table's version by one."""
+        with self._lock:
+            if entity in self._names:
+                self._names[entity].update(names)
+                self._versions[entity] += len(names)
+
+    def invalidate(self, entity: str | None = None):
+        """Forces the entity (or every entity) to be reloaded on next use."""
+        with self._lock:
+            for key in [entity] if entity else list(self._names):
+                self._names.pop(key, None)
+
+entity_names = NameCache()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import os
+import heapq
+from collections import Counter, defaultdict
+from typing import Iterable, Iterator
+
+# Minimum trigram similarity (Jaccard) for a name to be offered as a suggestion
+MIN_SIMILARITY = 0.2
+
+def suggestion_count() -> int:
+    """Number of closest names offered for each invalid value, read from NAME_SUGGESTIONS (default 3)."""
+    return int(os.environ.get("NAME_SUGGESTIONS", 3))
+
+def trigrams(name: str) -> set[str]:
+    """Case-insensitive character trigrams of name, padded so that short names and word boundaries still produce grams."""
+    padded = f"  {" ".join(name.lower().split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameIndex:
+    """
+    Hashed set of names with a trigram inverted index.
+
+    Membership is O(1). Suggestions for a missing name only score the names that share at least one trigram with it,
+    rather than comparing against every name.
+    """
+    def __init__(self, names: Iterable[str] = ()):
+        self._names = set[str]()
+        self._gram_counts = dict[str, int]()
+        self._postings = defaultdict[str, set[str]](set)
+        self.update(names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def update(self, names: Iterable[str]):
+        for name in names:
+            if name in self._names:
+                continue
+
+            grams = trigrams(name)
+            self._names.add(name)
+            self._gram_counts[name] = len(grams)
+            for gram in grams:
+                self._postings[gram].add(name)
+
+    def suggest(self, name: str, k: int | None = None) -> list[str]:
+        """Returns up to k existing names most similar to name, best match first."""
+        grams = trigrams(name)
+        shared = Counter[str]()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        scored = (
+            (count / (len(grams) + self._gram_counts[candidate] - count), candidate)
+            for candidate, count in shared.items()
+        )
+        best = heapq.nsmallest(
+            suggestion_count() if k is None else k,
+            ((-score, candidate) for score, candidate in scored if score >= MIN_SIMILARITY),
+        )
+
+        return [candidate for _, candidate in best]
+
+    def invalid(self, vals: Iterable[str], k: int | None = None) -> dict[str, list[str]]:
+        """Maps every value in vals that is not in the index to its closest existing names, in order of first appearance."""
+        return {val: self.suggest(val, k) for val in dict.fromkeys(vals) if val not in self._names}
+
+def find_invalid_values(vals: Iterable[str], existing_vals: Iterable[str], k: int | None = None) -> dict[str, list[str]]:
+    """
+    Maps every value in vals that is not present in existing_vals to its closest existing values.
+    The trigram index is only built when some value is missing.
+    """
+    vals = list(dict.fromkeys(vals))
+    existing = set(existing_vals)
+
+    if all(val in existing for val in vals):
+        return {}
+
+    return NameIndex(existing).invalid(vals, k)
+
+def describe_invalid_values(entity: str, invalid: dict[str, list[str]]) -> str:
+    """Formats invalid values and their suggestions for an error message returned to the model."""
+    return "; ".join(
+        f"{val} (closest existing {entity}: {", ".join(suggestions)})" if suggestions else f"{val} (no similar {entity} exist)"
+        for val, suggestions in invalid.items()
+    )
\ No newline at end of file
@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, NamedTuple
+from interface.utils._db_utils import select
+from interface.utils._async_db_utils import aselect
+
+# The project row with its tasks, requirements, dependencies and resource assignments, aggregated into one row.
+# Dates are serialized by json_agg as ISO strings.
+PROJECT_SNAPSHOT_QUERY = """
+    SELECT
+        projects.project_id,
+        projects.description,
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'name', tasks.name,
+                'description', tasks.description,
+                'start', tasks.start,
+                'end', tasks.\"end\"
+            ) ORDER BY tasks.task_id)
+            FROM public.tasks
+            WHERE tasks.project_id = projects.project_id
+        ), '[]'),
+        COALESCE((
+            SELECT json_agg(requirements.description ORDER BY requirements.requirement_id)
+            FROM public.requirements
+            WHERE requirements.project_id = projects.project_id
+        ), '[]'),
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'task', itasks.name,
+                'dependent', dtasks.name,
+                'description', task_dependencies.description
+            ))
+            FROM public.task_dependencies
+            JOIN public.tasks AS itasks
+                ON itasks.task_id = task_dependencies.task_id
+            JOIN public.tasks AS dtasks
+                ON dtasks.task_id = task_dependencies.dependent_id
+            WHERE itasks.project_id = projects.project_id AND dtasks.project_id = projects.project_id
+        ), '[]'),
+        COALESCE((
+            SELECT json_agg(json_build_object(
+                'task', tasks.name,
+                'first_name', resources.first_name,
+                'last_name', resources.last_name,
+                'contact', resources.contact
+            ))
+            FROM public.resource_assignments
+            JOIN public.tasks
+                ON tasks.task_id = resource_assignments.task_id
+            JOIN public.resources
+                ON resources.resource_id = resource_assignments.resource_id
+            WHERE tasks.project_id = projects.project_id
+        ), '[]')
+    FROM public.projects
+    WHERE projects.name = !p1
+    """
+
+class ProjectSnapshot(NamedTuple):
+    """Everything the analyst reads about one project, as loaded by a single query."""
+    project_id: int
+    name: str
+    description: str | None
+    tasks: list[dict[str, Any]]
+    requirements: list[str]
+    dependencies: list[dict[str, Any]]
+    assignments: list[dict[str, Any]]
+    loaded_at: float
+
+    def task_names(self) -> list[str]:
+        return [task["name"] for task in self.tasks]
+
+    def tasks_by_name(self) -> dict[str, dict[str, Any]]:
+        return {task["name"]: task for task in self.tasks}
+
+    def resources(self) -> list[tuple[str, str | None, str]]:
+        """Distinct resources assigned to the project's tasks."""
+        return list(dict.fromkeys((re["first_name"], re["last_name"], re["contact"]) for re in self.assignments))
+
+def build_snapshot(project_name: str, rows: list[tuple]) -> ProjectSnapshot | None:
+    for project_id, description, tasks, requirements, dependencies, assignments in rows:
+        return ProjectSnapshot(project_id, project_name, description, tasks, requirements, dependencies, assignments, time.monotonic())
+    return None
+
+class ProjectSnapshots:
+    """
+    Per-thread project snapshots read by the analyst tools, so that one conversation turn costs one query however many tools it calls.
+
+    The commit nodes invalidate the snapshots of every project they write to. Writes made by other processes are picked up
+    once a snapshot is older than PROJECT_SNAPSHOT_TTL seconds (default 30).
+    """
+    def __init__(self, size: int = 256):
+        self._snapshots = OrderedDict[str, ProjectSnapshot]()
+        self._size = size
+        self._lock = threading.Lock()
+
+    def _cached(self, thread_id: str, project_name: str) -> ProjectSnapshot | None:
+        ttl = float(os.environ.get("PROJECT_SNAPSHOT_TTL", 30))
+
+        with self._lock:
+            snapshot = self._snapshots.get(thread_id)
+            if snapshot is None or snapshot.name != project_name or time.monotonic() - snapshot.loaded_at >= ttl:
+                return None
+
+            self._snapshots.move_to_end(thread_id)
+            return snapshot
+
+    def _store(self, thread_id: str, snapshot: ProjectSnapshot | None) -> ProjectSnapshot | None:
+        if snapshot is not None:
+            with self._lock:
+                self._snapshots[thread_id] = snapshot
+                self._snapshots.move_to_end(thread_id)
+                while len(self._snapshots) > self._size:
+                    self._snapshots.popitem(last=False)
+
+        return snapshot
+
+    def get(self, thread_id: str, project_name: str) -> ProjectSnapshot | None:
+        """Returns the thread's snapshot of the project, loading it if needed. Returns None if the project does not exist."""
+        if (snapshot := self._cached(thread_id, project_name)) is not None:
+            return snapshot
+
+        return self._store(thread_id, build_snapshot(project_name, select(PROJECT_SNAPSHOT_QUERY, project_name)))
+
+    async def aget(self, thread_id: str, project_name: str) -> ProjectSnapshot | None:
+        """Awaitable version of get."""
+        if (snapshot := self._cached(thread_id, project_name)) is not None:
+            return snapshot
+
+        return self._store(thread_id, build_snapshot(project_name, await aselect(PROJECT_SNAPSHOT_QUERY, project_name)))
+
+    def invalidate(self, project_name: str | None = None, task_names: Iterable[str] = ()):
+        """Drops the snapshots of the named project and of every project that contains one of the named tasks."""
+        task_names = set(task_names)
+
+        with self._lock:
+            for thread_id, snapshot in list(self._snapshots.items()):
+                if snapshot.name == project_name or not task_names.isdisjoint(snapshot.task_names()):
+                    del self._snapshots[thread_id]
+
+project_snapshots = ProjectSnapshots()
\ No newline at end of file
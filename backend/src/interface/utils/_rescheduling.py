@@ -0,0 +1,91 @@
+from datetime import date
+from interface.utils._db_utils import get_cursor, run_statement
+from interface.utils._async_db_utils import get_async_pool, arun_statement
+from interface.utils._schedule import ScheduleGraph, Shift
+from interface.utils._timeline_cache import timeline_cache
+from interface.utils._project_snapshot import project_snapshots
+from interface.utils._resource_calendar import resource_calendar
+
+class TaskNotFoundError(ValueError):
+    """Raised when the task to shift does not exist."""
+
+# The task and everything downstream of it, locked until the shifts are written
+DOWNSTREAM_TASKS_QUERY = """
+    WITH RECURSIVE downstream(task_id) AS (
+        SELECT task_id FROM public.tasks WHERE name = !p1
+        UNION
+        SELECT task_dependencies.dependent_id
+        FROM public.task_dependencies
+        JOIN downstream
+            ON downstream.task_id = task_dependencies.task_id
+    )
+    SELECT
+        tasks.task_id,
+        tasks.name,
+        tasks.start,
+        tasks.\"end\",
+        ARRAY(SELECT dependent_id FROM public.task_dependencies WHERE task_dependencies.task_id = tasks.task_id)
+    FROM public.tasks
+    JOIN downstream
+        ON downstream.task_id = tasks.task_id
+    FOR UPDATE OF tasks
+    """
+
+SHIFT_TASKS_QUERY = """
+    UPDATE public.tasks
+    SET start = shifts.start, \"end\" = shifts.\"end\"
+    FROM unnest(ARRAY[!p1]::integer[], ARRAY[!p2]::date[], ARRAY[!p3]::date[]) AS shifts(task_id, start, \"end\")
+    WHERE tasks.task_id = shifts.task_id
+    """
+
+def plan_shifts(task_name: str, new_end: date, rows: list[tuple[int, str, date, date | None, list[int]]]) -> tuple[list[Shift], tuple[list[int], list[str], list[str | None]]]:
+    """Propagates the new end through the downstream tasks and returns the shifts with the arguments of SHIFT_TASKS_QUERY."""
+    if not rows:
+        raise TaskNotFoundError(f"Task {task_name} does not exist")
+
+    names = {task_id: name for task_id, name, *_ in rows}
+    graph = ScheduleGraph(
+        ((name, start, end) for _, name, start, end, _ in rows),
+        ((name, names[dependent]) for _, name, _, _, dependents in rows for dependent in dependents if dependent in names),
+    )
+    shifts = graph.slip(task_name, new_end)
+    ids = {name: task_id for task_id, name in names.items()}
+
+    return shifts, (
+        [ids[shift.name] for shift in shifts],
+        [shift.new_start.isoformat() for shift in shifts],
+        [shift.new_end.isoformat() if shift.new_end else None for shift in shifts],
+    )
+
+def shifts_applied(shifts: list[Shift]) -> list[Shift]:
+    timeline_cache.touch()
+    project_snapshots.invalidate(task_names=[shift.name for shift in shifts])
+    resource_calendar.invalidate()
+    return shifts
+
+def shift_task_end(task_name: str, new_end: date) -> list[Shift]:
+    """
+    Moves the end of the named task to new_end and pushes back its downstream tasks by the least amount that keeps every
+    dependent from starting before its prerequisites end, all in one transaction with one UPDATE.
+    Returns the changed tasks in topological order, the named task first.
+    Raises TaskNotFoundError if the task does not exist and ValueError if the new end is before its start or its dependencies form a cycle;
+    database errors, including an unavailable pool, propagate so that nothing reports an empty shift as success.
+    """
+    with get_cursor() as cur:
+        run_statement(cur, DOWNSTREAM_TASKS_QUERY, task_name)
+        shifts, args = plan_shifts(task_name, new_end, cur.fetchall())
+        run_statement(cur, SHIFT_TASKS_QUERY, *args)
+
+    return shifts_applied(shifts)
+
+async def ashift_task_end(task_name: str, new_end: date) -> list[Shift]:
+    """Awaitable version of shift_task_end."""
+    pool = await get_async_pool()
+
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            await arun_statement(cur, DOWNSTREAM_TASKS_QUERY, task_name)
+            shifts, args = plan_shifts(task_name, new_end, await cur.fetchall())
+            await arun_statement(cur, SHIFT_TASKS_QUERY, *args)
+
+    return shifts_applied(shifts)
\ No newline at end of file
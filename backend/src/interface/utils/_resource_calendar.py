@@ -0,0 +1,236 @@
+import os
+import time
+import threading
+from bisect import bisect_right
+from datetime import date
+from typing import NamedTuple
+from interface.utils._db_utils import select
+from interface.utils._async_db_utils import aselect
+
+# Assignments are versioned by their own counter; task dates by the timeline sequence, which every task write advances
+RESOURCE_CALENDAR_VERSION_QUERY = """
+    SELECT
+        (SELECT version FROM public.entity_versions WHERE entity = 'resource_assignments'),
+        (SELECT last_value FROM public.timeline_version_seq)
+    """
+
+RESOURCE_CALENDAR_LOAD_QUERY = f"""
+    WITH versions AS ({RESOURCE_CALENDAR_VERSION_QUERY})
+    SELECT
+        versions.*,
+        bookings.contact,
+        bookings.name,
+        bookings.start,
+        bookings.finish
+    FROM versions
+    LEFT JOIN (
+        SELECT resources.contact, tasks.name, tasks.start, COALESCE(tasks.\"end\", tasks.start) AS finish
+        FROM public.resource_assignments
+        JOIN public.tasks
+            ON tasks.task_id = resource_assignments.task_id
+        JOIN public.resources
+            ON resources.resource_id = resource_assignments.resource_id
+    ) AS bookings
+        ON true
+    """
+
+# Per resource of the project: the days in the project's span on which it is booked at all and on more than one task at once,
+# computed with one sweep over the days on which its number of concurrent bookings changes. Bookings in other projects count too.
+RESOURCE_UTILIZATION_QUERY = """
+    WITH span AS (
+        SELECT projects.project_id, MIN(tasks.start) AS first_day, MAX(COALESCE(tasks.\"end\", tasks.start)) + 1 AS last_day
+        FROM public.projects
+        JOIN public.tasks
+            ON tasks.project_id = projects.project_id
+        WHERE projects.name = !p1
+        GROUP BY projects.project_id
+    ), members AS (
+        SELECT DISTINCT resource_assignments.resource_id
+        FROM span
+        JOIN public.tasks
+            ON tasks.project_id = span.project_id
+        JOIN public.resource_assignments
+            ON resource_assignments.task_id = tasks.task_id
+    ), bookings AS (
+        -- Half-open [start, stop) day ranges, clipped to the project's span
+        SELECT
+            members.resource_id,
+            tasks.name,
+            GREATEST(tasks.start, span.first_day) AS start,
+            LEAST(COALESCE(tasks.\"end\", tasks.start) + 1, span.last_day) AS stop
+        FROM members
+        JOIN public.resource_assignments
+            ON resource_assignments.resource_id = members.resource_id
+        JOIN public.tasks
+            ON tasks.task_id = resource_assignments.task_id
+        CROSS JOIN span
+        WHERE tasks.start < span.last_day and COALESCE(tasks.\"end\", tasks.start) + 1 > span.first_day
+    ), changes AS (
+        SELECT resource_id, changed_on, SUM(delta)::integer AS delta
+        FROM (
+            SELECT resource_id, start AS changed_on, 1 AS delta FROM bookings
+            UNION ALL
+            SELECT resource_id, stop, -1 FROM bookings
+        ) AS events
+        GROUP BY resource_id, changed_on
+    ), loads AS (
+        SELECT resource_id, SUM(delta) OVER days AS load, LEAD(changed_on) OVER days - changed_on AS length
+        FROM changes
+        WINDOW days AS (PARTITION BY resource_id ORDER BY changed_on)
+    ), overlaps AS (
+        SELECT
+            earlier.resource_id,
+            json_agg(json_build_array(
+                earlier.name,
+                later.name,
+                GREATEST(earlier.start, later.start),
+                LEAST(earlier.stop, later.stop) - 1
+            ) ORDER BY GREATEST(earlier.start, later.start), earlier.name, later.name) AS pairs
+        FROM bookings AS earlier
+        JOIN bookings AS later
+            ON later.resource_id = earlier.resource_id
+            and later.name > earlier.name
+            and later.start < earlier.stop
+            and earlier.start < later.stop
+        GROUP BY earlier.resource_id
+    ), usage AS (
+        SELECT
+            resource_id,
+            SUM(length) FILTER (WHERE load > 0) AS booked,
+            SUM(length) FILTER (WHERE load > 1) AS overbooked,
+            MAX(load) AS peak
+        FROM loads
+        GROUP BY resource_id
+    )
+    SELECT
+        resources.first_name,
+        resources.last_name,
+        resources.contact,
+        COALESCE(usage.booked, 0),
+        COALESCE(usage.overbooked, 0),
+        COALESCE(usage.peak, 0),
+        (SELECT last_day - first_day FROM span),
+        COALESCE(overlaps.pairs, '[]')
+    FROM members
+    JOIN public.resources
+        ON resources.resource_id = members.resource_id
+    LEFT JOIN usage
+        ON usage.resource_id = members.resource_id
+    LEFT JOIN overlaps
+        ON overlaps.resource_id = members.resource_id
+    ORDER BY 5 DESC, 4 DESC, resources.contact
+    """
+
+class Booking(NamedTuple):
+    task: str
+    start: date
+    end: date
+
+class ResourceBookings:
+    """
+    Bookings of one resource sorted by start day, with the latest end day of each prefix.
+
+    The bookings that overlap a day range all start before its end, so they lie before the bisection point of that end;
+    walking back from there stops at the first prefix whose latest end is before the range, never scanning older bookings.
+    """
+    def __init__(self, bookings: list[Booking]):
+        self.bookings = sorted(bookings, key=lambda booking: booking.start)
+        self.starts = [booking.start for booking in self.bookings]
+        self.reach = list[date]()
+        for booking in self.bookings:
+            self.reach.append(max(self.reach[-1], booking.end) if self.reach else booking.end)
+
+    def overlapping(self, start: date, end: date) -> list[Booking]:
+        overlapping = list[Booking]()
+
+        i = bisect_right(self.starts, end) - 1
+        while i >= 0 and self.reach[i] >= start:
+            if self.bookings[i].end >= start:
+                overlapping.append(self.bookings[i])
+            i -= 1
+
+        return overlapping[::-1]
+
+class ResourceCalendar:
+    """
+    Interval index of the tasks every resource is assigned to, keyed by resource contact, used to tell whether a resource
+    is free for the days of a task before assigning it. Tasks without an end date book their start day only.
+
+    The index is loaded in one query. It is reloaded once other processes have assigned resources or changed tasks, detected through
+    the resource_assignments counter in public.entity_versions and the timeline sequence, checked at most once every
+    NAME_CACHE_CHECK_INTERVAL seconds (default 1), and after invalidate is called for writes made by this process.
+    """
+    def __init__(self):
+        self._resources = dict[str, ResourceBookings]()
+        self._version: tuple[int, int] | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        check_interval = float(os.environ.get("NAME_CACHE_CHECK_INTERVAL", 1.0))
+        return self._version is None or time.monotonic() - self._checked_at >= check_interval
+
+    def _is_current(self, result: list[tuple[int, int]]) -> bool:
+        with self._lock:
+            if result and tuple(result[0]) == self._version:
+                self._checked_at = time.monotonic()
+                return True
+            return False
+
+    def _store(self, rows: list[tuple[int, int, str | None, str | None, date | None, date | None]]):
+        bookings = dict[str, list[Booking]]()
+        for _, _, contact, task, start, end in rows:
+            if contact is not None:
+                bookings.setdefault(contact, []).append(Booking(task, start, end))
+
+        resources = {contact: ResourceBookings(resource_bookings) for contact, resource_bookings in bookings.items()}
+
+        with self._lock:
+            self._resources = resources
+            self._version = tuple(rows[0][:2]) if rows else None
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """Reloads the index if assignments or tasks have been written since it was loaded."""
+        if not self._is_stale():
+            return
+        if self._version is not None and self._is_current(select(RESOURCE_CALENDAR_VERSION_QUERY)):
+            return
+
+        self._store(select(RESOURCE_CALENDAR_LOAD_QUERY))
+
+    async def arefresh(self):
+        """Awaitable version of refresh."""
+        if not self._is_stale():
+            return
+        if self._version is not None and self._is_current(await aselect(RESOURCE_CALENDAR_VERSION_QUERY)):
+            return
+
+        self._store(await aselect(RESOURCE_CALENDAR_LOAD_QUERY))
+
+    def _conflicts(self, contact: str, start: date, end: date, task: str | None) -> list[Booking]:
+        with self._lock:
+            resource = self._resources.get(contact)
+        if resource is None:
+            return []
+        return [booking for booking in resource.overlapping(start, end) if booking.task != task]
+
+    def conflicts(self, contact: str, start: date, end: date, task: str | None = None) -> list[Booking]:
+        """
+        The bookings of the resource that overlap the days from start to end (inclusive), ignoring the given task,
+        in order of their start. The resource is free for those days if there are none.
+        """
+        self.refresh()
+        return self._conflicts(contact, start, end, task)
+
+    async def aconflicts(self, contact: str, start: date, end: date, task: str | None = None) -> list[Booking]:
+        """Awaitable version of conflicts."""
+        await self.arefresh()
+        return self._conflicts(contact, start, end, task)
+
+    def invalidate(self):
+        """Makes the next lookup check for changes, after this process has written assignments or task dates."""
+        with self._lock:
+            self._checked_at = 0.0
+
+resource_calendar = ResourceCalendar()
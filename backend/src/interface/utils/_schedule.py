@@ -0,0 +1,207 @@
+from copy import copy
+from datetime import date
+from typing import Iterable, NamedTuple
+
+class TaskTiming(NamedTuple):
+    """Critical path method results for one task. Dates are inclusive; slack is in days."""
+    earliest_start: date
+    earliest_end: date
+    latest_start: date
+    latest_end: date
+    slack: int
+
+class Shift(NamedTuple):
+    """Dates of a task before and after a slip is propagated to it."""
+    name: str
+    start: date
+    end: date | None
+    new_start: date
+    new_end: date | None
+    days: int
+
+class CriticalPath(NamedTuple):
+    tasks: list[str]
+    finish: date | None
+    timings: dict[str, TaskTiming]
+
+class ScheduleGraph:
+    """
+    Dependency graph of a project's tasks, with the schedule analyses that the analyst and the scheduling tools need.
+
+    Tasks are nodes and each dependency is an edge from the prerequisite to its dependent, which may start on the day the
+    prerequisite ends (finish-to-start). A task's duration is the number of days between its start and end; undated ends count as zero days.
+    Every analysis is a single pass over the graph in topological order, so it runs in O(tasks + dependencies).
+    """
+    def __init__(self, tasks: Iterable[tuple[str, date, date | None]], dependencies: Iterable[tuple[str, str]]):
+        self.names = list[str]()
+        self.start = list[int]()
+        self.end = list[int | None]()
+        self.index = dict[str, int]()
+
+        for name, start, end in tasks:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.start.append(start.toordinal())
+            self.end.append(end.toordinal() if end else None)
+
+        self.successors = [list[int]() for _ in self.names]
+        self.predecessors = [list[int]() for _ in self.names]
+        for task, dependent in dependencies:
+            if task in self.index and dependent in self.index:
+                self.successors[self.index[task]].append(self.index[dependent])
+                self.predecessors[self.index[dependent]].append(self.index[task])
+
+        self._order: list[int] | None = None
+
+    @classmethod
+    def from_rows(cls, tasks: Iterable[dict], dependencies: Iterable[dict]) -> "ScheduleGraph":
+        """Builds the graph from the task and dependency rows of a project snapshot."""
+        return cls(
+            ((task["name"], date.fromisoformat(task["start"]), date.fromisoformat(task["end"]) if task["end"] else None) for task in tasks),
+            ((dep["task"], dep["dependent"]) for dep in dependencies),
+        )
+
+    def rescheduled(self, shifts: Iterable[Shift]) -> "ScheduleGraph":
+        """Copy of the graph in which the shifted tasks have their new dates."""
+        graph = copy(self)
+        graph.start = list(self.start)
+        graph.end = list(self.end)
+
+        for shift in shifts:
+            i = self.index[shift.name]
+            graph.start[i] = shift.new_start.toordinal()
+            graph.end[i] = shift.new_end.toordinal() if shift.new_end else None
+
+        return graph
+
+    def duration(self, i: int) -> int:
+        return self.end[i] - self.start[i] if self.end[i] is not None else 0
+
+    def _topological_order(self) -> list[int]:
+        if self._order is not None:
+            return self._order
+
+        remaining = [len(preds) for preds in self.predecessors]
+        order = [i for i, count in enumerate(remaining) if count == 0]
+        # Kahn's algorithm; order doubles as the queue
+        for i in order:
+            for j in self.successors[i]:
+                remaining[j] -= 1
+                if remaining[j] == 0:
+                    order.append(j)
+
+        if len(order) < len(self.names):
+            cyclic = sorted(self.names[i] for i, count in enumerate(remaining) if count > 0)
+            raise ValueError(f"The dependencies between the following tasks form a cycle: {", ".join(cyclic)}")
+
+        self._order = order
+        return order
+
+    def topological_order(self) -> list[str]:
+        """Task names ordered so that every task comes after the tasks it depends on."""
+        return [self.names[i] for i in self._topological_order()]
+
+    def critical_path(self) -> CriticalPath:
+        """
+        Earliest and latest dates and slack of every task, and the chain of zero-slack tasks that determines the project finish.
+        No task is scheduled earlier than its current start date.
+        """
+        order = self._topological_order()
+
+        earliest = list(self.start)
+        for i in order:
+            finish = earliest[i] + self.duration(i)
+            for j in self.successors[i]:
+                earliest[j] = max(earliest[j], finish)
+
+        project_finish = max((earliest[i] + self.duration(i) for i in order), default=0)
+
+        latest = [project_finish] * len(self.names)
+        for i in reversed(order):
+            latest[i] = min((latest[j] for j in self.successors[i]), default=project_finish) - self.duration(i)
+
+        # Follow zero-slack successors from the zero-slack task that starts first
+        critical = [i for i in order if latest[i] == earliest[i]]
+        path = list[int]()
+        if critical:
+            current = min(critical, key=lambda i: earliest[i])
+            while current is not None:
+                path.append(current)
+                finish = earliest[current] + self.duration(current)
+                current = next((j for j in self.successors[current] if latest[j] == earliest[j] and earliest[j] == finish), None)
+
+        return CriticalPath(
+            tasks=[self.names[i] for i in path],
+            finish=date.fromordinal(project_finish) if order else None,
+            timings={
+                self.names[i]: TaskTiming(
+                    date.fromordinal(earliest[i]),
+                    date.fromordinal(earliest[i] + self.duration(i)),
+                    date.fromordinal(latest[i]),
+                    date.fromordinal(latest[i] + self.duration(i)),
+                    latest[i] - earliest[i],
+                ) for i in order
+            },
+        )
+
+    def longest_chain(self) -> list[str]:
+        """The longest sequence of tasks in which each depends on the previous one, counted in tasks."""
+        order = self._topological_order()
+        length = [1] * len(self.names)
+        previous = [-1] * len(self.names)
+
+        for i in order:
+            for j in self.successors[i]:
+                if length[i] + 1 > length[j]:
+                    length[j] = length[i] + 1
+                    previous[j] = i
+
+        if not order:
+            return []
+
+        chain = [max(order, key=lambda i: length[i])]
+        while previous[chain[-1]] != -1:
+            chain.append(previous[chain[-1]])
+
+        return [self.names[i] for i in reversed(chain)]
+
+    def slip(self, task: str, new_end: date) -> list[Shift]:
+        """
+        Moves task's end to new_end and pushes back every downstream task by the least amount that keeps it from starting
+        before any of its prerequisites end. Returns the tasks whose dates change, task first, in topological order.
+        Tasks that do not depend on task are never moved, and an earlier new_end does not pull dependents forward.
+        """
+        if task not in self.index:
+            raise KeyError(task)
+
+        order = self._topological_order()
+        source = self.index[task]
+        if new_end.toordinal() < self.start[source]:
+            raise ValueError(f"The new end date {new_end} of task {task} is before its start date {date.fromordinal(self.start[source])}")
+
+        new_start = list(self.start)
+        new_end_of = list(self.end)
+        new_end_of[source] = new_end.toordinal()
+        moved = {source}
+
+        for i in order[order.index(source):]:
+            if i != source:
+                required = max((new_end_of[p] if new_end_of[p] is not None else new_start[p] for p in self.predecessors[i] if p in moved), default=None)
+                if required is None or required <= self.start[i]:
+                    continue
+
+                shift = required - self.start[i]
+                new_start[i] = required
+                new_end_of[i] = self.end[i] + shift if self.end[i] is not None else None
+                moved.add(i)
+
+        return [
+            Shift(
+                self.names[i],
+                date.fromordinal(self.start[i]),
+                date.fromordinal(self.end[i]) if self.end[i] is not None else None,
+                date.fromordinal(new_start[i]),
+                date.fromordinal(new_end_of[i]) if new_end_of[i] is not None else None,
+                new_end_of[i] - (self.end[i] if self.end[i] is not None else self.start[i]) if i == source else new_start[i] - self.start[i],
+            ) for i in order if i in moved
+        ]
\ No newline at end of file
@@ -0,0 +1,137 @@
+import re
+import json
+import threading
+from collections import deque
+from typing import Any, AsyncIterator
+from langgraph.graph.state import CompiledStateGraph
+
+JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+class FollowupExtractor:
+    """Incrementally decodes the "followup" string of a structured output as its JSON arrives, so that only user-facing text is streamed."""
+    KEY = re.compile(r'"followup"\s*:\s*"')
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos: int | None = None
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        self.buffer += text
+        if self.done:
+            return ""
+
+        if self.pos is None:
+            match = self.KEY.search(self.buffer)
+            if match is None:
+                return ""
+            self.pos = match.end()
+
+        decoded = []
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+
+            if char == '"':
+                self.done = True
+                break
+            if char != "\\":
+                decoded.append(char)
+                self.pos += 1
+                continue
+
+            # Escape sequences may be split across chunks; wait for the rest
+            if self.pos + 1 >= len(self.buffer):
+                break
+            escaped = self.buffer[self.pos + 1]
+            if escaped == "u":
+                if self.pos + 6 > len(self.buffer):
+                    break
+                decoded.append(chr(int(self.buffer[self.pos + 2:self.pos + 6], 16)))
+                self.pos += 6
+            else:
+                decoded.append(JSON_ESCAPES.get(escaped, escaped))
+                self.pos += 2
+
+        return "".join(decoded)
+
+class ModelStream:
+    """Token stream of one model run: plain replies pass through, structured outputs are reduced to their followup."""
+    def __init__(self):
+        self.pending = ""
+        self.extractor: FollowupExtractor | None = None
+        self.structured: bool | None = None
+
+    def feed(self, text: str) -> str:
+        if self.structured is None:
+            self.pending += text
+            if not self.pending.strip():
+                return ""
+            self.structured = self.pending.lstrip().startswith("{")
+            text, self.pending = self.pending, ""
+            if self.structured:
+                self.extractor = FollowupExtractor()
+
+        return self.extractor.feed(text) if self.structured else text
+
+def node_path(metadata: dict[str, Any]) -> list[str]:
+    """Names of the enclosing graph nodes, outermost first, ending with the node itself."""
+    return [segment.split(":")[0] for segment in metadata.get("checkpoint_ns", "").split("|") if segment]
+
+async def stream_graph_events(graph: CompiledStateGraph, graph_input: Any, config: dict) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Runs graph and yields ("node", ...) when a node of the graph or one of its subgraphs starts,
+    and ("token", ...) for each piece of user-facing model output as it is generated.
+    Token events carry the model run id, so that the output of parallel branches can be told apart.
+    """
+    streams = dict[str, ModelStream]()
+
+    async for event in graph.astream_events(graph_input, config=config, version="v2"):
+        kind = event["event"]
+        metadata = event.get("metadata", {})
+
+        if kind == "on_chain_start" and event["name"] == metadata.get("langgraph_node"):
+            path = node_path(metadata)
+            # The namespace of a starting node does not include the node itself yet
+            if not path or path[-1] != event["name"]:
+                path.append(event["name"])
+            yield "node", {"node": event["name"], "path": path}
+
+        elif kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if not isinstance(content, str) or not content:
+                continue
+
+            text = streams.setdefault(event["run_id"], ModelStream()).feed(content)
+            if text:
+                yield "token", {"node": metadata.get("langgraph_node"), "path": node_path(metadata), "run_id": event["run_id"], "content": text}
+
+        elif kind == "on_chat_model_end":
+            streams.pop(event["run_id"], None)
+
+class StreamStats:
+    """Time to first token of recent streamed requests."""
+    def __init__(self, window: int = 1000):
+        self._ttft = deque[float](maxlen=window)
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def record(self, started: float, first_token: float | None):
+        with self._lock:
+            self._requests += 1
+            if first_token is not None:
+                self._ttft.append(first_token - started)
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            ttft = sorted(self._ttft)
+            return {
+                "requests": self._requests,
+                "with_tokens": len(ttft),
+                "ttft_p50_ms": 1000 * ttft[len(ttft) // 2] if ttft else 0.0,
+                "ttft_p95_ms": 1000 * ttft[int(len(ttft) * 0.95)] if ttft else 0.0,
+            }
+
+def sse_event(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+stream_stats = StreamStats()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import asyncio
+import hashlib
+from uuid import UUID
+from weakref import WeakValueDictionary
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from psycopg import errors
+from interface.utils._async_db_utils import get_async_pool
+
+class ThreadBusyError(Exception):
+    """Raised when a conversation thread stays locked by another request for longer than THREAD_LOCK_TIMEOUT seconds."""
+
+# In-process locks, so that concurrent requests for one thread in the same worker only hold a single database session
+_local_locks = WeakValueDictionary[str, asyncio.Lock]()
+
+def thread_lock_key(thread_id: UUID | str) -> int:
+    """Maps a thread id onto the signed 64-bit key space of Postgres advisory locks."""
+    digest = hashlib.blake2b(str(thread_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+def shared_thread_locks() -> bool:
+    """Cross-process locks are taken when conversation state is shared through Postgres (or when THREAD_LOCKS=postgres)."""
+    return os.environ.get("THREAD_LOCKS", os.environ.get("CHECKPOINTER", "sqlite")) == "postgres"
+
+@asynccontextmanager
+async def thread_lock(thread_id: UUID | str) -> AsyncIterator[None]:
+    """
+    Serializes graph runs on one conversation thread across tasks, workers and nodes.
+
+    Within a process an asyncio lock is used. When conversation state is shared through Postgres, a session-level advisory lock
+    is additionally held on a pooled connection for the duration of the run, so requests for the same thread can land on any worker.
+    Take it inside admission.admit(), so that requests still queued for the model hold no connection and the connections held
+    for locks stay within LLM_MAX_CONCURRENCY per worker.
+    """
+    timeout = float(os.environ.get("THREAD_LOCK_TIMEOUT", 60))
+    local_lock = _local_locks.setdefault(str(thread_id), asyncio.Lock())
+
+    try:
+        await asyncio.wait_for(local_lock.acquire(), timeout)
+    except TimeoutError:
+        raise ThreadBusyError(f"Thread {thread_id} is busy")
+
+    try:
+        if not shared_thread_locks():
+            yield
+            return
+
+        key = thread_lock_key(thread_id)
+        pool = await get_async_pool()
+
+        async with pool.connection() as conn:
+            try:
+                await conn.execute(f"SET lock_timeout = {int(timeout * 1000)}")
+                await conn.execute("SELECT pg_advisory_lock(%s)", (key,))
+                await conn.commit()
+            except errors.LockNotAvailable:
+                await conn.rollback()
+                raise ThreadBusyError(f"Thread {thread_id} is busy")
+
+            try:
+                yield
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock(%s)", (key,))
+                await conn.execute("RESET lock_timeout")
+                await conn.commit()
+    finally:
+        local_lock.release()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from datetime import date
+from interface.core.schemas import Task
+from interface.utils._db_utils import select
+from interface.utils._async_db_utils import aselect
+
+# Timeline rows and removed task names written after the given version, with the transaction ids bounding the writers
+# still in progress when they were read (xmin: oldest still running, xmax: first not yet started)
+TIMELINE_CHANGES_QUERY = """
+    WITH snapshot AS (
+        SELECT
+            pg_snapshot_xmin(pg_current_snapshot())::text::bigint AS xmin,
+            pg_snapshot_xmax(pg_current_snapshot())::text::bigint AS xmax
+    )
+    SELECT snapshot.*, changes.*
+    FROM snapshot
+    LEFT JOIN (
+        SELECT tasks.timeline_version, projects.name AS project_name, tasks.name, tasks.description, start, \"end\"
+        FROM public.tasks
+        LEFT JOIN public.projects
+            ON projects.project_id = tasks.project_id
+        WHERE tasks.timeline_version > !p1
+        UNION ALL
+        SELECT timeline_version, NULL, name, NULL, NULL, NULL
+        FROM public.timeline_removals
+        WHERE timeline_version > !p1
+    ) AS changes
+        ON true
+    """
+
+def timeline_order(task: Task) -> tuple[bool, str, str]:
+    # Same order as ORDER BY "end": undated tasks last
+    return task.end is None, task.end or "", task.taskName
+
+class TimelineCache:
+    """
+    In-process copy of the task timeline shown by GET /chat, kept current incrementally.
+
+    Every task row carries a timeline_version drawn from one sequence, and removed task names are kept with the version that removed them,
+    so each refresh only fetches what changed since the cached version. Refreshes run at most once every TIMELINE_CHECK_INTERVAL
+    seconds (default 1), or on the next request after a commit node calls touch.
+
+    Task writers are not serialized, so a version can commit after a higher one has been read. Such a writer was already running
+    (and holding a transaction id) when the higher version was read, so the version given to clients only moves past a read once every
+    transaction running at that read has finished; rows above it are read again until then. The trade-off is that clients may receive
+    the same rows twice, and a long-running task write holds back the version they are given until it ends.
+    """
+    def __init__(self):
+        self._tasks = dict[str, tuple[int, Task]]()
+        self._removed = dict[str, int]()
+        self._version = 0
+        # Version below which no write can still appear, and the (highest version, xmax) of reads that may have missed one
+        self._settled = 0
+        self._unsettled = list[tuple[int, int]]()
+        self._checked_at: float | None = None
+        self._sorted: list[Task] | None = None
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        check_interval = float(os.environ.get("TIMELINE_CHECK_INTERVAL", 1.0))
+        return self._checked_at is None or time.monotonic() - self._checked_at >= check_interval
+
+    def _apply(self, rows: list[tuple[int, int, int | None, str | None, str | None, str | None, date | None, date | None]]):
+        with self._lock:
+            self._checked_at = time.monotonic()
+            changes = [row[2:] for row in rows if row[2] is not None]
+
+            # Removals first: a name that is still (or again) a task is returned as a row and wins
+            for version, _, task_name, _, start, _ in changes:
+                if start is None:
+                    self._tasks.pop(task_name, None)
+                    self._removed[task_name] = version
+                self._version = max(self._version, version)
+
+            for version, project_name, task_name, desc, start, end in changes:
+                if start is not None:
+                    self._tasks[task_name] = (version, Task(
+                        projectName=project_name,
+                        taskName=task_name,
+                        taskDesc=desc,
+                        start=start.strftime("%Y-%m-%d"),
+                        end=end.strftime("%Y-%m-%d") if end else end,
+                    ))
+
+            if changes:
+                self._sorted = None
+            if rows:
+                self._settle(rows[0][0], rows[0][1])
+
+    def _settle(self, xmin: int, xmax: int):
+        """Moves the settled version past every read whose running transactions have all finished by the read with the given bounds."""
+        self._unsettled.append((self._version, xmax))
+        settled = [version for version, read_xmax in self._unsettled if read_xmax <= xmin]
+        self._settled = max([self._settled, *settled])
+        self._unsettled = [(version, read_xmax) for version, read_xmax in self._unsettled if read_xmax > xmin]
+
+    def refresh(self):
+        if self._is_stale():
+            self._apply(select(TIMELINE_CHANGES_QUERY, self._settled))
+
+    async def arefresh(self):
+        """Awaitable version of refresh."""
+        if self._is_stale():
+            self._apply(await aselect(TIMELINE_CHANGES_QUERY, self._settled))
+
+    def touch(self):
+        """Called by the commit nodes after writing tasks, so that the next request picks up the write without waiting for the check interval."""
+        with self._lock:
+            self._checked_at = None
+
+    def latest(self) -> int:
+        """Highest version read so far, which is above the settled version given to clients while writers may still commit below it."""
+        with self._lock:
+            return self._version
+
+    def changes(self, since: int | None = None) -> tuple[int, bool, list[Task], list[str]]:
+        """
+        Returns the settled version and whether the whole timeline follows, then the tasks and the names of removed tasks.
+        With since, only the tasks written after that version and the names removed after it are returned, unless since is newer
+        than the cache (e.g. from before a database reset), in which case the whole timeline is.
+        """
+        with self._lock:
+            if since is None or since > self._version:
+                if self._sorted is None:
+                    self._sorted = sorted((task for _, task in self._tasks.values()), key=timeline_order)
+                return self._settled, True, self._sorted, []
+
+            tasks = sorted((task for version, task in self._tasks.values() if version > since), key=timeline_order)
+            removed = [name for name, version in self._removed.items() if version > since and name not in self._tasks]
+            return self._settled, False, tasks, removed
+
+timeline_cache = TimelineCache()
\ No newline at end of file
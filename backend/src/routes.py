@@ -1,28 +1,109 @@
+import os
+import re
+import time
+import asyncio
 import uvicorn
 from uuid import UUID
-from typing import Sequence
+from datetime import date
+from contextlib import asynccontextmanager, suppress
+from typing import Sequence, AsyncIterator
 from pydantic import BaseModel
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from langgraph.types import Command
+from langgraph.types import Command, Interrupt
 from interface.core.schemas import Action, Task
-from interface.core.project_manager import project_manager
-from interface.utils import select
+from langgraph.graph.state import CompiledStateGraph
+from interface.config import response_cache, awarm_up_models
+from interface.core.project_manager import compile_project_manager
+from interface.utils import (
+    migrate,
+    close_pool,
+    pool_stats,
+    close_async_pool,
+    async_pool_stats,
+    entity_names,
+    timeline_cache,
+    aopen_checkpointer,
+    run_checkpoint_compaction,
+    thread_lock,
+    shared_thread_locks,
+    intent_router,
+    stream_graph_events,
+    stream_stats,
+    sse_event,
+    admission,
+    AdmissionRejected,
+    request_key,
+    request_coalescer,
+    ashift_task_end,
+    TaskNotFoundError,
+    ThreadBusyError,
+)
+
+project_manager: CompiledStateGraph | None = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global project_manager
+
+    migrate()
+    await awarm_up_models()
+    async with aopen_checkpointer() as checkpointer:
+        project_manager = compile_project_manager(checkpointer)
+        compaction = asyncio.create_task(run_checkpoint_compaction(checkpointer))
+
+        yield
+
+        compaction.cancel()
+        with suppress(asyncio.CancelledError):
+            await compaction
 
-app = FastAPI(debug=True)
+    close_pool()
+    await close_async_pool()
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 class UserMessage(BaseModel):
     content: str
     threadID: UUID
     isFirstMessage: bool
+    # Pending question that content answers; defaults to the question returned as AgentMessage.content
+    interruptID: str | None = None
+    # Identifies one submission, so that retries and double submits return its reply instead of running the graph again
+    idempotencyKey: str | None = None
+
+class PendingQuestion(BaseModel):
+    id: str
+    content: str
 
 class AgentMessage(BaseModel):
     content: str
+    # Every question waiting for an answer when parallel subgraph runs are paused at once
+    pending: Sequence[PendingQuestion] = []
 
 class StatusInfo(BaseModel):
     projects: Sequence[str]
     actions: Sequence[Action]
     timeline: Sequence[Task]
+    # Timeline version to send back as since; full is False when timeline only holds changes
+    version: int = 0
+    full: bool = True
+    removed: Sequence[str] = []
+
+class TaskShift(BaseModel):
+    taskName: str
+    newEnd: date
+
+class ShiftedTask(BaseModel):
+    taskName: str
+    start: str
+    end: str | None = None
+    newStart: str
+    newEnd: str | None = None
+    days: int
+
+ENTITY_TAG_PATTERN = re.compile(r'(?:W/)?"[^"]*"|\*')
 
 ORIGINS = (
     "http://localhost:3000",
@@ -36,49 +117,179 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def graph_input(message: UserMessage, config: dict) -> dict | Command:
+    if message.isFirstMessage:
+        return {"user_input": message.content}
+
+    return await resume_command(message, config)
+
+def admission_error(error: AdmissionRejected) -> HTTPException:
+    return HTTPException(status_code=error.status, detail=error.detail, headers={"Retry-After": str(error.retry_after)})
+
+def error_event(error: HTTPException) -> str:
+    retry_after = {"retry_after": int(error.headers["Retry-After"])} if error.headers else {}
+    return sse_event("error", {"status": error.status_code, "detail": error.detail, **retry_after})
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header (a list of entity tags, or "*") names etag, using the weak comparison that the header calls for."""
+    if if_none_match is None:
+        return False
+    tags = ENTITY_TAG_PATTERN.findall(if_none_match)
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def submission_key(message: UserMessage) -> tuple[str, bool]:
+    return request_key(message.threadID, message.idempotencyKey, message.isFirstMessage, message.interruptID, message.content)
+
+def agent_message(output: str | None, interrupts: Sequence[Interrupt]) -> AgentMessage:
+    if not interrupts:
+        return AgentMessage(content=output)
+
+    return AgentMessage(
+        content=interrupts[0].value,
+        pending=[PendingQuestion(id=pending.id, content=pending.value) for pending in interrupts] if len(interrupts) > 1 else [],
+    )
+
 @app.post("/chat", response_model=AgentMessage)
-def send_chat(message: UserMessage):
+async def send_chat(message: UserMessage):
     config = {"configurable": {"thread_id": message.threadID}}
+    key, explicit = submission_key(message)
 
-    if message.isFirstMessage:
-        response = project_manager.invoke({"user_input": message.content}, config=config)
-    else:
-        response = project_manager.invoke(Command(resume=message.content), config=config)
+    async def run() -> AgentMessage:
+        try:
+            # Admitted first, so that only runs holding a model slot also hold a pooled connection for their thread lock
+            async with admission.admit(), thread_lock(message.threadID):
+                response = await project_manager.ainvoke(await graph_input(message, config), config=config)
+        except ThreadBusyError as error:
+            raise HTTPException(status_code=409, detail=str(error))
+        except AdmissionRejected as error:
+            raise admission_error(error)
 
-    try:
-        return AgentMessage(content=response["__interrupt__"][0].value)
-    except KeyError:
-        return AgentMessage(content=response["output"])
+        return agent_message(response.get("output"), response.get("__interrupt__", []))
+
+    return await request_coalescer.run(key, explicit, run)
+
+@app.post("/chat/stream")
+async def stream_chat(message: UserMessage):
+    """
+    Server-sent events variant of POST /chat. Emits "node" when a graph or subgraph node starts and "token" for each piece of
+    user-facing model output as it is generated, then "message" with the same body that POST /chat returns, or "error".
+    A duplicate of a submission that is still running only receives its "message".
+    """
+    config = {"configurable": {"thread_id": message.threadID}}
+    key, explicit = submission_key(message)
+    existing = request_coalescer.lookup(key)
+
+    # A full queue is refused before the stream opens, so that clients see the 429 status; a wait that times out is reported as an "error" event
+    if existing is None:
+        try:
+            admission.check()
+        except AdmissionRejected as error:
+            raise admission_error(error)
+
+    async def events() -> AsyncIterator[str]:
+        if existing is not None:
+            try:
+                yield sse_event("message", (await existing).model_dump())
+            except HTTPException as error:
+                yield error_event(error)
+            return
+
+        started, first_token = time.monotonic(), None
+
+        with request_coalescer.claim(key, explicit) as reply:
+            try:
+                async with admission.admit(), thread_lock(message.threadID):
+                    async for event, data in stream_graph_events(project_manager, await graph_input(message, config), config):
+                        if event == "token" and first_token is None:
+                            first_token = time.monotonic()
+                        yield sse_event(event, data)
+
+                    snapshot = await project_manager.aget_state(config=config)
+            except ThreadBusyError as error:
+                reply.set_exception(HTTPException(status_code=409, detail=str(error)))
+            except AdmissionRejected as error:
+                reply.set_exception(admission_error(error))
+            else:
+                reply.set_result(agent_message(snapshot.values.get("output"), snapshot.interrupts))
+            finally:
+                stream_stats.record(started, first_token)
+
+        if (error := reply.exception()) is not None:
+            yield error_event(error)
+        else:
+            yield sse_event("message", reply.result().model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def resume_command(message: UserMessage, config: dict) -> Command:
+    """Answers the question named by interruptID, or the first pending one, leaving the other parallel runs paused."""
+    if message.interruptID is not None:
+        return Command(resume={message.interruptID: message.content})
+
+    snapshot = await project_manager.aget_state(config=config)
+    if len(snapshot.interrupts) > 1:
+        return Command(resume={snapshot.interrupts[0].id: message.content})
+
+    return Command(resume=message.content)
     
 @app.get("/chat", response_model=StatusInfo)
-def get_status(thread: UUID):
+async def get_status(thread: UUID, request: Request, response: Response, since: int | None = None):
+    """
+    Actions of the thread, project names and the task timeline. Responses carry an ETag, and a request whose If-None-Match
+    still matches gets 304. With since set to the version of an earlier response, the timeline only holds the tasks changed
+    after it, and removed lists the names of the tasks that left it.
+    """
     config = {"configurable": {"thread_id": thread}}
-    snapshot = project_manager.get_state(config=config)
+    snapshot = await project_manager.aget_state(config=config)
 
     try:
         actions = snapshot.values["actions_taken"]
     except KeyError:
         actions = []
 
-    projects = [project for project, in select("SELECT name FROM public.projects")]
-
-    timeline = [Task(
-        projectName=project_name,
-        taskName=task_name,
-        taskDesc=desc,
-        start=start.strftime("%Y-%m-%d"),
-        end=end.strftime("%Y-%m-%d") if end else end,
-    ) for project_name, task_name, desc, start, end in select(
-        """
-        SELECT projects.name, tasks.name, tasks.description, start, \"end\" 
-        FROM public.tasks
-        LEFT JOIN public.projects
-            ON projects.project_id = tasks.project_id 
-        ORDER BY \"end\"
-        """
-    )]
-
-    return StatusInfo(projects=projects, actions=actions, timeline=timeline)
+    projects = await entity_names.alist_names("projects")
+    await timeline_cache.arefresh()
+    version, full, timeline, removed = timeline_cache.changes(since)
+
+    etag = f'"{version}.{timeline_cache.latest()}-{entity_names.version("projects")}-{snapshot.config["configurable"].get("checkpoint_id")}-{"full" if full else since}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return StatusInfo(projects=projects, actions=actions, timeline=timeline, version=version, full=full, removed=removed)
+
+@app.post("/tasks/shift", response_model=Sequence[ShiftedTask])
+async def shift_task(shift: TaskShift):
+    """Moves the end of a task and pushes back the tasks that depend on it, returning every task whose dates changed."""
+    try:
+        shifts = await ashift_task_end(shift.taskName, shift.newEnd)
+    except TaskNotFoundError as error:
+        raise HTTPException(status_code=404, detail=str(error))
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+
+    return [ShiftedTask(
+        taskName=task.name,
+        start=task.start.strftime("%Y-%m-%d"),
+        end=task.end.strftime("%Y-%m-%d") if task.end else task.end,
+        newStart=task.new_start.strftime("%Y-%m-%d"),
+        newEnd=task.new_end.strftime("%Y-%m-%d") if task.new_end else task.new_end,
+        days=task.days,
+    ) for task in shifts]
+
+@app.get("/metrics")
+def get_metrics():
+    return {"db_pool": pool_stats(), "async_db_pool": async_pool_stats(), "intent_router": intent_router.stats(), "llm_cache": response_cache.stats(), "stream": stream_stats.stats(), "admission": admission.stats(), "coalescing": request_coalescer.stats()}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # Each worker compiles its own graph; conversations can move between workers only when their state is shared through Postgres
+    workers = int(os.environ.get("WORKERS", 1))
+    if workers > 1 and not shared_thread_locks():
+        raise SystemExit("WORKERS > 1 requires CHECKPOINTER=postgres (or THREAD_LOCKS=postgres on a single node) so that workers share thread locks")
+
+    uvicorn.run(
+        "routes:app",
+        host=os.environ.get("HOST", "127.0.0.1"),
+        port=int(os.environ.get("PORT", 8000)),
+        workers=workers,
+    )
\ No newline at end of file
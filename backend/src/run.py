@@ -1,20 +1,29 @@
 import uuid
 from langgraph.types import Command
-from interface.core.project_manager import project_manager
+from interface.config import warm_up_models
+from interface.core.project_manager import compile_project_manager
+from interface.utils import migrate, close_pool, open_checkpointer, compact_checkpoints
 
 if __name__ == "__main__":
-    config = {"configurable": {"thread_id": uuid.uuid4()}}
-    result = project_manager.invoke({"user_input": input("")}, config=config)
+    migrate()
+    warm_up_models()
 
-    while True:
-        try:
+    with open_checkpointer() as checkpointer:
+        compact_checkpoints(checkpointer)
+        project_manager = compile_project_manager(checkpointer)
+
+        config = {"configurable": {"thread_id": uuid.uuid4()}}
+        result = project_manager.invoke({"user_input": input("")}, config=config)
+
+        while "__interrupt__" in result:
+            # Parallel subgraph runs can pause together, so every pending question is answered before resuming
             result = project_manager.invoke(
                 Command(
-                    resume=input(result["__interrupt__"][0].value + " ")
+                    resume={pending.id: input(pending.value + " ") for pending in result["__interrupt__"]}
                 ), config=config
             )
-        except KeyError:
-            break
 
-    print(result["output"])
-    print(result["actions_taken"])
\ No newline at end of file
+        print(result["output"])
+        print(result["actions_taken"])
+
+    close_pool()
\ No newline at end of file
@@ -0,0 +1,71 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from interface.core.schemas import Action, ResourceBatchSchema, ResourceDraft, SubgraphBatchState
+from interface.core.nodes.subgraph import _batch_maker_nodes
+from interface.core.nodes.subgraph._batch_maker_nodes import batch_extract_node, resource_batch
+
+class FakeExtractor:
+    def __init__(self, response: ResourceBatchSchema):
+        self.response = response
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, messages, config=None):
+        return self.response
+
+@pytest.fixture
+def existing(monkeypatch):
+    contacts = set[str]()
+    monkeypatch.setattr(_batch_maker_nodes.entity_names, "contains", lambda entity, name: name in contacts)
+    return contacts
+
+def extract(monkeypatch, state: SubgraphBatchState, *contacts: str, confirmed: bool = False):
+    response = ResourceBatchSchema(
+        entities=[ResourceDraft(first_name=contact.split("@")[0].title(), contact=contact) for contact in contacts],
+        confirmed=confirmed,
+    )
+    monkeypatch.setattr(_batch_maker_nodes, "model_for", lambda node: FakeExtractor(response))
+    return batch_extract_node(resource_batch)(state, {})
+
+def test_smaller_batch_is_offered_for_confirmation(monkeypatch, existing):
+    state = SubgraphBatchState(messages=[HumanMessage("add three people: ann@x.io and bo@x.io")], count=3)
+    command = extract(monkeypatch, state, "ann@x.io", "bo@x.io")
+
+    assert command.goto == "clarification"
+    assert command.update["awaiting_confirmation"]
+    assert "1 fewer than you asked for" in command.update["followup"]
+
+def test_confirmed_smaller_batch_is_committed(monkeypatch, existing):
+    state = SubgraphBatchState(
+        messages=[HumanMessage("add three people: ann@x.io and bo@x.io"), AIMessage("Here are the 2 new resources"), HumanMessage("just those two")],
+        count=3, awaiting_confirmation=True,
+    )
+    command = extract(monkeypatch, state, "ann@x.io", "bo@x.io", confirmed=True)
+
+    assert command.goto == "commit"
+    assert [entity["contact"] for entity in command.update["entities"]] == ["ann@x.io", "bo@x.io"]
+
+def test_shortfall_needs_the_list_to_be_shown_first(monkeypatch, existing):
+    state = SubgraphBatchState(messages=[HumanMessage("add three people: ann@x.io and bo@x.io")], count=3)
+    assert extract(monkeypatch, state, "ann@x.io", "bo@x.io", confirmed=True).goto == "clarification"
+
+def test_entities_committed_by_this_batch_are_not_checked_again(monkeypatch, existing):
+    # ann@x.io was inserted by the first commit, bo@x.io was taken by someone else and replaced with cy@x.io
+    existing.update({"ann@x.io", "bo@x.io"})
+    state = SubgraphBatchState(
+        messages=[HumanMessage("add ann@x.io and bo@x.io"), AIMessage("bo@x.io was created by someone else"), HumanMessage("use cy@x.io instead")],
+        count=2, actions=[Action(name="resource_maker", params={"first_name": "Ann", "last_name": "", "contact": "ann@x.io"})],
+    )
+    command = extract(monkeypatch, state, "ann@x.io", "cy@x.io")
+
+    assert "already exist" not in command.update["followup"]
+    assert "fewer than you asked for" not in command.update["followup"]
+    assert [entity["contact"] for entity in command.update["entities"]] == ["cy@x.io"]
+
+def test_existing_entities_are_still_rejected(monkeypatch, existing):
+    existing.add("ann@x.io")
+    state = SubgraphBatchState(messages=[HumanMessage("add ann@x.io and bo@x.io")], count=2)
+    command = extract(monkeypatch, state, "ann@x.io", "bo@x.io")
+
+    assert "The following resources already exist: ann@x.io" in command.update["followup"]
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from interface.core.schemas import DependencyMakerState
+from interface.core.nodes.subgraph import _dep_maker_nodes
+from interface.utils._dependency_index import DependencyIndex
+
+@pytest.fixture
+def index(monkeypatch):
+    index = DependencyIndex()
+    index._store([(0, [], [])])
+    monkeypatch.setattr(index, "refresh", lambda: None)
+    monkeypatch.setattr(index, "arefresh", lambda: asyncio.sleep(0))
+    monkeypatch.setattr(_dep_maker_nodes, "dependency_index", index)
+    monkeypatch.setattr(_dep_maker_nodes, "select", lambda query, *args: [(1, 2)])
+    return index
+
+STATE = DependencyMakerState(messages=[], task1_name="Design", task2_name="Build")
+
+def test_failed_insert_leaves_no_edge(monkeypatch, index):
+    def execute(query, *args):
+        raise ConnectionError("server closed the connection")
+    monkeypatch.setattr(_dep_maker_nodes, "execute", execute)
+
+    with pytest.raises(ConnectionError):
+        _dep_maker_nodes.create_dep_commit(STATE)
+    assert not index._pending
+    # The opposite dependency would have closed a cycle with the phantom edge
+    index.add(2, 1)
+
+def test_cancelled_insert_leaves_no_edge(monkeypatch, index):
+    async def aselect(query, *args):
+        return [(1, 2)]
+    async def aexecute(query, *args):
+        raise asyncio.CancelledError()
+    monkeypatch.setattr(_dep_maker_nodes, "aselect", aselect)
+    monkeypatch.setattr(_dep_maker_nodes, "aexecute", aexecute)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_dep_maker_nodes.acreate_dep_commit(STATE))
+    assert not index._pending
+    index.add(2, 1)
@@ -0,0 +1,48 @@
+import pytest
+from interface.utils._dependency_index import DependencyCycleError, DependencyIndex
+
+def loaded(version: int, *dependencies: tuple[int, int]) -> list[tuple[int, list[int], list[int]]]:
+    return [(version, [task for task, _ in dependencies], [dependent for _, dependent in dependencies])]
+
+@pytest.fixture
+def index():
+    index = DependencyIndex()
+    index._store(loaded(0, (1, 2)))
+    return index
+
+def test_reverse_of_a_committed_dependency_closes_a_cycle(index):
+    with pytest.raises(DependencyCycleError):
+        index.add(2, 1)
+
+def test_reservation_survives_a_reload(index):
+    index.add(2, 3)
+    # Another process wrote a dependency before this insert finished
+    index._store(loaded(1, (1, 2), (4, 5)))
+
+    with pytest.raises(DependencyCycleError):
+        index.add(3, 1)
+
+    index.committed(2, 3)
+    assert index._version == 2
+
+def test_reload_that_already_counts_the_insert(index):
+    index.add(2, 3)
+    index._store(loaded(1, (1, 2), (2, 3)))
+
+    index.committed(2, 3)
+    assert index._version == 1
+
+def test_discard_after_a_reload(index):
+    index.add(2, 3)
+    index._store(loaded(1, (1, 2), (4, 5)))
+
+    index.discard(2, 3)
+    index.add(3, 2)
+
+def test_discard_keeps_a_dependency_the_reload_found(index):
+    index.add(2, 3)
+    index._store(loaded(1, (1, 2), (2, 3)))
+
+    index.discard(2, 3)
+    with pytest.raises(DependencyCycleError):
+        index.add(3, 1)
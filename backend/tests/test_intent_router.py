@@ -0,0 +1,81 @@
+import json
+import pytest
+from interface.core.schemas import RouterSchema
+from interface.utils._intent_router import IntentRouter, route_by_rules
+
+def counts(text: str, question: str | None = None) -> dict[str, int] | None:
+    route = route_by_rules(text, question)
+    if route is None:
+        return None
+    return {field: count for field, count in route.schema.model_dump(exclude={"followup"}).items() if count}
+
+@pytest.mark.parametrize("text", [
+    "add tasks for design, build and test",
+    "Add resources Alice, Bob and Carol",
+    "create new requirements for the launch",
+    "add people to the project",
+])
+def test_plural_noun_without_count_is_left_to_the_model(text):
+    assert route_by_rules(text) is None
+
+@pytest.mark.parametrize("text", [
+    "don't add a project, just add a task",
+    "do not create a task, add a requirement instead",
+    "add a task instead of a dependency",
+    "never mind the project, add a task",
+])
+def test_negated_request_is_left_to_the_model(text):
+    assert route_by_rules(text) is None
+
+def test_question_with_negation_is_still_an_analysis():
+    assert counts("which tasks are not done?") == {"analyze_project": 1}
+
+@pytest.mark.parametrize(("text", "expected"), [
+    ("add task Design", {"add_task": 1}),
+    ("add a new task", {"add_task": 1}),
+    ("add three tasks", {"add_task": 3}),
+    ("create 2 projects and add a resource", {"add_project": 2, "add_resource": 1}),
+    ("assign Bo to Design", {"assign_resource": 1}),
+])
+def test_counted_requests_are_routed(text, expected):
+    route = route_by_rules(text)
+    assert route is not None and route.confidence == 1.0
+    assert counts(text) == expected
+
+@pytest.mark.parametrize(("text", "expected"), [
+    ("add a task called Create Project Plan", {"add_task": 1}),
+    ("Add a task named Assign Roles to the Website project", {"add_task": 1}),
+    ('add a task "Build the project dependency graph"', {"add_task": 1}),
+    ("add a task titled Kickoff, then assign Bo to it", {"add_task": 1, "assign_resource": 1}),
+    ("add a task called Design and add two resources", {"add_task": 1, "add_resource": 2}),
+])
+def test_keywords_inside_entity_names_are_ignored(text, expected):
+    assert counts(text) == expected
+
+def test_bare_replies_to_a_suggestion():
+    question = "Would you like to add a requirement?"
+    assert counts("no thanks", question) == {}
+    assert counts("yes please", question) == {"add_requirement": 1}
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    log_path = tmp_path / "router_examples.jsonl"
+    examples = (
+        [("please add the design review for me", RouterSchema(add_task=2))] * 20 +
+        [("status of the launch plan please", RouterSchema(analyze_project=1))] * 20
+    )
+    log_path.write_text("".join(
+        json.dumps({"text": text, "route": schema.model_dump(exclude={"followup"})}) + "\n" for text, schema in examples
+    ))
+
+    monkeypatch.setenv("ROUTER_LOG_PATH", str(log_path))
+    monkeypatch.setenv("ROUTER_MIN_EXAMPLES", "1")
+    return IntentRouter()
+
+def test_classifier_does_not_guess_counts(router):
+    assert router.route("test", "please add the design review for me") is None
+    assert router.stats()["test"]["model"] == 1
+
+def test_classifier_routes_uncounted_labels(router):
+    assert router.route("test", "status of the launch plan please") == RouterSchema(analyze_project=1)
+    assert router.stats()["test"]["classifier"] == 1
@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+from interface.utils import ResponseCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    monkeypatch.delenv("LLM_CACHE_NODES", raising=False)
+    monkeypatch.delenv("LLM_CACHE_EXCLUDE", raising=False)
+    return ResponseCache()
+
+def call_in(node: str, model, checkpoint_ns: str = ""):
+    """Invokes model the way a graph node does, with the node name in the run metadata."""
+    metadata = {"langgraph_node": node, "checkpoint_ns": checkpoint_ns}
+    return RunnableLambda(model.invoke).with_config(metadata=metadata).invoke([HumanMessage("add a task")])
+
+def test_routing_nodes_are_cached(cache):
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    assert call_in("liaison", model).content == "first"
+    assert call_in("liaison", model).content == "first"
+    assert cache.stats()["hits"] == 1
+
+def test_extraction_inside_a_subgraph_is_cached(cache):
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    call_in("extract", model, "task_batch_maker:1")
+    assert call_in("extract", model, "task_batch_maker:1").content == "first"
+
+@pytest.mark.parametrize("node", ["dialogue", "suggestion", "analyst"])
+def test_dialogue_nodes_are_not_cached_by_default(cache, node):
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    call_in(node, model)
+    assert call_in(node, model).content == "second"
+    assert cache.stats()["bypassed"] == 2
+
+def test_excluded_subgraph_bypasses_a_cached_node(monkeypatch, cache):
+    monkeypatch.setenv("LLM_CACHE_EXCLUDE", "req_batch_maker")
+    cache = ResponseCache()
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    call_in("extract", model, "req_batch_maker:1")
+    assert call_in("extract", model, "req_batch_maker:1").content == "second"
+
+def test_hits_return_copies(cache):
+    model = FakeListChatModel(responses=["first", "second"], cache=cache)
+    reply = call_in("liaison", model)
+    reply.content = "changed"
+
+    cached = call_in("liaison", model)
+    cached.additional_kwargs["changed"] = True
+    assert cached.content == "first"
+    assert "changed" not in call_in("liaison", model).additional_kwargs
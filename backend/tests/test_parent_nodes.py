@@ -0,0 +1,36 @@
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage
+from interface.core.schemas import Action, OverallState
+from interface.core.nodes.graph import parent_nodes
+
+class FakeAgent:
+    def __init__(self, response: dict):
+        self.response = response
+        self.inputs = list[dict]()
+
+    def invoke(self, input: dict) -> dict:
+        self.inputs.append(input)
+        return self.response
+
+    async def ainvoke(self, input: dict) -> dict:
+        return self.invoke(input)
+
+TASK = {"project_name": "Launch", "task_name": "Design", "task_desc": "", "start_date": "2025-01-01", "end_date": ""}
+STATE = OverallState(user_input="add a task", messages=[HumanMessage("add a task")], batch_size=2)
+
+@pytest.mark.parametrize(("agent", "node", "anode", "response"), [
+    ("task_maker_agent", "create_task", "acreate_task", {"action": Action(name="task_maker", params=TASK)}),
+    ("task_batch_maker_agent", "create_task_batch", "acreate_task_batch", {"actions": [Action(name="task_maker", params=TASK)] * 2}),
+])
+def test_sync_and_async_nodes_agree(monkeypatch, agent, node, anode, response):
+    fake = FakeAgent(response)
+    monkeypatch.setattr(parent_nodes, agent, fake)
+
+    update = getattr(parent_nodes, node)(STATE)
+    assert asyncio.run(getattr(parent_nodes, anode)(STATE)) == update
+    assert fake.inputs[0] == fake.inputs[1]
+
+    assert update["prev"] == "adding a new task"
+    assert update["actions_taken"] == response.get("actions", [response.get("action")])
+    assert all("Task Name: Design" in message.content for message in update["messages"])
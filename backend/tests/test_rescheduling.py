@@ -0,0 +1,18 @@
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from interface.utils import _rescheduling
+
+def test_shift_raises_when_the_database_is_unavailable(monkeypatch):
+    @contextmanager
+    def get_cursor():
+        raise ConnectionError("connection refused")
+        yield
+    monkeypatch.setattr(_rescheduling, "get_cursor", get_cursor)
+
+    with pytest.raises(ConnectionError):
+        _rescheduling.shift_task_end("Design", date(2025, 2, 1))
+
+def test_shift_of_missing_task():
+    with pytest.raises(_rescheduling.TaskNotFoundError):
+        _rescheduling.plan_shifts("Design", date(2025, 2, 1), [])
@@ -0,0 +1,34 @@
+import pytest
+from routes import etag_matches
+
+ETAG = '"12.14-3-abc-full"'
+
+@pytest.mark.parametrize("header", [
+    ETAG,
+    f'"other", {ETAG}',
+    f'W/{ETAG}',
+    '*',
+])
+def test_if_none_match_matches(header):
+    assert etag_matches(header, ETAG)
+
+@pytest.mark.parametrize("header", [None, "", '"other"', '"12.14-3-abc"', ETAG.strip('"')])
+def test_if_none_match_does_not_match(header):
+    assert not etag_matches(header, ETAG)
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+    import routes
+    return TestClient(routes.app, raise_server_exceptions=False)
+
+def test_shift_reports_database_errors(monkeypatch, client):
+    import routes
+    from psycopg_pool import PoolTimeout
+
+    async def ashift_task_end(task_name, new_end):
+        raise PoolTimeout("couldn't get a connection after 30.00 sec")
+    monkeypatch.setattr(routes, "ashift_task_end", ashift_task_end)
+
+    response = client.post("/tasks/shift", json={"taskName": "Design", "newEnd": "2025-02-01"})
+    assert response.status_code == 500
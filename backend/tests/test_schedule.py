@@ -0,0 +1,64 @@
+from datetime import date
+import pytest
+from interface.utils._schedule import ScheduleGraph
+from interface.utils._project_snapshot import ProjectSnapshot
+from interface.core.nodes.subgraph._analyst_nodes import format_slip_impact
+
+def day(n: int) -> date:
+    return date(2025, 1, n)
+
+def test_empty_graph():
+    graph = ScheduleGraph([], [])
+    assert graph.topological_order() == []
+    assert graph.critical_path() == ([], None, {})
+    assert graph.longest_chain() == []
+
+def test_cycle_names_its_tasks():
+    graph = ScheduleGraph(
+        [("A", day(1), day(2)), ("B", day(2), day(3)), ("C", day(3), day(4)), ("D", day(1), None)],
+        [("A", "B"), ("B", "C"), ("C", "A")],
+    )
+    with pytest.raises(ValueError, match="form a cycle: A, B, C$"):
+        graph.critical_path()
+
+def test_critical_path_without_gaps():
+    graph = ScheduleGraph([("A", day(1), day(5)), ("B", day(5), day(8)), ("C", day(1), day(3))], [("A", "B")])
+    path = graph.critical_path()
+    assert path.tasks == ["A", "B"]
+    assert path.finish == day(8)
+    assert path.timings["C"].slack == 5
+
+def test_gap_before_a_dependent_gives_its_prerequisite_slack():
+    # B cannot start before January 10, so A may end as late as then without moving the finish
+    graph = ScheduleGraph([("A", day(1), day(5)), ("B", day(10), day(12)), ("C", day(1), day(3))], [("A", "B")])
+    path = graph.critical_path()
+    assert path.tasks == ["B"]
+    assert path.finish == day(12)
+    assert path.timings["A"].slack == 5
+    assert path.timings["A"].latest_end == day(10)
+
+def test_slip_through_a_task_without_end():
+    graph = ScheduleGraph([("A", day(1), day(5)), ("B", day(5), None), ("C", day(5), day(7))], [("A", "B"), ("B", "C")])
+    shifts = graph.slip("A", day(8))
+    assert [(shift.name, shift.new_start, shift.new_end, shift.days) for shift in shifts] == [
+        ("A", day(1), day(8), 3),
+        ("B", day(8), None, 3),
+        ("C", day(8), day(10), 3),
+    ]
+
+def test_slip_of_a_task_without_end():
+    graph = ScheduleGraph([("B", day(5), None), ("C", day(5), day(7))], [("B", "C")])
+    shifts = graph.slip("B", day(9))
+    assert [(shift.name, shift.end, shift.new_end, shift.days) for shift in shifts] == [("B", None, day(9), 4), ("C", day(7), day(11), 4)]
+
+def snapshot(*tasks: tuple[str, str, str | None]) -> ProjectSnapshot:
+    return ProjectSnapshot(1, "Launch", None, [{"name": name, "description": None, "start": start, "end": end} for name, start, end in tasks], [], [], [], 0.0)
+
+def test_slip_without_dependents_reports_a_later_finish():
+    impact = format_slip_impact(snapshot(("A", "2025-01-01", "2025-01-05"), ("B", "2025-01-01", "2025-01-20")), "A", "2025-02-01")
+    assert "does not move any other task" in impact
+    assert impact.endswith("The project would finish on 2025-02-01 instead of 2025-01-20.")
+
+def test_slip_without_dependents_within_the_finish():
+    impact = format_slip_impact(snapshot(("A", "2025-01-01", "2025-01-05"), ("B", "2025-01-01", "2025-01-20")), "A", "2025-01-10")
+    assert impact.endswith("The project still finishes on 2025-01-20.")
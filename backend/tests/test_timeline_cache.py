@@ -0,0 +1,39 @@
+from datetime import date
+from interface.utils._timeline_cache import TimelineCache
+
+def row(version: int, name: str, xmin: int, xmax: int, removed: bool = False) -> tuple:
+    if removed:
+        return (xmin, xmax, version, None, name, None, None, None)
+    return (xmin, xmax, version, "Launch", name, None, date(2025, 1, 1), None)
+
+def test_settles_when_no_writer_is_running():
+    cache = TimelineCache()
+    cache._apply([row(1, "Design", 100, 100), row(2, "Build", 100, 100)])
+    assert cache.changes()[0] == 2
+
+def test_version_waits_for_writers_running_at_the_read():
+    cache = TimelineCache()
+    cache._apply([row(1, "Design", 100, 100)])
+
+    # Version 3 committed while the transaction holding version 2 (xid 101) still runs
+    cache._apply([row(3, "Test", 101, 103)])
+    version, full, tasks, _ = cache.changes(1)
+    assert version == 1 and [task.taskName for task in tasks] == ["Test"]
+
+    # Its row turns up on a later read of everything above the settled version, once no transaction below xmax 103 runs
+    cache._apply([row(2, "Build", 103, 104), row(3, "Test", 103, 104)])
+    version, full, tasks, _ = cache.changes(1)
+    assert version == 3 and {task.taskName for task in tasks} == {"Build", "Test"}
+
+def test_empty_read_still_settles():
+    cache = TimelineCache()
+    cache._apply([row(5, "Design", 100, 101)])
+    cache._apply([(101, 101, None, None, None, None, None, None)])
+    assert cache.changes()[0] == 5
+
+def test_removal_reported_after_settling():
+    cache = TimelineCache()
+    cache._apply([row(1, "Design", 100, 100)])
+    cache._apply([row(2, "Design", 100, 100, removed=True)])
+    version, full, tasks, removed = cache.changes(1)
+    assert (version, full, tasks, removed) == (2, False, [], ["Design"])
@@ -17,17 +17,18 @@ export default function ChatWindow({
 
     const loadMessage = (data: FormData) => {
         const message = data.get("chatMessage")!.toString().trim()
+        const idempotencyKey = crypto.randomUUID();
 
         setMessages(prevMessages => [...prevMessages, message, "Thinking..."]);
         requestAnimationFrame(() => {
             setTimeout(() => {
-                void submitMessage(message);
+                void submitMessage(message, idempotencyKey);
             }, 0);
         });
     };
 
-    const submitMessage = async (message: string) => {
-        const response = await sendMessage(message.toString(), thread, messages.length == 0);
+    const submitMessage = async (message: string, idempotencyKey: string) => {
+        const response = await sendMessage(message.toString(), thread, messages.length == 0, idempotencyKey);
         setMessages(prevMessages => {
             const messagesExcludeLast = prevMessages.filter(msg => msg != "Thinking...")
             return [...messagesExcludeLast, response]
@@ -8,11 +8,13 @@ export async function sendMessage(
     message: string, 
     thread: string, 
     isFirstMessage: boolean,
+    idempotencyKey: string,
 ): Promise<string> {
     const response = await instance.post("/chat", {
         "content": message,
         "threadID": thread,
         "isFirstMessage": isFirstMessage,
+        "idempotencyKey": idempotencyKey,
     });
 
     revalidateTag("status");
@@ -11,4 +11,7 @@ export type StatusData = {
         start: string,
         end: string | null,
     }[],
+    version: number,
+    full: boolean,
+    removed: string[],
 };
\ No newline at end of file